@@ -7,11 +7,19 @@
 作者: ych
 修改历史:
     1. 2025/9/4 - 创建文件
+    2. 2026/10/18 - 增加--token-cache参数
+    3. 2026/10/18 - 增加按名称查找主键的方法（配合响应缓存减少重复查询）
+    4. 2026/10/18 - 列表查询自动获取所有分页
+    5. 2026/10/18 - 列表查询支持records参数，返回紧凑记录对象
+    6. 2026/10/18 - 打印合并后的获取条数，不再打印首次请求的页码和每页数量
+    7. 2026/10/18 - find_bond_pk 支持 AsyncHttpObj
 """
 import argparse
 import time
 from datetime import datetime
 from waf_http.http import HttpObj
+from waf_http.paginator import fetch_all, DEFAULT_PER_PAGE
+from waf_http.records import BondRecord, to_records
 
 
 class NetworkBondManager:
@@ -20,10 +28,29 @@ class NetworkBondManager:
     def __init__(self, http_obj):
         self.http_obj = http_obj
 
-    def get_bonds(self):
-        """获取所有链路聚合信息"""
+    def get_bonds(self, per_page=DEFAULT_PER_PAGE, records=False):
+        """获取所有链路聚合信息（自动获取所有分页）
+
+        records 为True时 result 中为紧凑的 BondRecord 对象（仍支持 .get 读取），适合大批量数据
+        """
         url = "api/v2/network/bonds/"
-        return self.http_obj._http_get(url)
+        data = fetch_all(self.http_obj, url, per_page=per_page)
+        return to_records(data, BondRecord) if records else data
+
+    def find_bond_pk(self, name):
+        """按名称查找链路聚合主键，未找到返回None（http_obj 为 AsyncHttpObj 时返回协程）"""
+        if getattr(self.http_obj, "is_async", False):
+            return self._find_bond_pk_async(name)
+        for bond in self.get_bonds().get('result', []):
+            if bond.get('name') == name:
+                return bond.get('_pk')
+        return None
+
+    async def _find_bond_pk_async(self, name):
+        for bond in (await self.get_bonds()).get('result', []):
+            if bond.get('name') == name:
+                return bond.get('_pk')
+        return None
 
     def create_bond(self, name, net_devs, desc=""):
         """创建网络链路聚合"""
@@ -54,8 +81,7 @@ def print_bonds_info(bonds_data):
 
     if 'count' in bonds_data:
         print(f"链路聚合总数: {bonds_data.get('count', 0)}")
-        print(f"当前页码: {bonds_data.get('page', 1)}")
-        print(f"每页数量: {bonds_data.get('per_page', 20)}")
+        print(f"已获取: {len(bonds_data.get('result', []))}")
         print("=" * 80)
 
         # 打印每个链路聚合的详细信息
@@ -106,6 +132,7 @@ def main():
     parser.add_argument('--password', default='Admin@1234', help='密码')
     parser.add_argument('--port', type=int, default=443, help='端口号')
     parser.add_argument('--otp', help='OTP密钥（双因子认证）')
+    parser.add_argument('--token-cache', action='store_true', help='启用token磁盘缓存，避免重复登录')
 
     # 创建链路聚合参数
     parser.add_argument('--create', action='store_true', help='创建链路聚合')
@@ -130,7 +157,8 @@ def main():
             usr=args.user,
             pwd=args.password,
             port=args.port,
-            otp_key=args.otp
+            otp_key=args.otp,
+            token_cache=args.token_cache
         )
         http_obj.get_token()
 
@@ -154,16 +182,9 @@ def main():
         if args.delete:
             # 如果提供了名称但没有提供主键，则通过名称查找主键
             if not args.bond_pk and args.name:
-                # 获取所有链路聚合信息
-                bonds = bond_manager.get_bonds()
-                found_bond = None
-                # 在结果中查找匹配名称的链路聚合
-                for bond in bonds.get('result', []):
-                    if bond.get('name') == args.name:
-                        found_bond = bond
-                        break
-                if found_bond:
-                    args.bond_pk = found_bond.get('_pk')
+                # 在链路聚合列表中查找匹配名称的主键
+                args.bond_pk = bond_manager.find_bond_pk(args.name)
+                if args.bond_pk:
                     print(f"找到链路聚合 '{args.name}'，主键为: {args.bond_pk}")
                 else:
                     print(f"未找到名为 '{args.name}' 的链路聚合")
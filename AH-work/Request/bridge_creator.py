@@ -7,9 +7,14 @@
 作者: ych
 修改历史:
     1. 2025/9/4 - 创建文件
+    2. 2026/10/18 - 增加--token-cache参数
+    3. 2026/10/18 - 列表查询自动获取所有分页
+    4. 2026/10/18 - 列表查询支持records参数，返回紧凑记录对象
 """
 import argparse
 from waf_http.http import HttpObj
+from waf_http.paginator import fetch_all, DEFAULT_PER_PAGE
+from waf_http.records import BridgeRecord, to_records
 
 
 class NetworkManager:
@@ -18,10 +23,14 @@ class NetworkManager:
     def __init__(self, http_obj):
         self.http_obj = http_obj
 
-    def get_bridges(self):
-        """获取所有网桥配置"""
+    def get_bridges(self, per_page=DEFAULT_PER_PAGE, records=False):
+        """获取所有网桥配置（自动获取所有分页）
+
+        records 为True时 result 中为紧凑的 BridgeRecord 对象（仍支持 .get 读取），适合大批量数据
+        """
         url = "api/v2/network/bridges/"
-        return self.http_obj._http_get(url)
+        data = fetch_all(self.http_obj, url, per_page=per_page)
+        return to_records(data, BridgeRecord) if records else data
 
     def create_bridge(self, mtu=1500, stp=False, desc="", net_dev=None):
         """创建网桥
@@ -54,6 +63,7 @@ def main():
     parser.add_argument('--password', required=True, help='密码')
     parser.add_argument('--port', type=int, default=443, help='端口号，默认为443')
     parser.add_argument('--otp', help='OTP密钥（如果需要双因子认证）')
+    parser.add_argument('--token-cache', action='store_true', help='启用token磁盘缓存，避免重复登录')
 
     # 网桥配置参数
     parser.add_argument('--mtu', type=int, default=1500, help='最大传输单元，默认1500')
@@ -72,7 +82,8 @@ def main():
             usr=args.user,
             pwd=args.password,
             port=args.port,
-            otp_key=args.otp
+            otp_key=args.otp,
+            token_cache=args.token_cache
         )
         http_obj.get_token()
         # print("认证成功")
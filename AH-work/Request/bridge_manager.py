@@ -7,10 +7,17 @@
 作者: ych
 修改历史:
     1. 2025/9/4 - 创建文件
+    2. 2026/10/18 - 增加--token-cache参数
+    3. 2026/10/18 - 增加按名称查找主键的方法（配合响应缓存减少重复查询）
+    4. 2026/10/18 - 列表查询自动获取所有分页
+    5. 2026/10/18 - 列表查询支持records参数，返回紧凑记录对象
+    6. 2026/10/18 - find_bridge_pk 支持 AsyncHttpObj
 """
 import argparse
 import time
 from waf_http.http import HttpObj
+from waf_http.paginator import fetch_all, DEFAULT_PER_PAGE
+from waf_http.records import BridgeRecord, to_records
 
 
 class NetworkBridgeManager:
@@ -19,10 +26,29 @@ class NetworkBridgeManager:
     def __init__(self, http_obj):
         self.http_obj = http_obj
 
-    def get_bridges(self):
-        """获取所有网桥列表"""
+    def get_bridges(self, per_page=DEFAULT_PER_PAGE, records=False):
+        """获取所有网桥列表（自动获取所有分页）
+
+        records 为True时 result 中为紧凑的 BridgeRecord 对象（仍支持 .get 读取），适合大批量数据
+        """
         url = "api/v2/network/bridges/"
-        return self.http_obj._http_get(url)
+        data = fetch_all(self.http_obj, url, per_page=per_page)
+        return to_records(data, BridgeRecord) if records else data
+
+    def find_bridge_pk(self, name):
+        """按名称查找网桥主键，未找到返回None（http_obj 为 AsyncHttpObj 时返回协程）"""
+        if getattr(self.http_obj, "is_async", False):
+            return self._find_bridge_pk_async(name)
+        for bridge in self.get_bridges().get('result', []):
+            if bridge.get('name') == name:
+                return bridge.get('_pk')
+        return None
+
+    async def _find_bridge_pk_async(self, name):
+        for bridge in (await self.get_bridges()).get('result', []):
+            if bridge.get('name') == name:
+                return bridge.get('_pk')
+        return None
 
     def delete_bridge(self, bridge_pk):
         """删除指定网桥"""
@@ -41,6 +67,7 @@ def main():
     parser.add_argument('--password', default='Admin@1234', help='密码')
     parser.add_argument('--port', type=int, default=443, help='端口号')
     parser.add_argument('--otp', help='OTP密钥（双因子认证）')
+    parser.add_argument('--token-cache', action='store_true', help='启用token磁盘缓存，避免重复登录')
     parser.add_argument('--bridge-name', help='要删除的网桥名称')
     parser.add_argument('--bridge-pk', help='要删除的网桥主键')
     parser.add_argument('--list', action='store_true', help='列出所有网桥')
@@ -55,7 +82,8 @@ def main():
             usr=args.user,
             pwd=args.password,
             port=args.port,
-            otp_key=args.otp
+            otp_key=args.otp,
+            token_cache=args.token_cache
         )
         http_obj.get_token()
         # print("认证成功")
@@ -82,11 +110,7 @@ def main():
         if args.bridge_pk or args.bridge_name:
             # 如果没有直接提供主键，但提供了名称，则先获取网桥列表
             if not args.bridge_pk and args.bridge_name:
-                bridges = bridge_manager.get_bridges()
-                for bridge in bridges.get('result', []):
-                    if bridge.get('name') == args.bridge_name:
-                        args.bridge_pk = bridge.get('_pk')
-                        break
+                args.bridge_pk = bridge_manager.find_bridge_pk(args.bridge_name)
                 if not args.bridge_pk:
                     print(f"未找到名为 '{args.bridge_name}' 的网桥")
                     return
@@ -0,0 +1,103 @@
+"""
+模块名称: check_import_time.py
+
+该模块的目标：
+    检查各命令行工具的启动导入耗时（python -X importtime），
+    超出预算或在导入阶段加载了较慢的依赖（requests、cryptography、pyotp 等）时以非0状态退出，
+    用于发现启动变慢的改动
+
+作者: ych
+修改历史:
+    1. 2026/10/18 - 创建文件
+"""
+import argparse
+import glob
+import os
+import subprocess
+import sys
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+# 导入阶段不应加载的依赖，需要时在函数内导入
+HEAVY_MODULES = ("requests", "urllib3", "cryptography", "pyotp", "aiohttp", "numpy", "pyarrow", "zstandard")
+# 不检查的脚本（本脚本、测试用的模拟服务和基准测试）
+EXCLUDED = {"check_import_time", "mock_waf_server", "waf_benchmark"}
+
+
+def find_cli_modules():
+    """当前目录下所有命令行工具（含 __main__ 入口的脚本）"""
+    modules = []
+    for path in sorted(glob.glob(os.path.join(BASE_DIR, "*.py"))):
+        name = os.path.splitext(os.path.basename(path))[0]
+        if name in EXCLUDED:
+            continue
+        with open(path, "r", encoding="utf-8") as f:
+            if '__name__ == "__main__"' in f.read():
+                modules.append(name)
+    return modules
+
+
+def measure_import(module):
+    """在子进程中导入模块，返回 (累计导入耗时ms, 导入的模块名集合)"""
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                          cwd=BASE_DIR, capture_output=True, text=True)
+    if proc.returncode != 0:
+        raise RuntimeError(f"导入 {module} 失败: {proc.stderr.strip().splitlines()[-1]}")
+    total_us, imported = None, set()
+    for line in proc.stderr.splitlines():
+        # 格式: import time: self [us] | cumulative | imported package
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|", 2)
+        name = name.strip()
+        imported.add(name)
+        if name == module and cumulative.strip().isdigit():
+            total_us = int(cumulative)
+    return (total_us or 0) / 1000, imported
+
+
+def check_module(module, repeat=3, heavy=HEAVY_MODULES):
+    """多次测量取最小值，返回 (耗时ms, 导入阶段加载的较慢依赖)"""
+    best, imported = None, set()
+    for _ in range(max(1, repeat)):
+        elapsed, imported = measure_import(module)
+        best = elapsed if best is None else min(best, elapsed)
+    loaded = sorted(name for name in imported if name.split(".")[0] in heavy and "." not in name)
+    return best, loaded
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description='命令行工具启动导入耗时检查')
+    parser.add_argument('modules', nargs='*', help='要检查的模块，默认当前目录下所有命令行工具')
+    parser.add_argument('--budget-ms', type=float, default=100.0, help='单个工具导入耗时上限（毫秒），默认100')
+    parser.add_argument('--repeat', type=int, default=3, help='每个模块测量次数（取最小值），默认3')
+    args = parser.parse_args()
+
+    try:
+        modules = args.modules or find_cli_modules()
+        failures = 0
+        print(f"{'模块':<28}{'导入耗时(ms)':>14}  导入阶段加载的较慢依赖")
+        print("=" * 80)
+        for module in modules:
+            elapsed, loaded = check_module(module, args.repeat)
+            over = elapsed > args.budget_ms
+            failures += over or bool(loaded)
+            flag = " 超出预算" if over else ""
+            print(f"{module:<28}{elapsed:>14.1f}  {', '.join(loaded) or '-'}{flag}")
+        print("-" * 80)
+        if failures:
+            print(f"{failures} 个工具未通过检查（预算 {args.budget_ms:.0f}ms，且不应在导入阶段加载: "
+                  f"{', '.join(HEAVY_MODULES)}）")
+            sys.exit(1)
+        print("全部通过")
+
+    except Exception as e:
+        print(f"错误: {e}")
+        sys.exit(2)
+
+
+if __name__ == "__main__":
+    # 使用示例:
+    # python check_import_time.py
+    # python check_import_time.py ip_manager sys_logs --budget-ms 50
+    main()
@@ -0,0 +1,288 @@
+"""
+模块名称: fleet_runner.py
+
+该模块的目标：
+    对一批设备并行执行同一个管理操作（如 WAFManager.get_run_level），
+    汇总每台设备的结果、错误和耗时，输出结构化报告
+
+作者: ych
+修改历史:
+    1. 2026/10/18 - 创建文件
+    2. 2026/10/18 - 增加--metrics参数，导出各接口的请求统计
+    3. 2026/10/18 - MANAGERS 增加网桥创建、IP添加管理类
+    4. 2026/10/18 - 增加--max-in-flight/--rate-limits参数，按设备限速并报告限流等待时间
+    5. 2026/10/18 - 增加--circuit-breaker参数，已熔断的设备立即失败并重新排队，报告设备健康评分
+"""
+import argparse
+import csv
+import heapq
+import importlib
+import json
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from waf_http.circuit_breaker import CircuitBreaker, CircuitOpenError
+from waf_http.http import HttpObj
+from waf_http.metrics import RequestMetrics
+from waf_http.rate_limit import RequestGovernor
+from waf_http.token_cache import TokenCache
+
+# 管理类名称 -> (所在模块, 类名)，按需导入
+MANAGERS = {
+    "WAFManager": ("waf_manager", "WAFManager"),
+    "NetworkBondManager": ("bond_manager", "NetworkBondManager"),
+    "NetworkBridgeManager": ("bridge_manager", "NetworkBridgeManager"),
+    "NetworkBridgeCreator": ("bridge_creator", "NetworkManager"),
+    "NetworkIPManager": ("ip_manager", "NetworkIPManager"),
+    "NetworkIPAdder": ("ip_adder", "NetworkManager"),
+    "NetworkInterfaceManager": ("interface_manager", "NetworkInterfaceManager"),
+    "DeviceHardwareInterfaceManager": ("hardware_interface_viewer", "DeviceHardwareInterfaceManager"),
+    "SysLogService": ("sys_logs", "SysLogService"),
+    "OperationLogService": ("operation_logs", "OperationLogService"),
+    "SSHService": ("ssh_enable", "SSHService"),
+}
+
+
+def load_inventory(path, default_user="admin", default_password="Admin@1234", default_port=443):
+    """读取设备清单，支持json（对象列表）和csv（表头: ip,user,password,otp,port）"""
+    with open(path, "r", encoding="utf-8") as f:
+        if path.endswith(".csv"):
+            rows = list(csv.DictReader(f))
+        else:
+            rows = json.load(f)
+
+    devices = []
+    for row in rows:
+        devices.append({
+            "ip": row["ip"],
+            "user": row.get("user") or default_user,
+            "password": row.get("password") or default_password,
+            "otp": row.get("otp") or None,
+            "port": int(row.get("port") or default_port),
+        })
+    return devices
+
+
+def resolve_operation(operation):
+    """将 'WAFManager.get_run_level' 解析为 (管理类, 方法名)"""
+    try:
+        class_name, method_name = operation.rsplit(".", 1)
+        module_name, attr = MANAGERS[class_name]
+    except (ValueError, KeyError):
+        raise ValueError(f"不支持的操作: {operation}，可选管理类: {', '.join(MANAGERS)}")
+    manager_cls = getattr(importlib.import_module(module_name), attr)
+    if not callable(getattr(manager_cls, method_name, None)):
+        raise ValueError(f"{class_name} 没有方法 {method_name}")
+    return manager_cls, method_name
+
+
+def build_manager(manager_cls, http_obj):
+    """用已认证的http_obj创建管理类实例"""
+    if manager_cls.__name__ == "SSHService":
+        return manager_cls(http_obj.ip, http_obj.usr, http_obj.pwd, http_obj=http_obj)
+    return manager_cls(http_obj)
+
+
+def run_on_device(device, manager_cls, method_name, args=(), kwargs=None, token_cache=None, metrics=None,
+                  governor=None, circuit_breaker=None):
+    """在单台设备上执行操作，返回包含结果/错误/耗时的字典
+
+    启用熔断时，设备已熔断（请求未发出）或登录阶段失败导致熔断的，
+    返回值中的 retry_after 为可以重新执行的等待秒数，否则为None
+    """
+    record = {"ip": device["ip"], "ok": False, "result": None, "error": None,
+              "login_time": None, "op_time": None, "throttle_time": None, "health": None, "retry_after": None}
+    start = time.perf_counter()
+    try:
+        http_obj = HttpObj(
+            ip=device["ip"],
+            usr=device["user"],
+            pwd=device["password"],
+            port=device.get("port", 443),
+            otp_key=device.get("otp"),
+            token_cache=token_cache,
+            metrics=metrics,
+            governor=governor,
+            circuit_breaker=circuit_breaker
+        )
+        http_obj.get_token()
+        record["login_time"] = round(time.perf_counter() - start, 4)
+
+        op_start = time.perf_counter()
+        manager = build_manager(manager_cls, http_obj)
+        record["result"] = getattr(manager, method_name)(*args, **(kwargs or {}))
+        record["op_time"] = round(time.perf_counter() - op_start, 4)
+        record["ok"] = True
+    except CircuitOpenError as e:
+        record["error"] = f"{type(e).__name__}: {e}"
+        record["retry_after"] = e.retry_after
+    except Exception as e:
+        record["error"] = f"{type(e).__name__}: {e}"
+        # 操作本身可能不是幂等的，只有登录阶段的失败才可以安全地重新执行
+        if circuit_breaker is not None and record["login_time"] is None:
+            record["retry_after"] = circuit_breaker.retry_after(device["ip"]) or None
+    record["total_time"] = round(time.perf_counter() - start, 4)
+    if governor is not None:
+        record["throttle_time"] = round(governor.throttle_time(device["ip"]), 4)
+    if circuit_breaker is not None:
+        record["health"] = circuit_breaker.health(device["ip"])
+    return record
+
+
+def run_fleet(devices, operation, args=(), kwargs=None, workers=20, token_cache=None, metrics=None,
+              governor=None, circuit_breaker=None, reschedule=1):
+    """并行在所有设备上执行操作，返回汇总报告
+
+    metrics 为 RequestMetrics 对象时，所有设备的请求统计汇总到该对象；
+    governor 为 RequestGovernor 对象时按设备限速，报告中包含各设备各接口分类的限流统计；
+    circuit_breaker 为 CircuitBreaker 对象时，健康评分低的设备排在后面执行，
+    已熔断的设备立即失败，等熔断时间过后重新排队（最多 reschedule 次），不占用工作线程等待
+    """
+    manager_cls, method_name = resolve_operation(operation)
+    # 所有线程共用一个缓存对象，避免并发写同一个缓存文件
+    if token_cache is True:
+        token_cache = TokenCache()
+    start = time.perf_counter()
+    results = [None] * len(devices)
+    attempts = [0] * len(devices)
+    workers = max(1, min(workers, len(devices) or 1))
+    pending = deque(range(len(devices)))
+    if circuit_breaker is not None:
+        pending = deque(sorted(pending, key=lambda i: -circuit_breaker.health(devices[i]["ip"])))
+    delayed = []  # 等待重新执行的设备: (可以执行的时间, 序号)
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {}
+        while pending or delayed or futures:
+            now = time.monotonic()
+            while delayed and delayed[0][0] <= now:
+                pending.append(heapq.heappop(delayed)[1])
+            # 只提交空闲线程数量的任务，重新排队的设备不必等待整个队列
+            while pending and len(futures) < workers:
+                i = pending.popleft()
+                attempts[i] += 1
+                futures[executor.submit(run_on_device, devices[i], manager_cls, method_name, args, kwargs,
+                                        token_cache, metrics, governor, circuit_breaker)] = i
+            timeout = max(0.0, delayed[0][0] - now) if delayed else None
+            if not futures:
+                time.sleep(timeout)
+                continue
+            done, _ = wait(futures, timeout=timeout, return_when=FIRST_COMPLETED)
+            for future in done:
+                i = futures.pop(future)
+                record = future.result()
+                record["attempts"] = attempts[i]
+                if record["retry_after"] is not None and attempts[i] <= reschedule:
+                    heapq.heappush(delayed, (time.monotonic() + record["retry_after"], i))
+                else:
+                    # 结果按清单顺序保存
+                    results[i] = record
+
+    succeeded = sum(1 for r in results if r["ok"])
+    report = {
+        "operation": operation,
+        "devices": len(devices),
+        "succeeded": succeeded,
+        "failed": len(devices) - succeeded,
+        "wall_time": round(time.perf_counter() - start, 4),
+        "results": results,
+    }
+    if governor is not None:
+        report["throttle"] = governor.snapshot()
+    if circuit_breaker is not None:
+        report["health"] = circuit_breaker.snapshot()
+    return report
+
+
+def build_governor(rate_limits=None, max_in_flight=None):
+    """根据命令行参数创建限流对象，两个参数都未指定时不限流"""
+    if rate_limits is None and max_in_flight is None:
+        return None
+    config = json.loads(rate_limits) if rate_limits else {}
+    if max_in_flight is not None:
+        config["max_in_flight"] = max_in_flight
+    return RequestGovernor.from_config(config)
+
+
+def print_report(report):
+    """打印汇总报告"""
+    print("\n" + "=" * 100)
+    print(f"操作: {report['operation']}  设备数: {report['devices']}  "
+          f"成功: {report['succeeded']}  失败: {report['failed']}  总耗时: {report['wall_time']}s")
+    print("=" * 100)
+    for r in report["results"]:
+        status = "成功" if r["ok"] else "失败"
+        detail = json.dumps(r["result"], ensure_ascii=False, default=str) if r["ok"] else r["error"]
+        if len(detail) > 60:
+            detail = detail[:57] + "..."
+        login_time = f"{r['login_time']}s" if r['login_time'] is not None else "-"
+        op_time = f"{r['op_time']}s" if r['op_time'] is not None else "-"
+        if r.get("attempts", 1) > 1:
+            status += f"({r['attempts']}次)"
+        print(f"{r['ip']:<18}{status:<6}登录: {login_time:<10}操作: {op_time:<10}{detail}")
+    print("-" * 100)
+    throttled = [t for t in report.get("throttle", []) if t["throttled"]]
+    if throttled:
+        print("限流等待:")
+        for t in throttled:
+            print(f"  {t['device']:<18}{t['class']:<7}请求: {t['count']:<6}被限流: {t['throttled']:<6}"
+                  f"等待合计: {t['wait_total']}s  最长: {t['wait_max']}s")
+        print("-" * 100)
+    unhealthy = [h for h in report.get("health", []) if h["state"] != "closed" or h["health"] < 1]
+    if unhealthy:
+        print("设备健康:")
+        for h in unhealthy:
+            print(f"  {h['device']:<18}状态: {h['state']:<10}评分: {h['health']:<8}失败率: {h['failure_rate']:<8}"
+                  f"调用: {h['calls']:<6}拒绝: {h['rejected']}")
+        print("-" * 100)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='批量设备并行操作工具')
+    parser.add_argument('--inventory', required=True, help='设备清单文件（json或csv）')
+    parser.add_argument('--op', required=True, help='要执行的操作，如 WAFManager.get_run_level')
+    parser.add_argument('--op-args', default='[]', help='操作的位置参数（json数组），如 \'["forward_dev"]\'')
+    parser.add_argument('--user', default='admin', help='清单中未指定时使用的用户名')
+    parser.add_argument('--password', default='Admin@1234', help='清单中未指定时使用的密码')
+    parser.add_argument('--workers', type=int, default=20, help='并发数，默认20')
+    parser.add_argument('--token-cache', action='store_true', help='启用token磁盘缓存，避免重复登录')
+    parser.add_argument('--output', help='将完整报告保存为json文件')
+    parser.add_argument('--metrics', help='将各接口请求统计保存到文件（.prom 为Prometheus格式，否则为json）')
+    parser.add_argument('--max-in-flight', type=int, help='每台设备同时进行中的请求上限（启用限流）')
+    parser.add_argument('--rate-limits', help='按接口分类的限流配置（json，启用限流），'
+                                              '如 \'{"auth": {"rate": 0.5, "burst": 1}, "write": {"max_in_flight": 1}}\'')
+    parser.add_argument('--circuit-breaker', action='store_true', help='启用按设备熔断，不健康的设备立即失败并稍后重新执行')
+    parser.add_argument('--breaker-open-time', type=float, default=30, help='熔断时长（秒），默认30')
+    parser.add_argument('--reschedule', type=int, default=1, help='熔断设备重新排队执行的最大次数，默认1')
+
+    args = parser.parse_args()
+
+    try:
+        devices = load_inventory(args.inventory, args.user, args.password)
+        print(f"共 {len(devices)} 台设备，并发数 {args.workers}，执行: {args.op}")
+        metrics = RequestMetrics(dump_path=args.metrics) if args.metrics else None
+        governor = build_governor(args.rate_limits, args.max_in_flight)
+        # 连续2次连接失败即熔断，同一次登录的最后一次重试不再等待超时
+        circuit_breaker = CircuitBreaker(consecutive_failures=2, open_time=args.breaker_open_time) \
+            if args.circuit_breaker else None
+        report = run_fleet(devices, args.op, args=json.loads(args.op_args),
+                           workers=args.workers, token_cache=args.token_cache, metrics=metrics,
+                           governor=governor, circuit_breaker=circuit_breaker, reschedule=args.reschedule)
+        print_report(report)
+
+        if args.output:
+            with open(args.output, "w", encoding="utf-8") as f:
+                json.dump(report, f, ensure_ascii=False, indent=2, default=str)
+            print(f"报告已保存至: {args.output}")
+
+    except Exception as e:
+        print(f"错误: {e}")
+
+
+if __name__ == "__main__":
+    # 使用示例:
+    # python fleet_runner.py --inventory devices.json --op WAFManager.get_run_level
+    # python fleet_runner.py --inventory devices.csv --op NetworkInterfaceManager.get_interfaces --output report.json
+    # python fleet_runner.py --inventory devices.json --op SSHService.get_ssh_status --workers 50
+    # python fleet_runner.py --inventory devices.json --op WAFManager.get_run_level --workers 100 --max-in-flight 4 --rate-limits '{"auth": {"rate": 0.5}}'
+    # python fleet_runner.py --inventory devices.json --op WAFManager.get_run_level --circuit-breaker --breaker-open-time 10
+    main()
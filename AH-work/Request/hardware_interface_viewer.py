@@ -7,6 +7,7 @@
 作者: ych
 修改历史:
     1. 2025/9/4 - 创建文件
+    2. 2026/10/18 - 增加--token-cache参数
 """
 import argparse
 from datetime import datetime
@@ -32,6 +33,7 @@ def main():
     parser.add_argument('--password', default='Admin@1234', help='密码')
     parser.add_argument('--port', type=int, default=443, help='端口号')
     parser.add_argument('--otp', help='OTP密钥（双因子认证）')
+    parser.add_argument('--token-cache', action='store_true', help='启用token磁盘缓存，避免重复登录')
 
     args = parser.parse_args()
 
@@ -43,7 +45,8 @@ def main():
             usr=args.user,
             pwd=args.password,
             port=args.port,
-            otp_key=args.otp
+            otp_key=args.otp,
+            token_cache=args.token_cache
         )
         http_obj.get_token()
         # print("认证成功")
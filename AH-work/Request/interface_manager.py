@@ -7,9 +7,15 @@
 作者: ych
 修改历史:
     1. 2025/9/4 - 创建文件
+    2. 2026/10/18 - 增加--token-cache参数
+    3. 2026/10/18 - 列表查询自动获取所有分页
+    4. 2026/10/18 - 列表查询支持records参数，返回紧凑记录对象
+    5. 2026/10/18 - 打印合并后的获取条数，不再打印首次请求的页码和每页数量
 """
 import argparse
 from waf_http.http import HttpObj
+from waf_http.paginator import fetch_all, DEFAULT_PER_PAGE
+from waf_http.records import InterfaceRecord, to_records
 
 
 class NetworkInterfaceManager:
@@ -18,10 +24,14 @@ class NetworkInterfaceManager:
     def __init__(self, http_obj):
         self.http_obj = http_obj
 
-    def get_interfaces(self):
-        """获取所有网络接口信息"""
+    def get_interfaces(self, per_page=DEFAULT_PER_PAGE, records=False):
+        """获取所有网络接口信息（自动获取所有分页）
+
+        records 为True时 result 中为紧凑的 InterfaceRecord 对象（仍支持 .get 读取），适合大批量数据
+        """
         url = "api/v2/network/effects/interfaces/aggregate/"
-        return self.http_obj._http_get(url)
+        data = fetch_all(self.http_obj, url, per_page=per_page)
+        return to_records(data, InterfaceRecord) if records else data
 
 
 def print_interface_info(interface_data):
@@ -29,8 +39,7 @@ def print_interface_info(interface_data):
     # 打印总体信息
     print(f"设备类型: {interface_data.get('dev_type', 'N/A')}")
     print(f"接口总数: {interface_data.get('count', 0)}")
-    print(f"当前页码: {interface_data.get('page', 1)}")
-    print(f"每页数量: {interface_data.get('per_page', 20)}")
+    print(f"已获取: {len(interface_data.get('result', []))}")
     print("=" * 80)
 
     # 打印每个接口的详细信息
@@ -109,6 +118,7 @@ def main():
     parser.add_argument('--password', default='Admin@1234', help='密码')
     parser.add_argument('--port', type=int, default=443, help='端口号')
     parser.add_argument('--otp', help='OTP密钥（双因子认证）')
+    parser.add_argument('--token-cache', action='store_true', help='启用token磁盘缓存，避免重复登录')
 
     args = parser.parse_args()
 
@@ -120,7 +130,8 @@ def main():
             usr=args.user,
             pwd=args.password,
             port=args.port,
-            otp_key=args.otp
+            otp_key=args.otp,
+            token_cache=args.token_cache
         )
         http_obj.get_token()
         # print("认证成功")
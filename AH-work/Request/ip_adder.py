@@ -7,8 +7,13 @@
 作者: ych
 修改历史:
     1. 2025/9/4 - 创建文件
+    2. 2026/10/18 - 增加--token-cache参数
+    3. 2026/10/18 - 列表查询自动获取所有分页
+    4. 2026/10/18 - 列表查询支持records参数，返回紧凑记录对象
 """
 from waf_http.http import HttpObj
+from waf_http.paginator import fetch_all, DEFAULT_PER_PAGE
+from waf_http.records import IPRecord, to_records
 import argparse
 
 
@@ -18,10 +23,14 @@ class NetworkManager:
     def __init__(self, http_obj):
         self.http_obj = http_obj
 
-    def get_ips(self):
-        """获取所有IP地址配置"""
+    def get_ips(self, per_page=DEFAULT_PER_PAGE, records=False):
+        """获取所有IP地址配置（自动获取所有分页）
+
+        records 为True时 result 中为紧凑的 IPRecord 对象（仍支持 .get 读取），适合大批量数据
+        """
         url = "api/v2/network/ips/"
-        return self.http_obj._http_get(url)
+        data = fetch_all(self.http_obj, url, per_page=per_page)
+        return to_records(data, IPRecord) if records else data
 
     def add_ip(self, ip, mask, net_dev, vrrp="", gateway="", client_ip=None,
                server_ip=None, service_filter=None, source_ip_enable=False):
@@ -74,6 +83,7 @@ def main():
     parser.add_argument('--password', type=str, default='Admin@1234', help='密码')
     parser.add_argument('--port', type=int, default=443, help='端口号，默认为443')
     parser.add_argument('--otp', help='OTP密钥（如果需要双因子认证）')
+    parser.add_argument('--token-cache', action='store_true', help='启用token磁盘缓存，避免重复登录')
 
     # IP地址配置参数
     parser.add_argument('--address', required=True, help='要添加的IP地址，如 1.1.1.4')
@@ -99,7 +109,8 @@ def main():
             usr=args.user,
             pwd=args.password,
             port=args.port,
-            otp_key=args.otp
+            otp_key=args.otp,
+            token_cache=args.token_cache
         )
         http_obj.get_token()
         # print("认证成功")
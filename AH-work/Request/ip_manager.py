@@ -7,10 +7,16 @@
 作者: ych
 修改历史:
     1. 2025/9/4 - 创建文件
+    2. 2026/10/18 - 增加--token-cache参数
+    3. 2026/10/18 - 列表查询自动获取所有分页
+    4. 2026/10/18 - 列表查询支持records参数，返回紧凑记录对象
+    5. 2026/10/18 - delete_ips_by_net_dev 传入异步客户端时报错
 """
 import argparse
 import time
 from waf_http.http import HttpObj  # 使用现有的HttpObj类
+from waf_http.paginator import fetch_all, DEFAULT_PER_PAGE
+from waf_http.records import IPRecord, to_records
 
 
 class NetworkIPManager:
@@ -19,10 +25,14 @@ class NetworkIPManager:
     def __init__(self, http_obj):
         self.http_obj = http_obj
 
-    def get_ips(self):
-        """获取所有IP地址配置"""
+    def get_ips(self, per_page=DEFAULT_PER_PAGE, records=False):
+        """获取所有IP地址配置（自动获取所有分页）
+
+        records 为True时 result 中为紧凑的 IPRecord 对象（仍支持 .get 读取），适合大批量数据
+        """
         url = "api/v2/network/ips/"
-        return self.http_obj._http_get(url)
+        data = fetch_all(self.http_obj, url, per_page=per_page)
+        return to_records(data, IPRecord) if records else data
 
     def delete_ip(self, ip_pk):
         """删除指定IP地址 """
@@ -36,7 +46,9 @@ class NetworkIPManager:
         return self.http_obj._http_delete(url, params=params)
 
     def delete_ips_by_net_dev(self, net_dev):
-        """删除指定网卡上的所有IP地址"""
+        """删除指定网卡上的所有IP地址（需要在终端确认，不支持 AsyncHttpObj）"""
+        if getattr(self.http_obj, "is_async", False):
+            raise TypeError("delete_ips_by_net_dev 不支持 AsyncHttpObj，请使用 get_ips 和 delete_ip")
         # 获取所有IP配置
         ips_data = self.get_ips()
 
@@ -95,6 +107,7 @@ def main():
     parser.add_argument('--password', default='Admin@1234', help='密码')
     parser.add_argument('--port', type=int, default=443, help='端口号')
     parser.add_argument('--otp', help='OTP密钥（双因子认证）')
+    parser.add_argument('--token-cache', action='store_true', help='启用token磁盘缓存，避免重复登录')
     parser.add_argument('--net-dev', required=True, help='要操作的网卡名称（如eth3）')
     parser.add_argument('--list', action='store_true', help='列出所有IP地址配置')
 
@@ -108,7 +121,8 @@ def main():
             usr=args.user,
             pwd=args.password,
             port=args.port,
-            otp_key=args.otp
+            otp_key=args.otp,
+            token_cache=args.token_cache
         )
         http_obj.get_token()
         # print("认证成功")
@@ -0,0 +1,129 @@
+"""
+模块名称: log_analytics.py
+
+该模块的目标：
+    对系统日志/操作日志做统计分析：按小时和等级的事件数、Top用户、Top目标、按目标的失败率
+
+作者: ych
+修改历史:
+    1. 2026/10/18 - 创建文件
+"""
+import argparse
+from datetime import datetime, timedelta
+from waf_http.http import HttpObj
+from waf_http.log_analytics import to_columns, count_by_hour_and_level, top_n, failure_rate
+from sys_logs import SysLogService, parse_time_input
+from operation_logs import OperationLogService
+
+
+def print_hourly(cols):
+    """打印按小时、等级统计的事件数"""
+    hours, levels, matrix = count_by_hour_and_level(cols)
+    print("\n按小时统计事件数:")
+    print("=" * 100)
+    print(f"{'小时':<16}" + "".join(f"{level or 'N/A':>12}" for level in levels) + f"{'合计':>12}")
+    for hour, row in zip(hours, matrix):
+        hour_str = str(hour).replace("T", " ") + ":00"
+        print(f"{hour_str:<16}" + "".join(f"{n:>12}" for n in row) + f"{row.sum():>12}")
+    print("-" * 100)
+
+
+def print_top(cols, column, title, n):
+    """打印Top N"""
+    print(f"\n{title} Top {n}:")
+    print("=" * 60)
+    for i, (value, count) in enumerate(top_n(cols, column, n), 1):
+        print(f"{i:>3}. {value or 'N/A':<40}{count:>10}")
+    print("-" * 60)
+
+
+def print_failure_rate(cols, n):
+    """打印按目标统计的失败率"""
+    print(f"\n按事件名称统计失败率 Top {n}:")
+    print("=" * 80)
+    print(f"{'事件名称':<40}{'总数':>10}{'失败':>10}{'失败率':>12}")
+    for target, total, failed, rate in failure_rate(cols)[:n]:
+        print(f"{target or 'N/A':<40}{total:>10}{failed:>10}{rate:>12.1%}")
+    print("-" * 80)
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description='日志统计分析工具')
+    parser.add_argument('--ip', required=True, help='设备IP地址')
+    parser.add_argument('--user', required=True, help='用户名')
+    parser.add_argument('--password', required=True, help='密码')
+    parser.add_argument('--port', type=int, default=443, help='端口号，默认为443')
+    parser.add_argument('--otp', help='OTP密钥（如果需要双因子认证）')
+    parser.add_argument('--token-cache', action='store_true', help='启用token磁盘缓存，避免重复登录')
+    parser.add_argument('--type', choices=['sys', 'operation'], default='operation', help='日志类型，默认操作日志')
+    # 时间范围参数
+    today = datetime.now().strftime("%Y-%m-%d")
+    parser.add_argument('--start-time', default=f"{today} 00:00:00", help='开始时间 (默认: 当天00:00:00)')
+    parser.add_argument('--end-time', default=f"{today} 23:59:59", help='结束时间 (默认: 当天23:59:59)')
+    parser.add_argument('--last-7-days', action='store_true', help='分析最近7天的日志')
+    parser.add_argument('--last-30-days', action='store_true', help='分析最近30天的日志')
+    parser.add_argument('--workers', type=int, default=4, help='并发数，默认4')
+    parser.add_argument('--shard', choices=['day', 'hour'], help='按天/小时拆分时间范围并发查询')
+    # 分析内容
+    parser.add_argument('--report', choices=['hourly', 'users', 'targets', 'failures', 'all'], default='all',
+                        help='统计内容，默认全部')
+    parser.add_argument('--top', type=int, default=10, help='Top N 的数量，默认10')
+    args = parser.parse_args()
+
+    try:
+        start_time = parse_time_input(args.start_time, "00:00:00")
+        end_time = parse_time_input(args.end_time, "23:59:59")
+        now = datetime.now()
+        if args.last_7_days:
+            start_time = (now - timedelta(days=7)).strftime("%Y-%m-%d 00:00:00")
+            end_time = now.strftime("%Y-%m-%d 23:59:59")
+        elif args.last_30_days:
+            start_time = (now - timedelta(days=30)).strftime("%Y-%m-%d 00:00:00")
+            end_time = now.strftime("%Y-%m-%d 23:59:59")
+        print(f"分析时间范围: {start_time} 到 {end_time}")
+
+        # 创建HTTP对象并认证
+        print(f"正在连接到设备: {args.ip}")
+        http_obj = HttpObj(
+            ip=args.ip,
+            usr=args.user,
+            pwd=args.password,
+            port=args.port,
+            otp_key=args.otp,
+            token_cache=args.token_cache
+        )
+        http_obj.get_token()
+
+        # 获取日志
+        if args.type == 'sys':
+            logs = SysLogService(http_obj).get_sys_logs(start_time, end_time, workers=args.workers, shard=args.shard)
+        else:
+            logs = OperationLogService(http_obj).get_today_operation_logs(start_time, end_time,
+                                                                          workers=args.workers, shard=args.shard)
+        if not logs:
+            print(f"在 {start_time} 到 {end_time} 范围内未找到日志")
+            return
+
+        # 转换为列式数组后统计
+        cols = to_columns(logs)
+        del logs
+        if args.report in ('hourly', 'all'):
+            print_hourly(cols)
+        if args.report in ('users', 'all'):
+            print_top(cols, 'user', '用户操作数' if args.type == 'operation' else '服务事件数', args.top)
+        if args.report in ('targets', 'all'):
+            print_top(cols, 'target', '事件名称', args.top)
+        if args.report in ('failures', 'all') and args.type == 'operation':
+            print_failure_rate(cols, args.top)
+
+    except Exception as e:
+        print(f"错误: {e}")
+
+
+if __name__ == "__main__":
+    # 使用示例:
+    # python log_analytics.py --ip 10.20.192.106 --user admin --password Admin@1234
+    # python log_analytics.py --ip 10.20.192.106 --user admin --password Admin@1234 --type sys --last-7-days --shard day
+    # python log_analytics.py --ip 10.20.192.106 --user admin --password Admin@1234 --last-30-days --report failures --top 20
+    main()
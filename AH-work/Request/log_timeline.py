@@ -0,0 +1,114 @@
+"""
+模块名称: log_timeline.py
+
+该模块的目标：
+    获取多台设备（如HA双机或整个设备清单）的日志，按时间合并为一条时间线流式输出，
+    每条日志标明来源设备，便于跨设备排查问题
+
+作者: ych
+修改历史:
+    1. 2026/10/18 - 创建文件
+"""
+import argparse
+import json
+import sys
+from datetime import datetime, timedelta
+from functools import partial
+from waf_http.http import HttpObj
+from waf_http.log_merge import merge_device_logs
+from waf_http.token_cache import TokenCache
+from fleet_runner import load_inventory
+from sys_logs import SysLogService, parse_time_input
+from operation_logs import OperationLogService
+
+
+def open_device_pages(device, log_type, start_time, end_time, workers=2, token_cache=None):
+    """登录一台设备并返回其逐页的日志迭代器"""
+    http_obj = HttpObj(
+        ip=device["ip"],
+        usr=device["user"],
+        pwd=device["password"],
+        port=device.get("port", 443),
+        otp_key=device.get("otp"),
+        token_cache=token_cache
+    )
+    http_obj.get_token()
+    if log_type == "sys":
+        return SysLogService(http_obj).iter_sys_log_pages(start_time, end_time, workers=workers)
+    return OperationLogService(http_obj).iter_operation_log_pages(start_time, end_time, workers=workers)
+
+
+def format_timeline_entry(index, log):
+    """格式化单条时间线日志，返回以换行结尾的一行文本"""
+    msg = (log.get("detail") or {}).get("msg", "N/A")
+    return (f"{index:>6}. {log.get('timestamp', 'N/A')}  [{log.get('device')}]  "
+            f"{log.get('level', 'N/A')}  {log.get('user', 'N/A')}  {log.get('target', 'N/A')}: {msg}\n")
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description='多设备日志合并时间线工具')
+    parser.add_argument('--inventory', required=True, help='设备清单文件（json或csv）')
+    parser.add_argument('--user', default='admin', help='清单中未指定时使用的用户名')
+    parser.add_argument('--password', default='Admin@1234', help='清单中未指定时使用的密码')
+    parser.add_argument('--token-cache', action='store_true', help='启用token磁盘缓存，避免重复登录')
+    parser.add_argument('--type', choices=['sys', 'operation'], default='sys', help='日志类型，默认系统日志')
+    # 时间范围参数
+    today = datetime.now().strftime("%Y-%m-%d")
+    parser.add_argument('--start-time', default=f"{today} 00:00:00", help='开始时间 (默认: 当天00:00:00)')
+    parser.add_argument('--end-time', default=f"{today} 23:59:59", help='结束时间 (默认: 当天23:59:59)')
+    parser.add_argument('--yesterday', action='store_true', help='查询昨天的日志')
+    parser.add_argument('--last-7-days', action='store_true', help='查询最近7天的日志')
+    parser.add_argument('--workers', type=int, default=2, help='每台设备并发获取分页的线程数，默认2')
+    parser.add_argument('--buffer-pages', type=int, default=4, help='每台设备最多预先获取的页数，默认4')
+    parser.add_argument('--output', help='同时将合并后的日志写入NDJSON文件')
+    args = parser.parse_args()
+
+    try:
+        start_time = parse_time_input(args.start_time, "00:00:00")
+        end_time = parse_time_input(args.end_time, "23:59:59")
+        now = datetime.now()
+        if args.yesterday:
+            yesterday = now - timedelta(days=1)
+            start_time = yesterday.strftime("%Y-%m-%d 00:00:00")
+            end_time = yesterday.strftime("%Y-%m-%d 23:59:59")
+        elif args.last_7_days:
+            start_time = (now - timedelta(days=7)).strftime("%Y-%m-%d 00:00:00")
+            end_time = now.strftime("%Y-%m-%d 23:59:59")
+
+        devices = load_inventory(args.inventory, args.user, args.password)
+        print(f"共 {len(devices)} 台设备，查询时间范围: {start_time} 到 {end_time}")
+        # 所有线程共用一个缓存对象，避免并发写同一个缓存文件
+        token_cache = TokenCache() if args.token_cache else None
+        sources = {
+            device["ip"]: partial(open_device_pages, device, args.type, start_time, end_time,
+                                  workers=args.workers, token_cache=token_cache)
+            for device in devices
+        }
+
+        out_file = open(args.output, "w", encoding="utf-8") if args.output else None
+        count = 0
+        try:
+            for count, log in enumerate(merge_device_logs(sources, max_buffered_pages=args.buffer_pages), 1):
+                sys.stdout.write(format_timeline_entry(count, log))
+                if out_file:
+                    out_file.write(json.dumps(log, ensure_ascii=False) + "\n")
+        except KeyboardInterrupt:
+            print("\n已停止")
+        finally:
+            if out_file:
+                out_file.close()
+        print(f"共输出 {count} 条日志")
+        if args.output:
+            print(f"合并后的日志已保存至: {args.output}")
+
+    except Exception as e:
+        print(f"错误: {e}")
+
+
+if __name__ == "__main__":
+    # 使用示例:
+    # python log_timeline.py --inventory ha_pair.json
+    # python log_timeline.py --inventory devices.csv --type operation --last-7-days --output timeline.ndjson
+    # python log_timeline.py --inventory devices.json --start-time "2025-09-04 10:00:00" --end-time "2025-09-04 12:00:00"
+    main()
@@ -0,0 +1,544 @@
+"""
+模块名称: mock_waf_server.py
+
+该模块的目标：
+    本地模拟 WAF 设备的 api/v2 接口（HTTPS），没有真实设备时也能运行各个管理脚本、
+    对 HttpObj 和各管理类做压力测试；数据量、分页上限、响应延迟/抖动和错误率均可配置
+
+作者: ych
+修改历史:
+    1. 2026/10/18 - 创建文件
+    2. 2026/10/18 - 响应头和响应体合并发送并关闭Nagle，避免长连接上每个请求多出约40ms的延迟确认等待
+    3. 2026/10/18 - TLS握手移到各连接的处理线程中并设置超时，慢连接或不握手的客户端不再阻塞整个服务
+"""
+import argparse
+import base64
+import bisect
+import ipaddress
+import json
+import os
+import random
+import re
+import secrets
+import ssl
+import tempfile
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qs
+import pyotp
+from cryptography import x509
+from cryptography.x509.oid import NameOID
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import rsa, padding
+
+TIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+# 默认数据量
+DEFAULT_SIZES = {
+    "interfaces": 8,
+    "bonds": 2,
+    "bridges": 2,
+    "ips": 16,
+    "events": 1000,
+    "sys_events": 1000,
+}
+
+LOG_LEVELS = ["info", "info", "info", "warning", "error"]
+OPT_TYPES = ["login", "logout", "create", "update", "delete"]
+OPT_TARGETS = ["用户登录", "修改网络配置", "修改运行等级", "添加IP地址", "删除网桥", "开启SSH"]
+SYS_SERVICES = ["nginx", "detector", "ha", "sshd", "syslog", "monitor"]
+SYS_TARGETS = ["服务启动", "服务停止", "配置加载", "健康检查", "证书更新"]
+
+
+def generate_tls_context(host):
+    """生成自签名证书并返回服务端SSL上下文"""
+    key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    name = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, "mock-waf")])
+    alt_names = [x509.DNSName("localhost")]
+    try:
+        alt_names.append(x509.IPAddress(ipaddress.ip_address(host)))
+    except ValueError:
+        alt_names.append(x509.DNSName(host))
+    now = datetime.now(timezone.utc)
+    cert = (x509.CertificateBuilder()
+            .subject_name(name)
+            .issuer_name(name)
+            .public_key(key.public_key())
+            .serial_number(x509.random_serial_number())
+            .not_valid_before(now - timedelta(days=1))
+            .not_valid_after(now + timedelta(days=365))
+            .add_extension(x509.SubjectAlternativeName(alt_names), critical=False)
+            .sign(key, hashes.SHA256()))
+
+    # load_cert_chain 只接受文件路径，加载后即删除临时文件
+    fd, path = tempfile.mkstemp(suffix=".pem")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(key.private_bytes(serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8,
+                                      serialization.NoEncryption()))
+            f.write(cert.public_bytes(serialization.Encoding.PEM))
+        context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+        context.load_cert_chain(path)
+    finally:
+        os.remove(path)
+    return context
+
+
+class _TLSHTTPServer(ThreadingHTTPServer):
+    """HTTPS 服务：监听socket保持明文，接受连接后在处理线程中完成TLS握手
+
+    握手放在 accept 循环中时，新连接只能逐个握手，一个不握手的客户端会阻塞所有后续连接
+    """
+    daemon_threads = True
+    # TLS握手超时（秒），超时的连接直接关闭
+    handshake_timeout = 5.0
+
+    def __init__(self, server_address, handler_class, tls_context):
+        super().__init__(server_address, handler_class)
+        self.tls_context = tls_context
+
+    def get_request(self):
+        sock, client_address = self.socket.accept()
+        return self.tls_context.wrap_socket(sock, server_side=True, do_handshake_on_connect=False), client_address
+
+    def finish_request(self, request, client_address):
+        """在处理线程中握手，失败或超时时放弃该连接（随后由 shutdown_request 关闭）"""
+        request.settimeout(self.handshake_timeout)
+        try:
+            request.do_handshake()
+        except OSError:
+            return
+        request.settimeout(None)
+        super().finish_request(request, client_address)
+
+
+class MockDataset:
+    """模拟设备上的配置和日志数据"""
+
+    def __init__(self, sizes=None, seed=0, log_days=1):
+        self.sizes = {**DEFAULT_SIZES, **(sizes or {})}
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.next_pk = 1
+        self.run_level = "none_execute"
+        self.ssh_enable = False
+        self.interfaces = [self._make_interface(i) for i in range(self.sizes["interfaces"])]
+        self.bonds = [self._make_bond(i) for i in range(self.sizes["bonds"])]
+        self.bridges = [self._make_bridge(i) for i in range(self.sizes["bridges"])]
+        self.ips = [self._make_ip(i) for i in range(self.sizes["ips"])]
+        # 日志按时间正序保存，查询时按时间倒序返回（与设备一致）
+        end = datetime.now().replace(hour=23, minute=59, second=59, microsecond=0)
+        start = end - timedelta(days=log_days) + timedelta(seconds=1)
+        self.logs = {
+            "events": self._make_logs(self.sizes["events"], start, end, self._make_event),
+            "sys_events": self._make_logs(self.sizes["sys_events"], start, end, self._make_sys_event),
+        }
+        self.log_times = {name: [entry["timestamp"] for entry in logs] for name, logs in self.logs.items()}
+
+    def new_pk(self):
+        """分配主键（调用方持有锁）"""
+        pk = self.next_pk
+        self.next_pk += 1
+        return pk
+
+    def _mac(self):
+        return ":".join(f"{self.rng.randrange(256):02x}" for _ in range(6))
+
+    def _now_ms(self):
+        return int(time.time() * 1000)
+
+    def _make_interface(self, i):
+        return {"name": f"eth{i}", "mac": self._mac(), "type": "ethernet",
+                "bypass_pair": f"eth{i ^ 1}" if i >= 2 else None, "poweroff_bypass": i >= 2}
+
+    def _make_bond(self, i):
+        members = [f"eth{j}" for j in (2 * i + 2, 2 * i + 3)]
+        return {"_pk": self.new_pk(), "name": f"bond{i}", "desc": f"mock bond {i}", "net_dev": members,
+                "namespace_id": 1, "_user_id": 1, "_is_delete": False, "patch": {"mode": "802.3ad"},
+                "_create_timestamp": self._now_ms(), "_update_timestamp": self._now_ms()}
+
+    def _make_bridge(self, i):
+        return {"_pk": self.new_pk(), "name": f"br{i}", "desc": f"mock bridge {i}", "mtu": 1500, "stp": False,
+                "net_dev": [f"eth{2 * i + 2}", f"eth{2 * i + 3}"], "namespace_id": 1,
+                "_create_timestamp": self._now_ms()}
+
+    def _make_ip(self, i):
+        net_dev = f"eth{i % max(1, self.sizes['interfaces'])}"
+        return {"_pk": self.new_pk(), "ip": f"10.{i // 250 % 250}.{i % 250}.1", "mask": 24,
+                "gateway": "", "vrrp": "", "net_dev": net_dev, "mac": "", "_is_default": i == 0,
+                "session_sync": 0, "source_ip_enable": False, "client_ip": [], "server_ip": [],
+                "service_filter": {"ha": False, "admin": i == 0, "traffic": True, "embedded": False},
+                "_create_timestamp": self._now_ms()}
+
+    def _make_logs(self, count, start, end, make_entry):
+        span = max(1, int((end - start).total_seconds()))
+        offsets = sorted(self.rng.randrange(span + 1) for _ in range(count))
+        return [make_entry(self.new_pk(), (start + timedelta(seconds=s)).strftime(TIME_FORMAT)) for s in offsets]
+
+    def _make_event(self, pk, timestamp):
+        method = self.rng.choice(["GET", "POST", "PUT", "DELETE"])
+        return {"_pk": pk, "timestamp": timestamp, "user": self.rng.choice(["admin", "audit", "operator"]),
+                "ip": f"192.168.1.{self.rng.randrange(2, 30)}", "target": self.rng.choice(OPT_TARGETS),
+                "opt_type": self.rng.choice(OPT_TYPES),
+                "opt_res": "success" if self.rng.random() < 0.9 else "failed",
+                "level": self.rng.choice(LOG_LEVELS), "device_id": "mock-0001", "device_name": "mock-waf",
+                "detail": {"msg": f"mock operation {pk}",
+                           "extend": {"Path": "/api/v2/network/ips/", "Method": method,
+                                      "User-Agent": "python-requests"}}}
+
+    def _make_sys_event(self, pk, timestamp):
+        return {"_pk": pk, "timestamp": timestamp, "user": self.rng.choice(SYS_SERVICES),
+                "target": self.rng.choice(SYS_TARGETS), "level": self.rng.choice(LOG_LEVELS),
+                "detail": {"msg": f"mock system event {pk}"}}
+
+    def interfaces_aggregate(self):
+        """网络接口汇总视图，ips 取自当前的IP配置"""
+        with self.lock:
+            ips_by_dev = {}
+            for ip in self.ips:
+                ips_by_dev.setdefault(ip["net_dev"], []).append(ip)
+            members = {dev for group in self.bonds + self.bridges for dev in group["net_dev"]}
+            result = []
+            for i, iface in enumerate(self.interfaces):
+                name = iface["name"]
+                result.append({"_pk": i + 1, "name": name, "type": iface["type"], "status": "up",
+                               "mac": iface["mac"], "namespace_id": 1, "alive": True, "admin": i == 0,
+                               "ha": False, "session_sync": 0, "enable": True, "support_disable": i != 0,
+                               "ips": list(ips_by_dev.get(name, [])), "ip_pool": [],
+                               "parent_interface": [], "net_dev": [name] if name not in members else []})
+            return result
+
+    def query_logs(self, log_type, gte=None, lte=None):
+        """按时间范围查询日志，按时间倒序返回"""
+        times = self.log_times[log_type]
+        lo = bisect.bisect_left(times, gte) if gte else 0
+        hi = bisect.bisect_right(times, lte) if lte else len(times)
+        return self.logs[log_type][lo:hi][::-1]
+
+
+class MockWAFServer:
+    """模拟 WAF 设备的 HTTPS 服务
+
+    用法:
+        with MockWAFServer(sizes={"events": 100000}, latency=0.01) as server:
+            http_obj = HttpObj("127.0.0.1", "admin", "Admin@1234", port=server.port)
+    """
+
+    def __init__(self, host="127.0.0.1", port=0, users=None, otp_key=None, sizes=None, seed=0, log_days=1,
+                 latency=0.0, jitter=0.0, error_rate=0.0, max_per_page=100, token_ttl=None):
+        """
+        :param port: 监听端口，0 表示自动分配
+        :param users: {用户名: 密码}，默认 {"admin": "Admin@1234"}
+        :param otp_key: 设置后登录需要双因子认证
+        :param sizes: 各类数据的数量，见 DEFAULT_SIZES
+        :param log_days: 日志分布在最近几天内（截止到今天23:59:59）
+        :param latency: 每个请求的基础延迟（秒）
+        :param jitter: 在基础延迟上随机增加 0~jitter 秒
+        :param error_rate: 非认证接口随机返回 500/503 的比例
+        :param max_per_page: 分页接口每页数量上限
+        :param token_ttl: token 有效期（秒），过期后返回401，None 表示不过期
+        """
+        self.users = users or {"admin": "Admin@1234"}
+        self.otp_key = otp_key
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.max_per_page = max_per_page
+        self.token_ttl = token_ttl
+        self.data = MockDataset(sizes, seed=seed, log_days=log_days)
+        self.private_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+        self.public_pem = self.private_key.public_key().public_bytes(
+            serialization.Encoding.PEM, serialization.PublicFormat.SubjectPublicKeyInfo).decode()
+        self.tokens = {}  # token -> 签发时间
+        self.pending_otp = {}  # 登录后待双因子认证的 token -> 用户名
+        self.stats = Counter()
+        self._stats_lock = threading.Lock()
+        self._rng = random.Random(seed)
+
+        self.httpd = _TLSHTTPServer((host, port), _MockHandler, generate_tls_context(host))
+        self.httpd.mock = self
+        self._thread = None
+
+    @property
+    def host(self):
+        return self.httpd.server_address[0]
+
+    @property
+    def port(self):
+        return self.httpd.server_address[1]
+
+    def start(self):
+        """在后台线程中启动服务"""
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """停止服务"""
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        if self._thread:
+            self._thread.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
+
+    def count(self, key):
+        """统计计数，如按接口的请求数、登录次数"""
+        with self._stats_lock:
+            self.stats[key] += 1
+
+    def issue_token(self):
+        token = secrets.token_hex(16)
+        self.tokens[token] = time.time()
+        return token
+
+    def check_token(self, header):
+        """校验 Authorization 头，支持 "token" 和 "Bearer token" 两种形式"""
+        token = (header or "").split(" ")[-1]
+        issued = self.tokens.get(token)
+        if issued is None:
+            return False
+        if self.token_ttl is not None and time.time() - issued > self.token_ttl:
+            self.tokens.pop(token, None)
+            return False
+        return True
+
+    def inject_delay_and_error(self, path):
+        """按配置注入延迟和错误，返回要返回的错误状态码或None"""
+        delay = self.latency + (self._rng.uniform(0, self.jitter) if self.jitter else 0)
+        if delay > 0:
+            time.sleep(delay)
+        if self.error_rate and not path.startswith("api/v2/system/") and self._rng.random() < self.error_rate:
+            return self._rng.choice([500, 503])
+        return None
+
+
+class _MockHandler(BaseHTTPRequestHandler):
+    """请求处理：解析路径后分发到各接口"""
+    protocol_version = "HTTP/1.1"
+    # 响应头和响应体缓冲后一次写出（handle_one_request 结束时flush）
+    wbufsize = -1
+    disable_nagle_algorithm = True
+
+    ROUTES = [
+        ("GET", r"api/v2/system/auth/public_key/", "public_key", False),
+        ("POST", r"api/v2/system/user/login/", "login", False),
+        ("POST", r"api/v2/system/user/otp_auth/(?P<pk>\w+)/", "otp_auth", False),
+        ("GET", r"api/v2/device/run_level/", "get_run_level", True),
+        ("PUT", r"api/v2/device/run_level/", "set_run_level", True),
+        ("GET", r"api/v2/device/hardware/interfaces/", "hardware_interfaces", True),
+        ("GET", r"api/v2/device/hardware/sshd/", "get_sshd", True),
+        ("POST", r"api/v2/device/hardware/sshd/", "set_sshd", True),
+        ("GET", r"api/v2/network/effects/interfaces/aggregate/", "interfaces", True),
+        ("GET", r"api/v2/network/(?P<kind>bonds|bridges|ips)/", "list_config", True),
+        ("POST", r"api/v2/network/(?P<kind>bonds|bridges|ips)/", "create_config", True),
+        ("DELETE", r"api/v2/network/(?P<kind>bonds|bridges|ips)/(?P<pk>\d+)/", "delete_config", True),
+        ("GET", r"api/v2/logs/(?P<kind>events|sys_events)/", "list_logs", True),
+    ]
+    COMPILED = [(method, re.compile(pattern + r"$"), name, auth) for method, pattern, name, auth in ROUTES]
+
+    def log_message(self, format, *args):
+        # 压测时不输出每个请求的访问日志
+        pass
+
+    def do_GET(self):
+        self._dispatch("GET")
+
+    def do_POST(self):
+        self._dispatch("POST")
+
+    def do_PUT(self):
+        self._dispatch("PUT")
+
+    def do_DELETE(self):
+        self._dispatch("DELETE")
+
+    def _dispatch(self, method):
+        mock = self.server.mock
+        parts = urlsplit(self.path)
+        path = parts.path.lstrip("/")
+        query = {k: v[-1] for k, v in parse_qs(parts.query).items()}
+        length = int(self.headers.get("Content-Length") or 0)
+        raw = self.rfile.read(length) if length else b""
+
+        for route_method, pattern, name, auth in self.COMPILED:
+            match = pattern.match(path)
+            if not match or route_method != method:
+                continue
+            mock.count(f"{method} {pattern.pattern[:-1]}")
+            status = mock.inject_delay_and_error(path)
+            if status:
+                return self._send_json(status, {"code": "ERROR", "message": "injected error"})
+            if auth and not mock.check_token(self.headers.get("Authorization")):
+                return self._send_json(401, {"code": "UNAUTHORIZED", "message": "token无效或已过期"})
+            try:
+                body = json.loads(raw) if raw else {}
+            except json.JSONDecodeError:
+                return self._send_json(400, {"code": "ERROR", "message": "无效的JSON请求体"})
+            return getattr(self, f"_api_{name}")(query, body, **match.groupdict())
+        self._send_json(404, {"code": "NOT_FOUND", "message": f"未知接口: {method} {path}"})
+
+    def _send_json(self, status, payload):
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _ok(self, data):
+        self._send_json(200, {"code": "SUCCESS", "message": "", "data": data})
+
+    def _paginate(self, items, query):
+        mock = self.server.mock
+        per_page = min(max(1, int(query.get("per_page") or 20)), mock.max_per_page)
+        page = max(1, int(query.get("page") or 1))
+        start = (page - 1) * per_page
+        self._ok({"count": len(items), "page": page, "per_page": per_page,
+                  "result": items[start:start + per_page]})
+
+    # ---- 认证 ----
+    def _api_public_key(self, query, body):
+        self._ok(self.server.mock.public_pem)
+
+    def _api_login(self, query, body):
+        mock = self.server.mock
+        mock.count("login")
+        username = body.get("username")
+        try:
+            password = mock.private_key.decrypt(base64.b64decode(body.get("password", "")),
+                                                padding.PKCS1v15()).decode()
+        except ValueError:
+            password = None
+        if username not in mock.users or mock.users[username] != password:
+            return self._send_json(200, {"code": "LOGIN_FAILED", "message": "用户名或密码错误"})
+        if mock.otp_key:
+            pre_token = secrets.token_hex(16)
+            mock.pending_otp[pre_token] = username
+            return self._ok({"pk": 1, "token": pre_token})
+        self._ok({"pk": 1, "token": mock.issue_token()})
+
+    def _api_otp_auth(self, query, body, pk):
+        mock = self.server.mock
+        if mock.pending_otp.pop(body.get("token"), None) is None:
+            return self._send_json(200, {"code": "OTP_FAILED", "message": "登录状态已失效"})
+        if not pyotp.TOTP(mock.otp_key).verify(str(body.get("otp_code")), valid_window=1):
+            return self._send_json(200, {"code": "OTP_FAILED", "message": "动态口令错误"})
+        self._ok({"pk": int(pk), "token": mock.issue_token()})
+
+    # ---- 设备 ----
+    def _api_get_run_level(self, query, body):
+        self._ok(self.server.mock.data.run_level)
+
+    def _api_set_run_level(self, query, body):
+        data = self.server.mock.data
+        data.run_level = body.get("level", data.run_level)
+        self._ok({"level": data.run_level})
+
+    def _api_hardware_interfaces(self, query, body):
+        self._ok(self.server.mock.data.interfaces)
+
+    def _api_get_sshd(self, query, body):
+        self._ok({"ssh_enable": self.server.mock.data.ssh_enable})
+
+    def _api_set_sshd(self, query, body):
+        data = self.server.mock.data
+        data.ssh_enable = bool(body.get("ssh_enable"))
+        self._ok({"ssh_enable": data.ssh_enable})
+
+    # ---- 网络配置 ----
+    def _api_interfaces(self, query, body):
+        self._paginate(self.server.mock.data.interfaces_aggregate(), query)
+
+    def _api_list_config(self, query, body, kind):
+        data = self.server.mock.data
+        with data.lock:
+            items = list(getattr(data, kind))
+        self._paginate(items, query)
+
+    def _api_create_config(self, query, body, kind):
+        data = self.server.mock.data
+        with data.lock:
+            items = getattr(data, kind)
+            if kind == "bridges" and "name" not in body:
+                body["name"] = f"br{len(items)}"
+            name_field = "ip" if kind == "ips" else "name"
+            if any(item.get(name_field) == body.get(name_field) for item in items):
+                return self._send_json(200, {"code": "ERROR", "message": f"{body.get(name_field)} 已存在"})
+            item = {**body, "_pk": data.new_pk(), "_create_timestamp": int(time.time() * 1000)}
+            items.append(item)
+        self._ok(item)
+
+    def _api_delete_config(self, query, body, kind, pk):
+        data = self.server.mock.data
+        with data.lock:
+            items = getattr(data, kind)
+            for i, item in enumerate(items):
+                if str(item["_pk"]) == pk:
+                    del items[i]
+                    break
+            else:
+                return self._send_json(404, {"code": "NOT_FOUND", "message": f"主键 {pk} 不存在"})
+        self._ok({})
+
+    # ---- 日志 ----
+    def _api_list_logs(self, query, body, kind):
+        logs = self.server.mock.data.query_logs(kind, query.get("timestamp__gte"), query.get("timestamp__lte"))
+        self._paginate(logs, query)
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description='本地模拟WAF设备接口服务')
+    parser.add_argument('--host', default='127.0.0.1', help='监听地址，默认127.0.0.1')
+    parser.add_argument('--port', type=int, default=8443, help='监听端口，默认8443')
+    parser.add_argument('--user', default='admin', help='登录用户名')
+    parser.add_argument('--password', default='Admin@1234', help='登录密码')
+    parser.add_argument('--otp-key', help='设置后登录需要双因子认证')
+    # 数据量
+    for name, size in DEFAULT_SIZES.items():
+        parser.add_argument(f"--{name.replace('_', '-')}", type=int, default=size, help=f'{name} 数量，默认{size}')
+    parser.add_argument('--log-days', type=int, default=1, help='日志分布在最近几天内，默认1')
+    parser.add_argument('--seed', type=int, default=0, help='随机数种子，默认0')
+    # 故障注入
+    parser.add_argument('--latency', type=float, default=0.0, help='每个请求的基础延迟（秒）')
+    parser.add_argument('--jitter', type=float, default=0.0, help='随机增加的延迟上限（秒）')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='随机返回500/503的比例，如 0.05')
+    parser.add_argument('--max-per-page', type=int, default=100, help='每页数量上限，默认100')
+    parser.add_argument('--token-ttl', type=float, help='token有效期（秒），默认不过期')
+    args = parser.parse_args()
+
+    try:
+        sizes = {name: getattr(args, name) for name in DEFAULT_SIZES}
+        print(f"正在生成模拟数据: {sizes}")
+        server = MockWAFServer(host=args.host, port=args.port, users={args.user: args.password},
+                               otp_key=args.otp_key, sizes=sizes, seed=args.seed, log_days=args.log_days,
+                               latency=args.latency, jitter=args.jitter, error_rate=args.error_rate,
+                               max_per_page=args.max_per_page, token_ttl=args.token_ttl)
+        print(f"模拟WAF服务已启动: https://{server.host}:{server.port}/ （Ctrl+C退出）")
+        try:
+            server.httpd.serve_forever()
+        except KeyboardInterrupt:
+            print("\n已停止")
+        finally:
+            server.httpd.server_close()
+            print(f"请求统计: {dict(server.stats)}")
+
+    except Exception as e:
+        print(f"错误: {e}")
+
+
+if __name__ == "__main__":
+    # 使用示例:
+    # python mock_waf_server.py
+    # python mock_waf_server.py --port 8443 --events 200000 --sys-events 200000 --log-days 30
+    # python mock_waf_server.py --latency 0.02 --jitter 0.03 --error-rate 0.05 --token-ttl 60
+    # 然后: python sys_logs.py --ip 127.0.0.1 --port 8443 --user admin --password Admin@1234 --workers 8
+    main()
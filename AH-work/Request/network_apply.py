@@ -0,0 +1,383 @@
+"""
+模块名称: network_apply.py
+
+该模块的目标：
+    按期望状态文件配置设备网络（链路聚合、网桥、各网卡的IP），代替依次手工执行
+    bond_manager.py --create、bridge_creator.py、ip_adder.py、ip_manager.py：
+    并发查询当前配置，计算最少的创建/删除操作，按依赖分阶段执行
+    （删除: IP -> 网桥 -> 链路聚合，创建: 链路聚合 -> 网桥 -> IP），同一阶段内并行，
+    并报告实际做了哪些修改；设备已是期望状态时不发送任何写请求
+
+    期望状态文件（json），只管理文件中出现的部分:
+    {
+        "bonds": [{"name": "bond1", "net_dev": ["eth2", "eth3"], "desc": ""}],
+        "bridges": [{"net_dev": ["eth4", "eth5"], "mtu": 1500, "stp": false}],
+        "ips": {
+            "eth3": ["1.1.1.4/24", {"ip": "1.1.1.5", "mask": 24, "gateway": "1.1.1.1"}],
+            "bond1": []
+        }
+    }
+    - bonds / bridges 出现时为完整列表，设备上多余的链路聚合/网桥会被删除
+    - ips 按网卡管理，只有列出的网卡上多余的IP会被删除（空列表表示清空该网卡），未列出的网卡不变
+    - 配置不一致的对象（设备没有修改接口）先删除再创建，重建时未指定的字段沿用设备上的当前值；
+      管理口IP（service_filter.admin）不会被删除或重建
+
+作者: ych
+修改历史:
+    1. 2026/10/18 - 创建文件
+    2. 2026/10/18 - 管理口IP配置不一致时也不删除重建；重建IP时保留设备上未在期望中指定的字段
+    3. 2026/10/18 - 传入异步客户端时报错
+"""
+import argparse
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from waf_http.http import HttpObj
+from waf_http.token_cache import TokenCache
+from bond_manager import NetworkBondManager
+from bridge_manager import NetworkBridgeManager
+from bridge_creator import NetworkManager as BridgeCreator
+from ip_adder import NetworkManager as IPAdder
+from ip_manager import NetworkIPManager
+from fleet_runner import load_inventory
+
+# 执行阶段: 先按依赖倒序删除，再按依赖顺序创建
+PHASES = (
+    ("delete", "ip"),
+    ("delete", "bridge"),
+    ("delete", "bond"),
+    ("create", "bond"),
+    ("create", "bridge"),
+    ("create", "ip"),
+)
+# 创建IP时可指定的字段（ip、net_dev 用于标识）
+IP_FIELDS = ("mask", "gateway", "vrrp", "client_ip", "server_ip", "service_filter", "source_ip_enable")
+# 创建IP时的默认服务开关（与 ip_adder.NetworkManager.add_ip 一致），期望中只写部分开关时以此补全
+DEFAULT_SERVICE_FILTER = {"ha": False, "admin": False, "traffic": True, "embedded": False}
+
+
+def load_state(path):
+    """读取并规范化期望状态文件，未出现的部分为None（不管理）"""
+    with open(path, "r", encoding="utf-8") as f:
+        state = json.load(f)
+    unknown = set(state) - {"bonds", "bridges", "ips"}
+    if unknown:
+        raise ValueError(f"期望状态文件中有未知的配置项: {', '.join(sorted(unknown))}")
+
+    desired = {"bonds": None, "bridges": None, "ips": None}
+    if state.get("bonds") is not None:
+        desired["bonds"] = []
+        for bond in state["bonds"]:
+            if not bond.get("name") or not bond.get("net_dev"):
+                raise ValueError(f"链路聚合需要指定 name 和 net_dev: {bond}")
+            desired["bonds"].append(dict(bond))
+    if state.get("bridges") is not None:
+        desired["bridges"] = []
+        for bridge in state["bridges"]:
+            if not bridge.get("net_dev"):
+                raise ValueError(f"网桥需要指定 net_dev: {bridge}")
+            desired["bridges"].append(dict(bridge))
+    if state.get("ips") is not None:
+        desired["ips"] = {}
+        for net_dev, ips in state["ips"].items():
+            desired["ips"][net_dev] = [_parse_ip(net_dev, ip) for ip in ips]
+    return desired
+
+
+def _parse_ip(net_dev, ip):
+    """'1.1.1.4/24' 或 {"ip": "1.1.1.4", "mask": 24, ...} -> 规范化的dict"""
+    if isinstance(ip, str):
+        address, _, mask = ip.partition("/")
+        ip = {"ip": address, "mask": mask or 24}
+    if not ip.get("ip"):
+        raise ValueError(f"网卡 {net_dev} 的IP需要指定 ip: {ip}")
+    unknown = set(ip) - {"ip", *IP_FIELDS}
+    if unknown:
+        raise ValueError(f"IP {ip['ip']} 有未知的字段: {', '.join(sorted(unknown))}")
+    spec = {"ip": ip["ip"], "net_dev": net_dev, "mask": int(ip.get("mask", 24))}
+    spec.update((k, v) for k, v in ip.items() if k in IP_FIELDS and k != "mask")
+    return spec
+
+
+def bond_key(bond):
+    return bond.get("name")
+
+
+def bridge_key(bridge):
+    """网桥创建时不能指定名称，按成员网卡标识"""
+    return ",".join(sorted(bridge.get("net_dev") or []))
+
+
+def ip_key(ip):
+    return f"{ip.get('net_dev')}:{ip.get('ip')}"
+
+
+def _differences(current, desired, fields):
+    """返回期望中指定了、但与当前不一致的字段说明列表"""
+    diffs = []
+    for field in fields:
+        if field not in desired:
+            continue
+        want, have = desired[field], current.get(field)
+        if field == "net_dev":
+            want, have = sorted(want), sorted(have or [])
+        elif field == "service_filter":
+            # 只比较期望中列出的开关
+            have = {k: (have or {}).get(k) for k in want}
+        elif field == "mask":
+            have = int(have) if have not in (None, "") else have
+        if want != have:
+            diffs.append(f"{field}: {have} -> {want}")
+    return diffs
+
+
+def _is_admin_ip(ip):
+    return bool((ip.get("service_filter") or {}).get("admin"))
+
+
+def _ip_create_spec(spec, current=None):
+    """补全创建IP的参数: 重建时未指定的字段沿用设备上的当前值，service_filter 按开关合并"""
+    full = {k: current[k] for k in IP_FIELDS if current and current.get(k) is not None}
+    full.update(spec)
+    base = (current or {}).get("service_filter") or DEFAULT_SERVICE_FILTER
+    full["service_filter"] = {**DEFAULT_SERVICE_FILTER, **base, **(spec.get("service_filter") or {})}
+    return full
+
+
+def compute_plan(desired, current):
+    """计算需要执行的操作
+
+    :param desired: load_state 返回的期望状态
+    :param current: {"bonds": [...], "bridges": [...], "ips": [...]} 设备当前配置
+    :return: (操作列表, 跳过的操作列表)，每个操作为
+             {"action": "create"/"delete", "kind": "bond"/"bridge"/"ip", "key", "reason", "pk"/"spec"}
+    """
+    changes, skipped = [], []
+
+    def diff(kind, wanted, existing, key_func, fields):
+        existing_by_key = {key_func(item): item for item in existing}
+        wanted_keys = set()
+        for spec in wanted:
+            key = key_func(spec)
+            wanted_keys.add(key)
+            item = existing_by_key.get(key)
+            if item is None:
+                if kind == "ip":
+                    spec = _ip_create_spec(spec)
+                changes.append({"action": "create", "kind": kind, "key": key, "reason": "不存在", "spec": spec})
+                continue
+            diffs = _differences(item, spec, fields)
+            if not diffs:
+                continue
+            reason = "配置不一致: " + "; ".join(diffs)
+            if kind == "ip" and _is_admin_ip(item):
+                # 删除管理口IP会断开当前连接
+                skipped.append({"action": "delete", "kind": kind, "key": key,
+                                "reason": f"管理口IP，不重建（{reason}）", "pk": item.get("_pk")})
+                continue
+            if kind == "ip":
+                spec = _ip_create_spec(spec, item)
+            # 设备没有修改接口，先删除再创建
+            changes.append({"action": "delete", "kind": kind, "key": key, "reason": reason, "pk": item.get("_pk")})
+            changes.append({"action": "create", "kind": kind, "key": key, "reason": reason, "spec": spec})
+        for key, item in existing_by_key.items():
+            if key not in wanted_keys:
+                change = {"action": "delete", "kind": kind, "key": key, "reason": "不在期望状态中", "pk": item.get("_pk")}
+                if kind == "ip" and _is_admin_ip(item):
+                    change["reason"] = "管理口IP，不删除"
+                    skipped.append(change)
+                else:
+                    changes.append(change)
+
+    if desired["bonds"] is not None:
+        diff("bond", desired["bonds"], current["bonds"], bond_key, ("net_dev", "desc"))
+    if desired["bridges"] is not None:
+        diff("bridge", desired["bridges"], current["bridges"], bridge_key, ("mtu", "stp", "desc"))
+    if desired["ips"] is not None:
+        for net_dev, ips in desired["ips"].items():
+            existing = [ip for ip in current["ips"] if ip.get("net_dev") == net_dev]
+            diff("ip", ips, existing, ip_key, IP_FIELDS)
+    order = {phase: i for i, phase in enumerate(PHASES)}
+    changes.sort(key=lambda c: order[(c["action"], c["kind"])])
+    return changes, skipped
+
+
+class NetworkStateApplier:
+    """在单台设备上应用期望的网络状态"""
+
+    def __init__(self, http_obj, workers=8):
+        if getattr(http_obj, "is_async", False):
+            raise TypeError("NetworkStateApplier 不支持 AsyncHttpObj，请使用 HttpObj")
+        self.http_obj = http_obj
+        self.workers = workers
+
+    def fetch_current(self):
+        """并发查询链路聚合、网桥和IP配置"""
+        with ThreadPoolExecutor(max_workers=3) as executor:
+            bonds = executor.submit(NetworkBondManager(self.http_obj).get_bonds)
+            bridges = executor.submit(NetworkBridgeManager(self.http_obj).get_bridges)
+            ips = executor.submit(NetworkIPManager(self.http_obj).get_ips)
+            return {
+                "bonds": bonds.result().get("result", []),
+                "bridges": bridges.result().get("result", []),
+                "ips": ips.result().get("result", []),
+            }
+
+    def execute(self, change):
+        """执行单个操作，结果记录到change中"""
+        start = time.perf_counter()
+        try:
+            spec = change.get("spec")
+            if change["action"] == "delete":
+                if change["kind"] == "bond":
+                    NetworkBondManager(self.http_obj).delete_bond(change["pk"])
+                elif change["kind"] == "bridge":
+                    NetworkBridgeManager(self.http_obj).delete_bridge(change["pk"])
+                else:
+                    NetworkIPManager(self.http_obj).delete_ip(change["pk"])
+            elif change["kind"] == "bond":
+                result = NetworkBondManager(self.http_obj).create_bond(spec["name"], spec["net_dev"],
+                                                                       spec.get("desc", ""))
+                change["pk"] = result.get("_pk")
+            elif change["kind"] == "bridge":
+                result = BridgeCreator(self.http_obj).create_bridge(
+                    mtu=spec.get("mtu", 1500), stp=spec.get("stp", False), desc=spec.get("desc", ""),
+                    net_dev=spec["net_dev"])
+                change["pk"] = result.get("_pk")
+            else:
+                kwargs = {k: v for k, v in spec.items() if k in IP_FIELDS}
+                result = IPAdder(self.http_obj).add_ip(spec["ip"], net_dev=spec["net_dev"], **kwargs)
+                change["pk"] = result.get("_pk")
+            change["ok"] = True
+        except Exception as e:
+            change["ok"] = False
+            change["error"] = f"{type(e).__name__}: {e}"
+        change["elapsed"] = round(time.perf_counter() - start, 4)
+        return change
+
+    def apply(self, desired, dry_run=False):
+        """计算并执行操作，某个阶段有失败时不再执行后续阶段（后续操作可能依赖失败的操作）"""
+        report = {"ok": True, "changes": [], "skipped": [], "writes": 0, "error": None}
+        start = time.perf_counter()
+        current = self.fetch_current()
+        report["fetch_time"] = round(time.perf_counter() - start, 4)
+        changes, report["skipped"] = compute_plan(desired, current)
+        report["changes"] = changes
+        if dry_run or not changes:
+            return report
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=max(1, self.workers)) as executor:
+            for phase in PHASES:
+                batch = [c for c in changes if (c["action"], c["kind"]) == phase]
+                if not batch:
+                    continue
+                list(executor.map(self.execute, batch))
+                report["writes"] += len(batch)
+                if not all(c["ok"] for c in batch):
+                    report["ok"] = False
+                    report["error"] = f"阶段 {phase[0]} {phase[1]} 有操作失败，未执行后续阶段"
+                    break
+        report["apply_time"] = round(time.perf_counter() - start, 4)
+        return report
+
+
+def apply_on_device(device, desired, dry_run=False, workers=8, token_cache=None):
+    """登录单台设备并应用期望状态"""
+    try:
+        http_obj = HttpObj(
+            ip=device["ip"],
+            usr=device["user"],
+            pwd=device["password"],
+            port=device.get("port", 443),
+            otp_key=device.get("otp"),
+            token_cache=token_cache
+        )
+        http_obj.get_token()
+        report = NetworkStateApplier(http_obj, workers).apply(desired, dry_run)
+    except Exception as e:
+        report = {"ok": False, "changes": [], "skipped": [], "writes": 0, "error": f"{type(e).__name__}: {e}"}
+    report["ip"] = device["ip"]
+    return report
+
+
+def print_apply_report(report, dry_run=False):
+    """打印单台设备的修改报告"""
+    status = "成功" if report["ok"] else "失败"
+    fetch_time = f"{report['fetch_time']}s" if report.get("fetch_time") is not None else "-"
+    apply_time = f"{report['apply_time']}s" if report.get("apply_time") is not None else "-"
+    print(f"\n设备 {report['ip']}: {status}  写请求: {report['writes']}  查询耗时: {fetch_time}  执行耗时: {apply_time}")
+    print("-" * 100)
+    if not report["changes"] and report["ok"]:
+        print("  已是期望状态，无需修改")
+    for c in report["changes"]:
+        action = "创建" if c["action"] == "create" else "删除"
+        if dry_run:
+            result = "计划"
+        elif "ok" not in c:
+            result = "未执行"
+        else:
+            result = "完成" if c["ok"] else "失败"
+        detail = c["reason"] if c.get("ok", True) else f"{c['reason']}，{c['error']}"
+        print(f"  {action} {c['kind']:<7}{c['key']:<28}{result:<6}{detail}")
+    for c in report["skipped"]:
+        print(f"  跳过 {c['kind']:<7}{c['key']:<28}{'-':<6}{c['reason']}")
+    if report["error"]:
+        print(f"  错误: {report['error']}")
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description='按期望状态文件配置链路聚合、网桥和IP')
+    parser.add_argument('state', help='期望状态文件（json）')
+    parser.add_argument('--ip', help='设备IP地址')
+    parser.add_argument('--inventory', help='设备清单文件（json或csv），对多台设备并行应用')
+    parser.add_argument('--user', default='admin', help='用户名')
+    parser.add_argument('--password', default='Admin@1234', help='密码')
+    parser.add_argument('--port', type=int, default=443, help='端口号')
+    parser.add_argument('--otp', help='OTP密钥（双因子认证）')
+    parser.add_argument('--token-cache', action='store_true', help='启用token磁盘缓存，避免重复登录')
+    parser.add_argument('--dry-run', action='store_true', help='只显示需要执行的操作，不修改设备')
+    parser.add_argument('--workers', type=int, default=8, help='同一阶段内并行执行的操作数，默认8')
+    parser.add_argument('--device-workers', type=int, default=20, help='同时处理的设备数，默认20')
+    parser.add_argument('--output', help='将完整报告保存为json文件')
+    args = parser.parse_args()
+
+    try:
+        if not args.ip and not args.inventory:
+            print("请指定设备IP(--ip)或设备清单(--inventory)")
+            return
+        desired = load_state(args.state)
+        if args.inventory:
+            devices = load_inventory(args.inventory, args.user, args.password)
+        else:
+            devices = [{"ip": args.ip, "user": args.user, "password": args.password, "otp": args.otp,
+                        "port": args.port}]
+
+        # 所有线程共用一个缓存对象，避免并发写同一个缓存文件
+        token_cache = TokenCache() if args.token_cache else None
+        with ThreadPoolExecutor(max_workers=max(1, min(args.device_workers, len(devices)))) as executor:
+            reports = list(executor.map(
+                lambda device: apply_on_device(device, desired, args.dry_run, args.workers, token_cache),
+                devices))
+        for report in reports:
+            print_apply_report(report, args.dry_run)
+        print("=" * 100)
+        print(f"设备数: {len(reports)}  成功: {sum(1 for r in reports if r['ok'])}  "
+              f"写请求合计: {sum(r['writes'] for r in reports)}")
+
+        if args.output:
+            with open(args.output, "w", encoding="utf-8") as f:
+                json.dump(reports, f, ensure_ascii=False, indent=2, default=str)
+            print(f"报告已保存至: {args.output}")
+
+    except Exception as e:
+        print(f"错误: {e}")
+
+
+if __name__ == "__main__":
+    # 使用示例:
+    # python network_apply.py topology.json --ip 10.20.192.106 --dry-run
+    # python network_apply.py topology.json --ip 10.20.192.106
+    # python network_apply.py topology.json --inventory devices.json --output apply_report.json
+    main()
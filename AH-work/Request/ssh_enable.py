@@ -7,6 +7,9 @@
 作者: ych
 修改历史:
     1. 2025/9/3 - 创建文件
+    2. 2026/10/18 - SSHService支持token缓存
+    3. 2026/10/18 - SSHService支持传入已认证的http_obj
+    4. 2026/10/18 - enable_ssh 支持 AsyncHttpObj，等待时不阻塞事件循环
 """
 from waf_http.http import HttpObj
 import time
@@ -37,9 +40,14 @@ class SSHService:
     SSH_ENABLE = {"ssh_enable": True, "ssh_ask_code": "123456"}
     SSH_DISABLE = {"ssh_enable": False, "ssh_ask_code": "123456"}
 
-    def __init__(self, ip, username, password, port=443, otp_key=None):
-        self.http_obj = HttpObj(ip=ip, usr=username, pwd=password, port=port, otp_key=otp_key)
-        self.http_obj.get_token()  # 认证获取token
+    def __init__(self, ip, username, password, port=443, otp_key=None, token_cache=None, http_obj=None):
+        if http_obj is not None:
+            # 复用已认证的连接对象（如批量执行时）
+            self.http_obj = http_obj
+        else:
+            self.http_obj = HttpObj(ip=ip, usr=username, pwd=password, port=port, otp_key=otp_key,
+                                    token_cache=token_cache)
+            self.http_obj.get_token()  # 认证获取token
         self.device = DeviceUrl(self.http_obj)  # 设备API接口
 
     def get_ssh_status(self):
@@ -47,7 +55,9 @@ class SSHService:
         return self.device.api_hardware_sshd_get()
 
     def enable_ssh(self, retry_count=60):
-        """启用SSH服务（带重试机制）"""
+        """启用SSH服务（带重试机制），http_obj 为 AsyncHttpObj 时返回协程"""
+        if getattr(self.http_obj, "is_async", False):
+            return self._enable_ssh_async(retry_count)
         for index in range(retry_count):
             try:
                 status = self.get_ssh_status()
@@ -65,6 +75,26 @@ class SSHService:
         # 最终检查状态
         return self.get_ssh_status()
 
+    async def _enable_ssh_async(self, retry_count):
+        """enable_ssh 的异步版本，等待时不阻塞事件循环"""
+        import asyncio
+        for index in range(retry_count):
+            try:
+                status = await self.get_ssh_status()
+                if status.get("ssh_enable"):
+                    logger.info("SSH服务已启用")
+                    return status
+
+                logger.info(f"尝试启用SSH服务 ({index + 1}/{retry_count})")
+                await self.device.api_hardware_sshd_set(params=self.SSH_ENABLE)
+            except Exception as e:
+                logger.error(f"SSH操作失败: {e}")
+
+            await asyncio.sleep(10)  # 等待操作生效
+
+        # 最终检查状态
+        return await self.get_ssh_status()
+
     def disable_ssh(self):
         """禁用SSH服务"""
         try:
@@ -7,10 +7,29 @@
 作者: ych
 修改历史:
     1. 2025/9/4 - 创建文件
+    2. 2026/10/18 - 增加--token-cache参数
+    3. 2026/10/18 - 使用通用分页工具获取日志
+    4. 2026/10/18 - 分页并发获取，增加--workers参数
+    5. 2026/10/18 - 增加--sync增量同步到本地SQLite库
+    6. 2026/10/18 - 增加--stream流式输出
+    7. 2026/10/18 - 增加--shard按时间片并发查询
+    8. 2026/10/18 - 增加--follow持续输出新日志
+    9. 2026/10/18 - 增加--export导出为NDJSON/CSV/Parquet
+    10. 2026/10/18 - 增加--compact，日志转换为紧凑记录对象
+    11. 2026/10/18 - 支持 AsyncHttpObj（返回协程），不再静默返回空列表
+    12. 2026/10/18 - --follow 轮询失败由命令行打印提示
 """
 from waf_http.http import HttpObj
+from waf_http.paginator import iter_pages, aiter_pages
+from waf_http.log_store import LogStore, DEFAULT_DB_DIR
+from waf_http.log_shards import fetch_sharded
+from waf_http.log_follow import follow_logs
+from waf_http.log_export import export_logs, FORMATS, COMPRESSIONS
+from waf_http.records import LogRecord, to_records
 from datetime import datetime, timedelta
 import argparse
+import itertools
+import sys
 
 
 class SysLogService:
@@ -19,22 +38,50 @@ class SysLogService:
     def __init__(self, http_obj):
         self.http_obj = http_obj
 
-    def get_sys_logs(self, start_time, end_time):
-        """获取系统日志"""
+    def iter_sys_log_pages(self, start_time, end_time, workers=4):
+        """逐页获取系统日志，yield 每页的响应数据（流式输出时使用）"""
         # 构建查询参数
         params = {
-            "per_page": 20,
-            "page": 1,
             "timestamp__gte": start_time,
             "timestamp__lte": end_time
         }
 
         # 发送请求获取系统日志
         url = "api/v2/logs/sys_events/"
+        if getattr(self.http_obj, "is_async", False):
+            # 异步客户端返回异步生成器，使用 async for 遍历
+            return aiter_pages(self.http_obj, url, params=params, per_page=20, workers=workers)
+        return iter_pages(self.http_obj, url, params=params, per_page=20, workers=workers)
+
+    def get_sys_logs(self, start_time, end_time, workers=4, shard=None, records=False):
+        """获取系统日志，首页确定总数后其余页由 workers 个线程并发获取
+
+        shard 为 "day"/"hour" 时改为按时间片并发查询（时间片内日志过多会自动细分），避免深分页
+        records 为True时逐页转换为紧凑的 LogRecord 对象，大时间范围时内存占用更小
+        http_obj 为 AsyncHttpObj 时返回协程（不支持 shard）
+        """
+        if getattr(self.http_obj, "is_async", False):
+            if shard:
+                raise TypeError("AsyncHttpObj 不支持按时间片查询（shard）")
+            return self._get_logs_async(start_time, end_time, workers, records)
+
+        if shard:
+            try:
+                logs = fetch_sharded(self.http_obj, "api/v2/logs/sys_events/", start_time, end_time,
+                                     shard=shard, workers=workers)
+                print(f"按时间片（{shard}）并发获取，找到 {len(logs)} 条日志记录")
+                return to_records(logs, LogRecord) if records else logs
+            except Exception as e:
+                print(f"获取日志失败: {e}")
+                return []
+
         try:
-            response_data = self.http_obj._http_get(url, params=params)
+            pages = self.iter_sys_log_pages(start_time, end_time, workers=workers)
+            response_data = next(pages)
 
             logs = response_data.get("result", [])
+            if records:
+                logs = [LogRecord.from_api(entry) for entry in logs]
             total_count = response_data.get("count", 0)
             per_page = response_data.get("per_page", 100)
 
@@ -43,20 +90,38 @@ class SysLogService:
             # 如果有多页数据，获取所有页
             if total_count > per_page:
                 total_pages = (total_count + per_page - 1) // per_page
-                print(f"需要获取 {total_pages} 页数据...")
-
-                for page in range(2, total_pages + 1):
-                    params["page"] = page
-                    page_data = self.http_obj._http_get(url, params=params)
+                print(f"需要获取 {total_pages} 页数据（并发数 {workers}）...")
 
-                    if page_data and "result" in page_data:
-                        logs.extend(page_data["result"])
+                for page_data in pages:
+                    page_logs = page_data["result"]
+                    logs.extend(map(LogRecord.from_api, page_logs) if records else page_logs)
 
             return logs
         except Exception as e:
             print(f"获取日志失败: {e}")
             return []
 
+    async def _get_logs_async(self, start_time, end_time, workers, records):
+        """get_sys_logs 的异步版本，出错时抛出异常"""
+        logs = []
+        async for page_data in self.iter_sys_log_pages(start_time, end_time, workers=workers):
+            page_logs = (page_data or {}).get("result", [])
+            logs.extend(map(LogRecord.from_api, page_logs) if records else page_logs)
+        print(f"找到 {len(logs)} 条日志记录")
+        return logs
+
+    def follow_sys_logs(self, since=None, min_interval=1.0, max_interval=30.0, on_error=None):
+        """持续获取新产生的系统日志（类似 tail -f），返回按时间正序的生成器"""
+        return follow_logs(self.http_obj, "api/v2/logs/sys_events/", since=since,
+                           min_interval=min_interval, max_interval=max_interval, on_error=on_error)
+
+    def sync_logs(self, start_time, end_time, db_dir=DEFAULT_DB_DIR, workers=4):
+        """增量同步日志到本地库后从本地库查询，只下载本地还没有的部分"""
+        with LogStore(self.http_obj.ip, "sys_events", db_dir) as store:
+            inserted = store.sync(self.http_obj, "api/v2/logs/sys_events/", start_time, end_time, workers=workers)
+            print(f"同步完成，新增 {inserted} 条日志（本地库: {store.path}）")
+            return store.query(start_time, end_time)
+
 
 def print_logs(logs, start_time, end_time):
     """格式化打印日志"""
@@ -69,13 +134,46 @@ def print_logs(logs, start_time, end_time):
     print("=" * 120)
 
     for i, log in enumerate(logs, 1):
-        print(f"{i}. 时间: {log.get('timestamp', 'N/A')}")
-        print(f"   服务名称: {log.get('user', 'N/A')}")
-        # print(f"   wafIP: {log.get('ip', 'N/A')}")
-        print(f"   事件名称: {log.get('target', 'N/A')}")
-        print(f"   事件描述: {log.get('detail', {}).get('msg', 'N/A')}")
-        print(f"   事件等级: {log.get('level', 'N/A')}")
-        print("-" * 120)
+        print(format_log(i, log), end="")
+
+
+def format_log(index, log):
+    """格式化单条日志，返回以换行结尾的多行文本"""
+    lines = []
+    lines.append(f"{index}. 时间: {log.get('timestamp', 'N/A')}")
+    lines.append(f"   服务名称: {log.get('user', 'N/A')}")
+    # lines.append(f"   wafIP: {log.get('ip', 'N/A')}")
+    lines.append(f"   事件名称: {log.get('target', 'N/A')}")
+    lines.append(f"   事件描述: {log.get('detail', {}).get('msg', 'N/A')}")
+    lines.append(f"   事件等级: {log.get('level', 'N/A')}")
+    lines.append("-" * 120)
+    return "\n".join(lines) + "\n"
+
+
+def print_logs_stream(pages, start_time, end_time, out=None):
+    """流式打印日志：每收到一页就整页写出并刷新，不在内存中累积全部日志
+
+    :param pages: 逐页的响应数据迭代器，首页的 count 用于打印总数
+    """
+    out = out or sys.stdout
+    first = next(pages, None)
+    if not first or not first.get("result"):
+        print(f"在 {start_time} 到 {end_time} 范围内未找到操作日志")
+        return
+
+    print("\n" + "=" * 120)
+    print(f"操作日志 ({start_time} 到 {end_time}) - 共 {first.get('count', 0)} 条记录")
+    print("=" * 120)
+    out.flush()
+
+    index = 0
+    for page_data in itertools.chain([first], pages):
+        chunk = []
+        for log in page_data.get("result", []):
+            index += 1
+            chunk.append(format_log(index, log))
+        out.write("".join(chunk))
+        out.flush()
 
 
 def parse_time_input(time_str, default_hour_minute="00:00:00"):
@@ -97,6 +195,7 @@ def main():
     parser.add_argument('--password', required=True, help='密码')
     parser.add_argument('--port', type=int, default=443, help='端口号，默认为443')
     parser.add_argument('--otp', help='OTP密钥（如果需要双因子认证）')
+    parser.add_argument('--token-cache', action='store_true', help='启用token磁盘缓存，避免重复登录')
     # 添加时间范围参数
     today = datetime.now().strftime("%Y-%m-%d")
     parser.add_argument('--start-time', default=f"{today} 00:00:00",
@@ -108,6 +207,19 @@ def main():
     parser.add_argument('--yesterday', action='store_true', help='查询昨天的日志')
     parser.add_argument('--last-7-days', action='store_true', help='查询最近7天的日志')
     parser.add_argument('--last-30-days', action='store_true', help='查询最近30天的日志')
+    parser.add_argument('--workers', type=int, default=4, help='并发获取分页的线程数，默认4')
+    parser.add_argument('--shard', choices=['day', 'hour'], help='按天/小时拆分时间范围并发查询，适合长时间范围')
+    parser.add_argument('--follow', action='store_true', help='持续输出新产生的日志（Ctrl+C退出）')
+    parser.add_argument('--poll-min', type=float, default=1.0, help='--follow 最短轮询间隔（秒），默认1')
+    parser.add_argument('--poll-max', type=float, default=30.0, help='--follow 最长轮询间隔（秒），默认30')
+    parser.add_argument('--export', help='导出日志到文件（边获取边写入）')
+    parser.add_argument('--format', choices=FORMATS, default='ndjson', help='导出格式，默认ndjson')
+    parser.add_argument('--compress', choices=COMPRESSIONS, help='导出文件压缩格式')
+    parser.add_argument('--columns', help='导出的列，逗号分隔，如 timestamp,user,level,detail.msg')
+    parser.add_argument('--stream', action='store_true', help='流式输出：边获取边打印，内存占用不随时间范围增长')
+    parser.add_argument('--sync', action='store_true', help='增量同步到本地SQLite库，并从本地库查询')
+    parser.add_argument('--compact', action='store_true', help='日志转换为紧凑记录对象，减少大时间范围查询的内存占用')
+    parser.add_argument('--db-dir', default=DEFAULT_DB_DIR, help=f'本地日志库目录，默认 {DEFAULT_DB_DIR}')
     args = parser.parse_args()
 
     try:
@@ -134,7 +246,8 @@ def main():
             usr=args.user,
             pwd=args.password,
             port=args.port,
-            otp_key=args.otp
+            otp_key=args.otp,
+            token_cache=args.token_cache
         )
         http_obj.get_token()
         print("认证成功")
@@ -142,7 +255,35 @@ def main():
         # 创建操作日志服务对象
         log_service = SysLogService(http_obj)
         # 获取操作日志
-        logs = log_service.get_sys_logs(start_time, end_time)
+        if args.follow:
+            # 从设备上最新一条日志之后开始持续输出新日志
+            print("持续获取新日志，按 Ctrl+C 退出...")
+            try:
+                for i, log in enumerate(log_service.follow_sys_logs(
+                        min_interval=args.poll_min, max_interval=args.poll_max,
+                        on_error=lambda e, interval: print(f"轮询日志失败: {e}，{interval:.0f} 秒后重试")), 1):
+                    sys.stdout.write(format_log(i, log))
+                    sys.stdout.flush()
+            except KeyboardInterrupt:
+                print("\n已停止")
+            return
+        if args.export:
+            # 按页分批写入文件，不在内存中保留全部日志
+            pages = log_service.iter_sys_log_pages(start_time, end_time, workers=args.workers)
+            columns = args.columns.split(",") if args.columns else None
+            count = export_logs(pages, args.export, fmt=args.format, compress=args.compress, columns=columns)
+            print(f"已导出 {count} 条日志到: {args.export}")
+            return
+        if args.stream:
+            # 流式输出，首页之后边获取边打印
+            pages = log_service.iter_sys_log_pages(start_time, end_time, workers=args.workers)
+            print_logs_stream(pages, start_time, end_time)
+            return
+        if args.sync:
+            logs = log_service.sync_logs(start_time, end_time, db_dir=args.db_dir, workers=args.workers)
+        else:
+            logs = log_service.get_sys_logs(start_time, end_time, workers=args.workers, shard=args.shard,
+                                            records=args.compact)
         # 打印日志
         print_logs(logs, start_time, end_time)
 
@@ -0,0 +1,371 @@
+"""
+模块名称: waf_benchmark.py
+
+该模块的目标：
+    基于本地模拟 WAF 服务（mock_waf_server.py）的基准测试：登录耗时、列表查询吞吐、
+    1k/10k/100k 条日志的分页获取、批量添加/删除IP、1/10/100 台设备的批量操作，
+    分别以顺序、多线程、asyncio 三种方式执行；结果保存为json，并可与基线对比发现性能回退
+
+作者: ych
+修改历史:
+    1. 2026/10/18 - 创建文件
+    2. 2026/10/18 - 与基线对比时，执行失败或结果缺失的测试也算作回退
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import platform
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from mock_waf_server import MockWAFServer
+from waf_http.http import HttpObj
+from waf_http.async_http import AsyncHttpObj, aiohttp
+from waf_http.paginator import iter_items, fetch_all
+from fleet_runner import run_fleet
+from interface_manager import NetworkInterfaceManager
+from bond_manager import NetworkBondManager
+from bridge_manager import NetworkBridgeManager
+from ip_manager import NetworkIPManager
+from ip_adder import NetworkManager
+from waf_manager import WAFManager
+
+MODES = ("sequential", "threaded", "asyncio")
+BENCHMARKS = ("login", "list", "logs", "ip_bulk", "fleet")
+USER, PASSWORD = "admin", "Admin@1234"
+LOG_URL = "api/v2/logs/events/"
+LOG_RANGE = {"timestamp__gte": "2000-01-01 00:00:00", "timestamp__lte": "2100-01-01 00:00:00"}
+# 批量IP测试的批次号，每批使用不同网段
+_ip_batches = itertools.count()
+
+
+def make_http(server, **kwargs):
+    return HttpObj("127.0.0.1", USER, PASSWORD, port=server.port, **kwargs)
+
+
+def make_async(server, **kwargs):
+    return AsyncHttpObj("127.0.0.1", USER, PASSWORD, port=server.port, **kwargs)
+
+
+def run_threaded(func, items, workers):
+    """用线程池对每个元素执行func，返回结果列表"""
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, len(items)))) as executor:
+        return list(executor.map(func, items))
+
+
+# ---- 各项测试：返回完成的操作数 ----
+
+def bench_login(server, mode, count, workers):
+    """count 次完整登录（公钥、RSA加密、登录）"""
+    def login(_):
+        make_http(server).get_token()
+
+    async def login_async(_):
+        async with make_async(server) as http_obj:
+            await http_obj.get_token()
+
+    if mode == "sequential":
+        for i in range(count):
+            login(i)
+    elif mode == "threaded":
+        run_threaded(login, range(count), workers)
+    else:
+        asyncio.run(_gather(login_async, range(count), limit=workers))
+    return count
+
+
+def bench_list(server, mode, count, workers):
+    """count 轮列表查询，每轮查询接口、链路聚合、网桥、IP"""
+    http_obj = make_http(server, pool_maxsize=workers)
+    http_obj.get_token()
+    managers = [NetworkInterfaceManager(http_obj).get_interfaces, NetworkBondManager(http_obj).get_bonds,
+                NetworkBridgeManager(http_obj).get_bridges, NetworkIPManager(http_obj).get_ips]
+    calls = [managers[i % len(managers)] for i in range(count * len(managers))]
+
+    if mode == "sequential":
+        for call in calls:
+            call()
+    elif mode == "threaded":
+        run_threaded(lambda call: call(), calls, workers)
+    else:
+        async def main():
+            async with make_async(server, max_concurrency=workers) as async_obj:
+                await async_obj.get_token()
+                async_managers = [NetworkInterfaceManager(async_obj).get_interfaces,
+                                  NetworkBondManager(async_obj).get_bonds,
+                                  NetworkBridgeManager(async_obj).get_bridges, NetworkIPManager(async_obj).get_ips]
+                await asyncio.gather(*(async_managers[i % len(async_managers)]() for i in range(len(calls))))
+        asyncio.run(main())
+    return len(calls)
+
+
+def bench_logs(server, mode, count, workers):
+    """分页获取全部 count 条日志（每页100条）"""
+    if mode == "asyncio":
+        async def main():
+            async with make_async(server, max_concurrency=workers) as async_obj:
+                await async_obj.get_token()
+                return await fetch_all(async_obj, LOG_URL, params=LOG_RANGE)
+        fetched = len(asyncio.run(main())["result"])
+    else:
+        http_obj = make_http(server, pool_maxsize=workers)
+        http_obj.get_token()
+        page_workers = 1 if mode == "sequential" else workers
+        fetched = sum(1 for _ in iter_items(http_obj, LOG_URL, params=LOG_RANGE, workers=page_workers))
+    if fetched != count:
+        raise RuntimeError(f"日志数量不符: 期望 {count}，实际 {fetched}")
+    return fetched
+
+
+def bench_ip_bulk(server, mode, count, workers):
+    """批量添加 count 个IP后再逐个删除"""
+    batch = next(_ip_batches)
+    ips = [f"172.{16 + batch % 16}.{i // 250 % 250}.{i % 250 + 1}" for i in range(count)]
+
+    if mode == "asyncio":
+        async def main():
+            async with make_async(server, max_concurrency=workers) as async_obj:
+                await async_obj.get_token()
+                adder, deleter = NetworkManager(async_obj), NetworkIPManager(async_obj)
+                created = await asyncio.gather(*(adder.add_ip(ip, 24, "eth1") for ip in ips))
+                await asyncio.gather(*(deleter.delete_ip(item["_pk"]) for item in created))
+        asyncio.run(main())
+        return 2 * count
+
+    http_obj = make_http(server, pool_maxsize=workers)
+    http_obj.get_token()
+    adder, deleter = NetworkManager(http_obj), NetworkIPManager(http_obj)
+    if mode == "sequential":
+        created = [adder.add_ip(ip, 24, "eth1") for ip in ips]
+        for item in created:
+            deleter.delete_ip(item["_pk"])
+    else:
+        created = run_threaded(lambda ip: adder.add_ip(ip, 24, "eth1"), ips, workers)
+        run_threaded(lambda item: deleter.delete_ip(item["_pk"]), created, workers)
+    return 2 * count
+
+
+def bench_fleet(server, mode, count, workers):
+    """count 台设备各自登录并查询运行等级（所有设备指向同一个模拟服务）"""
+    devices = [{"ip": "127.0.0.1", "user": USER, "password": PASSWORD, "port": server.port}
+               for _ in range(count)]
+    if mode == "asyncio":
+        async def one(device):
+            async with make_async(server) as async_obj:
+                await async_obj.get_token()
+                return await WAFManager(async_obj).get_run_level()
+        asyncio.run(_gather(one, devices, limit=count))
+    else:
+        report = run_fleet(devices, "WAFManager.get_run_level", workers=1 if mode == "sequential" else count)
+        if report["failed"]:
+            raise RuntimeError(f"{report['failed']} 台设备执行失败")
+    return count
+
+
+async def _gather(func, items, limit=None):
+    """并发执行协程，limit 限制同时执行的数量"""
+    items = list(items)
+    semaphore = asyncio.Semaphore(limit or len(items) or 1)
+
+    async def run(item):
+        async with semaphore:
+            return await func(item)
+    return await asyncio.gather(*(run(item) for item in items))
+
+
+BENCH_FUNCS = {
+    "login": bench_login,
+    "list": bench_list,
+    "logs": bench_logs,
+    "ip_bulk": bench_ip_bulk,
+    "fleet": bench_fleet,
+}
+
+
+def measure(func, repeat):
+    """执行 repeat 次，返回 (各次耗时, 操作数)"""
+    times, ops = [], 0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        ops = func()
+        times.append(time.perf_counter() - start)
+    return times, ops
+
+
+def plan_cases(benchmarks=BENCHMARKS, log_sizes=(1000, 10000, 100000), fleet_sizes=(1, 10, 100),
+               login_count=20, list_rounds=20, ip_count=200):
+    """返回要执行的测试 [(测试名, 测试项, 模拟服务的数据量, 操作数)]"""
+    cases = []
+    if "login" in benchmarks:
+        cases.append(("login", "login", {}, login_count))
+    if "list" in benchmarks:
+        cases.append(("list", "list", {}, list_rounds))
+    if "logs" in benchmarks:
+        cases.extend((f"logs_{size}", "logs", {"events": size}, size) for size in log_sizes)
+    if "ip_bulk" in benchmarks:
+        cases.append(("ip_bulk", "ip_bulk", {}, ip_count))
+    if "fleet" in benchmarks:
+        cases.extend((f"fleet_{size}", "fleet", {}, size) for size in fleet_sizes)
+    return cases
+
+
+def run_benchmarks(benchmarks=BENCHMARKS, modes=MODES, log_sizes=(1000, 10000, 100000), fleet_sizes=(1, 10, 100),
+                   login_count=20, list_rounds=20, ip_count=200, workers=8, repeat=3, latency=0.002):
+    """执行基准测试，返回 {测试名: 结果}
+
+    :param latency: 模拟服务每个请求的延迟（秒），模拟真实网络往返
+    """
+    if "asyncio" in modes and aiohttp is None:
+        print("未安装 aiohttp，跳过 asyncio 方式")
+        modes = [m for m in modes if m != "asyncio"]
+
+    results = {}
+    for name, bench, sizes, count in plan_cases(benchmarks, log_sizes, fleet_sizes, login_count, list_rounds,
+                                                ip_count):
+        func = BENCH_FUNCS[bench]
+        with MockWAFServer(sizes={"events": 0, "sys_events": 0, **sizes}, latency=latency) as server:
+            for mode in modes:
+                key = f"{name}[{mode}]"
+                try:
+                    times, ops = measure(lambda: func(server, mode, count, workers), repeat)
+                except Exception as e:
+                    print(f"{key:<28}失败: {e}")
+                    results[key] = {"error": f"{type(e).__name__}: {e}"}
+                    continue
+                median = statistics.median(times)
+                results[key] = {"seconds": round(median, 4), "min": round(min(times), 4),
+                                "max": round(max(times), 4), "ops": ops, "rate": round(ops / median, 1)}
+                print(f"{key:<28}{median:>10.3f}s{ops / median:>14.1f} ops/s")
+    return results
+
+
+def _slowdown(result, base):
+    """单次操作耗时相对基线的变化比例（按吞吐量计算，不受操作数不同的影响），无法比较时返回None"""
+    if not base.get("rate") or not result.get("rate"):
+        return None
+    return base["rate"] / result["rate"] - 1
+
+
+def compare(results, baseline, threshold=0.2, expected=None):
+    """与基线对比，返回回退的测试 [(测试名, 基线吞吐, 当前吞吐, 变化比例)]
+
+    单次操作耗时增加超过 threshold 的测试算作回退；本次执行失败的测试，以及基线中有、本次结果中缺失的测试
+    也算作回退（当前吞吐和变化比例为None）
+    :param expected: 本次计划执行的测试名，只检查其中缺失的基线测试（只执行部分测试时使用），None 检查全部
+    """
+    regressions = []
+    for key in baseline:
+        if key not in results and (expected is None or key in expected):
+            regressions.append((key, baseline[key].get("rate"), None, None))
+    for key, result in results.items():
+        if "error" in result:
+            regressions.append((key, baseline.get(key, {}).get("rate"), None, None))
+            continue
+        change = _slowdown(result, baseline.get(key, {}))
+        if change is not None and change > threshold:
+            regressions.append((key, baseline[key]["rate"], result["rate"], change))
+    return regressions
+
+
+def print_comparison(results, baseline):
+    """打印与基线的对比"""
+    print("\n与基线对比:")
+    print("=" * 80)
+    print(f"{'测试':<28}{'基线(ops/s)':>14}{'当前(ops/s)':>14}{'耗时变化':>12}")
+    for key, result in results.items():
+        if "error" in result:
+            print(f"{key:<28}{baseline.get(key, {}).get('rate') or 0:>14.1f}{'失败':>12}")
+            continue
+        change = _slowdown(result, baseline.get(key, {}))
+        if change is not None:
+            print(f"{key:<28}{baseline[key]['rate']:>14.1f}{result['rate']:>14.1f}{change:>+12.1%}")
+    print("-" * 80)
+
+
+def parse_sizes(value):
+    return tuple(int(v) for v in value.split(",") if v)
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description='WAF接口工具基准测试（使用本地模拟服务）')
+    parser.add_argument('--benchmarks', default=",".join(BENCHMARKS),
+                        help=f'要执行的测试，逗号分隔，默认全部: {",".join(BENCHMARKS)}')
+    parser.add_argument('--modes', default=",".join(MODES), help=f'执行方式，逗号分隔，默认全部: {",".join(MODES)}')
+    parser.add_argument('--log-sizes', default='1000,10000,100000', help='日志数量，默认 1000,10000,100000')
+    parser.add_argument('--fleet-sizes', default='1,10,100', help='设备数量，默认 1,10,100')
+    parser.add_argument('--logins', type=int, default=20, help='登录测试的登录次数，默认20')
+    parser.add_argument('--list-rounds', type=int, default=20, help='列表测试的轮数，默认20')
+    parser.add_argument('--ips', type=int, default=200, help='批量添加/删除的IP数量，默认200')
+    parser.add_argument('--workers', type=int, default=8, help='多线程/asyncio 的并发数，默认8')
+    parser.add_argument('--repeat', type=int, default=3, help='每项重复次数（取中位数），默认3')
+    parser.add_argument('--latency', type=float, default=0.002, help='模拟服务每个请求的延迟（秒），默认0.002')
+    parser.add_argument('--output', help='将结果保存为json文件')
+    parser.add_argument('--baseline', help='基线结果文件，耗时增加超过阈值时以非0状态退出')
+    parser.add_argument('--threshold', type=float, default=0.2, help='回退阈值，默认0.2（即单次操作慢20%%）')
+    args = parser.parse_args()
+
+    try:
+        started = datetime.now()
+        results = run_benchmarks(
+            benchmarks=args.benchmarks.split(","),
+            modes=args.modes.split(","),
+            log_sizes=parse_sizes(args.log_sizes),
+            fleet_sizes=parse_sizes(args.fleet_sizes),
+            login_count=args.logins,
+            list_rounds=args.list_rounds,
+            ip_count=args.ips,
+            workers=args.workers,
+            repeat=args.repeat,
+            latency=args.latency
+        )
+        report = {
+            "meta": {
+                "started": started.strftime("%Y-%m-%d %H:%M:%S"),
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "args": vars(args),
+            },
+            "results": results,
+        }
+        if args.output:
+            with open(args.output, "w", encoding="utf-8") as f:
+                json.dump(report, f, ensure_ascii=False, indent=2)
+            print(f"结果已保存至: {args.output}")
+
+        if args.baseline:
+            with open(args.baseline, "r", encoding="utf-8") as f:
+                baseline = json.load(f)["results"]
+            print_comparison(results, baseline)
+            # 本次计划执行的测试（未安装 aiohttp 而跳过的 asyncio 测试也算在内，缺失时视为回退）
+            expected = {f"{case[0]}[{mode}]" for case in plan_cases(
+                args.benchmarks.split(","), parse_sizes(args.log_sizes), parse_sizes(args.fleet_sizes))
+                for mode in args.modes.split(",")}
+            regressions = compare(results, baseline, args.threshold, expected)
+            if regressions:
+                print(f"发现 {len(regressions)} 项性能回退（阈值 {args.threshold:.0%}）:")
+                for key, base, current, change in regressions:
+                    if key not in results:
+                        print(f"  {key}: 本次结果中缺失")
+                    elif "error" in results[key]:
+                        print(f"  {key}: 执行失败 ({results[key]['error']})")
+                    else:
+                        print(f"  {key}: {base:.1f} -> {current:.1f} ops/s (单次耗时 {change:+.1%})")
+                sys.exit(1)
+            print("未发现性能回退")
+
+    except Exception as e:
+        print(f"错误: {e}")
+        sys.exit(2)
+
+
+if __name__ == "__main__":
+    # 使用示例:
+    # python waf_benchmark.py --output baseline.json
+    # python waf_benchmark.py --baseline baseline.json --output current.json
+    # python waf_benchmark.py --benchmarks logs --modes threaded,asyncio --log-sizes 100000 --workers 16
+    # python waf_benchmark.py --benchmarks login,fleet --fleet-sizes 1,10 --repeat 1
+    main()
@@ -0,0 +1,69 @@
+"""
+模块名称: waf_ctl.py
+
+该模块的目标：
+    waf_daemon.py 的命令行客户端：把命令发送给常驻的守护进程并打印结果，
+    只依赖标准库，不需要登录设备，适合在 shell 循环中频繁调用
+
+作者: ych
+修改历史:
+    1. 2026/10/18 - 创建文件
+"""
+import argparse
+import json
+import sys
+from waf_http.rpc import RpcClient, RpcError, DEFAULT_SOCKET_PATH
+
+
+def parse_params(params):
+    """解析 key=value 参数，value 按json解析（如 net_devs='["eth2","eth3"]'），解析失败时作为字符串"""
+    args = {}
+    for param in params:
+        key, sep, value = param.partition("=")
+        if not sep:
+            raise ValueError(f"参数格式应为 key=value: {param}")
+        try:
+            args[key] = json.loads(value)
+        except json.JSONDecodeError:
+            args[key] = value
+    return args
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description='WAF控制守护进程客户端')
+    parser.add_argument('command', help='命令，如 run-level.get、bond.list、ip.add；commands 查看全部命令')
+    parser.add_argument('params', nargs='*', help='命令参数，格式 key=value')
+    parser.add_argument('--device', help='设备IP')
+    parser.add_argument('--socket', default=DEFAULT_SOCKET_PATH, help=f'守护进程socket路径，默认 {DEFAULT_SOCKET_PATH}')
+    parser.add_argument('--timeout', type=float, help='等待响应的超时时间（秒），默认不限制')
+    parser.add_argument('--compact', action='store_true', help='输出单行json')
+    args = parser.parse_intermixed_args()
+
+    try:
+        with RpcClient(args.socket, timeout=args.timeout) as client:
+            response = client.request(args.command, args.device, parse_params(args.params))
+        if not response.get("ok"):
+            print(f"错误: {response.get('error')}", file=sys.stderr)
+            sys.exit(1)
+        result = response.get("result")
+        if isinstance(result, str):
+            print(result)
+        else:
+            print(json.dumps(result, ensure_ascii=False, indent=None if args.compact else 2))
+    except (RpcError, ValueError, OSError) as e:
+        print(f"错误: {e}", file=sys.stderr)
+        sys.exit(2)
+
+
+if __name__ == "__main__":
+    # 使用示例（先启动 python waf_daemon.py --inventory devices.json）:
+    # python waf_ctl.py run-level.get --device 10.20.192.106
+    # python waf_ctl.py run-level.set --device 10.20.192.106 level=forward_dev
+    # python waf_ctl.py bond.create --device 10.20.192.106 name=bond1 net_devs='["eth2","eth3"]'
+    # python waf_ctl.py ip.delete --device 10.20.192.106 ip_pk=12
+    # python waf_ctl.py logs.sys --device 10.20.192.106 start_time="2025-09-04 00:00:00" end_time="2025-09-04 23:59:59"
+    # python waf_ctl.py call --device 10.20.192.106 op=WAFManager.get_run_level
+    # python waf_ctl.py ssh.exec --device 10.20.192.106 command="uptime"
+    # python waf_ctl.py devices
+    main()
@@ -0,0 +1,355 @@
+"""
+模块名称: waf_daemon.py
+
+该模块的目标：
+    常驻的 WAF 控制守护进程：为一组设备保持已认证的 HttpObj 会话（可选保持 SSH 连接），
+    通过本地 Unix socket 接收命令（运行等级、链路聚合/网桥/IP 的查询创建删除、日志查询等），
+    省去每次执行脚本时的进程启动、导入和登录开销；客户端见 waf_ctl.py
+
+作者: ych
+修改历史:
+    1. 2026/10/18 - 创建文件
+    2. 2026/10/18 - 支持按设备限速（HTTP和SSH共用名额），增加 throttle 命令查看限流统计
+    3. 2026/10/18 - 支持按设备熔断，已熔断设备的命令立即失败，增加 health 命令查看设备健康评分
+    4. 2026/10/18 - 支持合并多个客户端同时发出的相同查询，增加 single-flight 命令查看合并统计
+    5. 2026/10/18 - socket已被运行中的守护进程使用时拒绝启动，只删除无人监听的残留socket文件
+"""
+import argparse
+import json
+import os
+import socket
+import socketserver
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from waf_http.circuit_breaker import CircuitBreaker
+from waf_http.http import HttpObj
+from waf_http.rpc import DEFAULT_SOCKET_PATH, encode_message
+from waf_http.singleflight import SingleFlight
+from waf_http.token_cache import TokenCache
+from fleet_runner import load_inventory, resolve_operation, build_manager, build_governor
+
+# 命令名 -> 管理类方法，参数以关键字参数传入
+COMMANDS = {
+    "run-level.get": "WAFManager.get_run_level",
+    "run-level.set": "WAFManager.set_run_level",
+    "bond.list": "NetworkBondManager.get_bonds",
+    "bond.create": "NetworkBondManager.create_bond",
+    "bond.delete": "NetworkBondManager.delete_bond",
+    "bridge.list": "NetworkBridgeManager.get_bridges",
+    "bridge.create": "NetworkBridgeCreator.create_bridge",
+    "bridge.delete": "NetworkBridgeManager.delete_bridge",
+    "ip.list": "NetworkIPManager.get_ips",
+    "ip.add": "NetworkIPAdder.add_ip",
+    "ip.delete": "NetworkIPManager.delete_ip",
+    "interface.list": "NetworkInterfaceManager.get_interfaces",
+    "hardware.list": "DeviceHardwareInterfaceManager.get_hardware_interfaces",
+    "ssh-service.status": "SSHService.get_ssh_status",
+    "ssh-service.disable": "SSHService.disable_ssh",
+    "logs.sys": "SysLogService.get_sys_logs",
+    "logs.operation": "OperationLogService.get_today_operation_logs",
+}
+# 守护进程自身的命令（不需要设备）
+BUILTIN_COMMANDS = ("ping", "commands", "devices", "throttle", "health", "single-flight", "shutdown")
+# 需要设备的内置命令: logout 关闭会话，ssh.exec 通过SSH执行命令，call 调用任意管理类方法
+DEVICE_BUILTIN_COMMANDS = ("logout", "ssh.exec", "call")
+
+
+def load_ssh_server():
+    """导入 ping_script 中的 SSHServer（依赖 paramiko，只有使用 ssh.exec 时才需要）"""
+    ping_script_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "ping_script")
+    if ping_script_dir not in sys.path:
+        sys.path.append(ping_script_dir)
+    from server_ping import SSHServer
+    return SSHServer
+
+
+class DeviceSession:
+    """单台设备的会话：首次使用时登录，之后复用 HttpObj（token失效时 HttpObj 自动重新登录）"""
+
+    def __init__(self, device, token_cache=None, ssh_options=None, governor=None, circuit_breaker=None,
+                 single_flight=None):
+        self.device = device
+        self.token_cache = token_cache
+        self.ssh_options = ssh_options or {}
+        self.governor = governor
+        self.circuit_breaker = circuit_breaker
+        self.single_flight = single_flight
+        self.http_obj = None
+        self.ssh = None
+        self.calls = 0
+        self.login_time = None
+        self._lock = threading.Lock()
+        self._ssh_lock = threading.Lock()
+
+    def get_http(self):
+        """返回已认证的 HttpObj"""
+        with self._lock:
+            if self.http_obj is None:
+                http_obj = HttpObj(
+                    ip=self.device["ip"],
+                    usr=self.device["user"],
+                    pwd=self.device["password"],
+                    port=self.device.get("port", 443),
+                    otp_key=self.device.get("otp"),
+                    token_cache=self.token_cache,
+                    governor=self.governor,
+                    circuit_breaker=self.circuit_breaker,
+                    single_flight=self.single_flight
+                )
+                start = time.perf_counter()
+                http_obj.get_token()
+                self.login_time = round(time.perf_counter() - start, 4)
+                self.http_obj = http_obj
+            self.calls += 1
+            return self.http_obj
+
+    def ssh_exec(self, command):
+        """通过保持的SSH连接执行命令，同一设备的命令依次执行"""
+        with self._ssh_lock:
+            if self.ssh is None:
+                ssh = load_ssh_server()(self.device["ip"], self.ssh_options.get("port", 22),
+                                        self.ssh_options.get("user", "root"),
+                                        password=self.ssh_options.get("password"),
+                                        key_path=self.ssh_options.get("key_path"),
+                                        governor=self.governor, circuit_breaker=self.circuit_breaker)
+                if not ssh.connect():
+                    raise ConnectionError(f"SSH连接 {self.device['ip']} 失败")
+                self.ssh = ssh
+            return self.ssh.exec_command(command)
+
+    def close(self):
+        """关闭会话，下次使用时重新登录"""
+        with self._lock:
+            if self.http_obj is not None:
+                self.http_obj.session.close()
+                self.http_obj = None
+        with self._ssh_lock:
+            if self.ssh is not None:
+                self.ssh.close()
+                self.ssh = None
+
+    def info(self):
+        return {"ip": self.device["ip"], "port": self.device.get("port", 443),
+                "logged_in": self.http_obj is not None, "ssh_connected": self.ssh is not None,
+                "calls": self.calls, "login_time": self.login_time}
+
+
+class WAFDaemon:
+    """命令分发：按设备IP取会话，执行对应的管理类方法"""
+
+    def __init__(self, devices=None, default_user="admin", default_password="Admin@1234", token_cache=None,
+                 ssh_options=None, governor=None, circuit_breaker=None, single_flight=None):
+        self.default_user = default_user
+        self.default_password = default_password
+        self.token_cache = TokenCache() if token_cache is True else token_cache
+        self.ssh_options = ssh_options
+        self.governor = governor
+        self.circuit_breaker = circuit_breaker
+        self.single_flight = SingleFlight() if single_flight is True else single_flight
+        self.sessions = {}
+        self._lock = threading.Lock()
+        self.server = None
+        for device in devices or []:
+            self.sessions[device["ip"]] = DeviceSession(device, self.token_cache, ssh_options, governor,
+                                                        circuit_breaker, self.single_flight)
+
+    def session(self, ip):
+        """取设备会话，不在清单中的设备使用默认用户名密码"""
+        with self._lock:
+            if ip not in self.sessions:
+                device = {"ip": ip, "user": self.default_user, "password": self.default_password, "port": 443}
+                self.sessions[ip] = DeviceSession(device, self.token_cache, self.ssh_options, self.governor,
+                                                  self.circuit_breaker, self.single_flight)
+            return self.sessions[ip]
+
+    def preload(self, workers=20):
+        """并发登录清单中的所有设备"""
+        sessions = list(self.sessions.values())
+        with ThreadPoolExecutor(max_workers=max(1, min(workers, len(sessions) or 1))) as executor:
+            for session, error in zip(sessions, executor.map(self._try_login, sessions)):
+                status = f"失败: {error}" if error else f"成功 ({session.login_time}s)"
+                print(f"预登录 {session.device['ip']}: {status}")
+
+    @staticmethod
+    def _try_login(session):
+        try:
+            session.get_http()
+            return None
+        except Exception as e:
+            return e
+
+    def handle(self, request):
+        """处理一个请求，返回响应dict"""
+        start = time.perf_counter()
+        response = {"id": request.get("id")}
+        try:
+            response["result"] = self.dispatch(request.get("command"), request.get("device"),
+                                               request.get("args") or {})
+            response["ok"] = True
+        except Exception as e:
+            response["ok"] = False
+            response["error"] = f"{type(e).__name__}: {e}"
+        response["elapsed"] = round((time.perf_counter() - start) * 1000, 2)
+        return response
+
+    def dispatch(self, command, device, args):
+        if command == "ping":
+            return "pong"
+        if command == "commands":
+            return {"builtin": BUILTIN_COMMANDS + DEVICE_BUILTIN_COMMANDS, "device": COMMANDS}
+        if command == "devices":
+            with self._lock:
+                return [session.info() for session in self.sessions.values()]
+        if command == "throttle":
+            return self.governor.snapshot() if self.governor is not None else []
+        if command == "health":
+            return self.circuit_breaker.snapshot() if self.circuit_breaker is not None else []
+        if command == "single-flight":
+            return self.single_flight.stats() if self.single_flight is not None else {}
+        if command == "shutdown":
+            # 在其他线程中停止，当前请求可以正常返回
+            threading.Thread(target=self.server.shutdown, daemon=True).start()
+            return "守护进程正在退出"
+
+        if not device:
+            raise ValueError(f"命令 {command} 需要指定设备")
+        session = self.session(device)
+        if command == "logout":
+            session.close()
+            return "已关闭会话"
+        if command == "ssh.exec":
+            return session.ssh_exec(args["command"])
+
+        if command == "call":
+            # 直接调用任意管理类方法，如 {"op": "WAFManager.get_run_level", "args": [], "kwargs": {}}
+            operation, call_args, call_kwargs = args["op"], args.get("args", []), args.get("kwargs", {})
+        elif command in COMMANDS:
+            operation, call_args, call_kwargs = COMMANDS[command], [], args
+        else:
+            raise ValueError(f"未知命令: {command}")
+        manager_cls, method_name = resolve_operation(operation)
+        manager = build_manager(manager_cls, session.get_http())
+        return getattr(manager, method_name)(*call_args, **call_kwargs)
+
+    def close(self):
+        for session in list(self.sessions.values()):
+            session.close()
+
+
+class _RequestHandler(socketserver.StreamRequestHandler):
+    """每个连接可以连续发送多个请求，每行一个"""
+
+    def handle(self):
+        daemon = self.server.waf_daemon
+        for line in self.rfile:
+            if not line.strip():
+                continue
+            try:
+                request = json.loads(line)
+            except json.JSONDecodeError as e:
+                response = {"id": None, "ok": False, "error": f"无效的请求: {e}"}
+            else:
+                response = daemon.handle(request)
+            self.wfile.write(encode_message(response))
+            self.wfile.flush()
+
+
+class _UnixServer(socketserver.ThreadingUnixStreamServer):
+    daemon_threads = True
+
+
+def claim_socket(socket_path):
+    """检查socket路径是否可用：已有守护进程在监听时抛出 RuntimeError，上次未正常退出留下的socket文件直接删除"""
+    if not os.path.exists(socket_path):
+        return
+    probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        probe.connect(socket_path)
+    except (ConnectionRefusedError, FileNotFoundError):
+        # 没有进程在监听（或已被删除），是残留的socket文件
+        if os.path.exists(socket_path):
+            os.remove(socket_path)
+        return
+    finally:
+        probe.close()
+    raise RuntimeError(f"已有守护进程在 {socket_path} 上运行")
+
+
+def serve(daemon, socket_path=DEFAULT_SOCKET_PATH):
+    """在 Unix socket 上提供服务，直到收到 shutdown 命令或 Ctrl+C"""
+    socket_dir = os.path.dirname(socket_path)
+    if socket_dir:
+        os.makedirs(socket_dir, mode=0o700, exist_ok=True)
+    claim_socket(socket_path)
+
+    old_umask = os.umask(0o177)  # socket文件只允许当前用户访问
+    try:
+        server = _UnixServer(socket_path, _RequestHandler)
+    finally:
+        os.umask(old_umask)
+    server.waf_daemon = daemon
+    daemon.server = server
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+        daemon.close()
+        if os.path.exists(socket_path):
+            os.remove(socket_path)
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description='WAF控制守护进程（保持设备会话，通过本地socket接收命令）')
+    parser.add_argument('--inventory', help='设备清单文件（json或csv），不指定时按请求中的设备IP使用默认账号')
+    parser.add_argument('--user', default='admin', help='清单中未指定时使用的用户名')
+    parser.add_argument('--password', default='Admin@1234', help='清单中未指定时使用的密码')
+    parser.add_argument('--socket', default=DEFAULT_SOCKET_PATH, help=f'socket路径，默认 {DEFAULT_SOCKET_PATH}')
+    parser.add_argument('--token-cache', action='store_true', help='启用token磁盘缓存，重启后不必重新登录')
+    parser.add_argument('--preload', action='store_true', help='启动时并发登录清单中的所有设备')
+    parser.add_argument('--max-in-flight', type=int, help='每台设备同时进行中的请求上限（启用限流）')
+    parser.add_argument('--rate-limits', help='按接口分类的限流配置（json，启用限流），如 \'{"auth": {"rate": 0.5}}\'')
+    parser.add_argument('--circuit-breaker', action='store_true', help='启用按设备熔断，不健康设备的命令立即失败')
+    parser.add_argument('--breaker-open-time', type=float, default=30, help='熔断时长（秒），默认30')
+    parser.add_argument('--single-flight', action='store_true', help='合并多个客户端同时发出的相同查询')
+    # SSH连接参数（ssh.exec 命令使用）
+    parser.add_argument('--ssh-user', default='root', help='SSH用户名，默认root')
+    parser.add_argument('--ssh-password', help='SSH密码')
+    parser.add_argument('--ssh-key', help='SSH私钥路径')
+    parser.add_argument('--ssh-port', type=int, default=22, help='SSH端口，默认22')
+    args = parser.parse_args()
+
+    try:
+        # 先检查socket，已有守护进程运行时不必登录设备
+        claim_socket(args.socket)
+        devices = load_inventory(args.inventory, args.user, args.password) if args.inventory else []
+        ssh_options = {"user": args.ssh_user, "password": args.ssh_password, "key_path": args.ssh_key,
+                       "port": args.ssh_port}
+        circuit_breaker = CircuitBreaker(open_time=args.breaker_open_time) if args.circuit_breaker else None
+        daemon = WAFDaemon(devices, args.user, args.password, token_cache=args.token_cache,
+                           ssh_options=ssh_options, governor=build_governor(args.rate_limits, args.max_in_flight),
+                           circuit_breaker=circuit_breaker, single_flight=args.single_flight)
+        if args.preload and devices:
+            daemon.preload()
+        print(f"守护进程已启动，设备数 {len(devices)}，socket: {args.socket}（Ctrl+C退出）")
+        try:
+            serve(daemon, args.socket)
+        except KeyboardInterrupt:
+            pass
+        print("守护进程已退出")
+
+    except Exception as e:
+        print(f"错误: {e}")
+
+
+if __name__ == "__main__":
+    # 使用示例:
+    # python waf_daemon.py --inventory devices.json --preload --token-cache
+    # python waf_daemon.py --ssh-user root --ssh-password xxx
+    # python waf_daemon.py --inventory devices.json --max-in-flight 4 --rate-limits '{"write": {"rate": 2}}'
+    # python waf_daemon.py --inventory devices.json --circuit-breaker --breaker-open-time 60
+    # python waf_daemon.py --inventory devices.json --single-flight
+    # 客户端: python waf_ctl.py run-level.get --device 10.20.192.106
+    main()
@@ -0,0 +1,237 @@
+"""
+模块名称: async_http.py
+
+该模块的目标：
+    存放 waf 的 AsyncHttpObj 类，基于 asyncio + aiohttp，
+    接口与 HttpObj 保持一致（get_token/_http_get/_http_post/_http_put/_http_delete），
+    用于同时管理大量设备
+
+    各个管理类（NetworkBondManager、WAFManager、SysLogService 等）的查询和增删改方法
+    传入 AsyncHttpObj 后返回协程，await 即可；组合多个请求的辅助方法（find_bond_pk、
+    SSHService.enable_ssh 等）有单独的异步实现，需要终端交互或线程池的
+    （NetworkIPManager.delete_ips_by_net_dev、NetworkStateApplier、分片查询）传入异步客户端时抛出 TypeError：
+        async with AsyncHttpObj(ip, "admin", "Admin@1234") as http_obj:
+            await http_obj.get_token()
+            level = await WAFManager(http_obj).get_run_level()
+
+作者: ych
+修改历史:
+    1. 2026/10/18 - 创建文件
+    2. 2026/10/18 - token失效时自动重新登录，并发请求只登录一次
+    3. 2026/10/18 - pyotp 改为登录时再导入
+    4. 2026/10/18 - 支持合并同时进行中的相同GET请求（single_flight）
+    5. 2026/10/18 - 修正文档：说明组合请求的辅助方法的异步支持情况
+"""
+import asyncio
+import json
+from .http import HttpObj, AuthError, encrypt_by_rsa, otp_now
+from .singleflight import AsyncSingleFlight, flight_key
+from .token_cache import TokenCache
+
+try:
+    import aiohttp
+except ImportError:  # aiohttp 为可选依赖，只有使用异步客户端时才需要
+    aiohttp = None
+
+
+class _Response:
+    """已读取完毕的响应，提供与requests.Response相同的检查接口"""
+
+    def __init__(self, status_code, text):
+        self.status_code = status_code
+        self.text = text
+
+    def json(self):
+        return json.loads(self.text)
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise Exception(f"请求失败: {self.status_code}, 响应内容: {self.text[:200]}")
+
+
+class AsyncHttpObj:
+    """异步HTTP请求处理类，包含认证和请求功能
+
+    同一个对象内的连接会被复用，并发请求数受 max_concurrency 限制，
+    避免单台设备的管理面被打满。
+    """
+
+    is_async = True
+
+    # 响应检查逻辑与同步客户端完全一致
+    _check_response = HttpObj._check_response
+    _check_delete_response = HttpObj._check_delete_response
+
+    def __init__(self, ip, usr, pwd, port=443, otp_key=None, token_cache=None, max_concurrency=10,
+                 single_flight=None):
+        """
+        :param token_cache: token缓存，传入TokenCache对象或True（使用默认缓存文件），默认不缓存
+        :param max_concurrency: 对该设备同时进行中的最大请求数
+        :param single_flight: GET请求合并，传入AsyncSingleFlight对象（可在同一事件循环的多个对象间共用）或True，默认不合并
+        """
+        if aiohttp is None:
+            raise ImportError("AsyncHttpObj 需要安装 aiohttp: pip install aiohttp")
+        self.ip = ip
+        self.usr = usr
+        self.pwd = pwd
+        self.port = port
+        self.otp_key = otp_key
+        self.token = None
+        self.token_cache = TokenCache() if token_cache is True else (token_cache or None)
+        self._auth_lock = asyncio.Lock()
+        self.max_concurrency = max_concurrency
+        self.single_flight = AsyncSingleFlight() if single_flight is True else (single_flight or None)
+        self.session = None
+        self._semaphore = None
+        self.url_prefix = f"https://{ip}:{port}/"
+        self.headers = {"Content-Type": "application/json"}
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
+
+    def _get_session(self):
+        """延迟创建会话，保证在事件循环内创建"""
+        if self.session is None or self.session.closed:
+            connector = aiohttp.TCPConnector(ssl=False, limit_per_host=self.max_concurrency)
+            self.session = aiohttp.ClientSession(connector=connector)
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self.session
+
+    async def close(self):
+        """关闭会话和连接池"""
+        if self.session is not None and not self.session.closed:
+            await self.session.close()
+
+    async def _get_public_key(self):
+        """获取设备的RSA公钥"""
+        url = 'api/v2/system/auth/public_key/'
+        return await self._http_get(url, add_token=False)
+
+    async def get_token(self, force=False):
+        """获取token，启用缓存时优先使用缓存，force为True时强制重新登录"""
+        if self.token_cache and not force:
+            token = self.token_cache.get(self.ip, self.port, self.usr)
+            if token:
+                self._set_token(token)
+                return token
+        return await self._login()
+
+    async def _login(self):
+        """执行完整登录流程获取token"""
+        # 1. 获取设备公钥
+        public_key = await self._get_public_key()
+
+        # 2. 加密密码
+        pwd_encrypted = encrypt_by_rsa(self.pwd, public_key)
+
+        # 3. 发送登录请求
+        login_data = {
+            "username": self.usr,
+            "password": pwd_encrypted
+        }
+        login_url = "api/v2/system/user/login/"
+        login_resp = await self._http_post(login_url, login_data, add_token=False)
+
+        # 4. 处理OTP双因子认证
+        if self.otp_key:
+            user_pk = login_resp["pk"]
+            auth_data = {
+                "otp_code": otp_now(self.otp_key),
+                "token": login_resp["token"]
+            }
+            login_resp = await self.otp_auth(user_pk, auth_data)
+
+        # 5. 保存并返回token
+        self._set_token(login_resp["token"])
+        if self.token_cache:
+            self.token_cache.set(self.ip, self.port, self.usr, self.token)
+        return self.token
+
+    def _set_token(self, token):
+        """设置当前使用的token"""
+        self.token = token
+        self.headers["Authorization"] = token
+
+    async def otp_auth(self, user_pk, auth_data):
+        """双因子认证"""
+        url = f"api/v2/system/user/otp_auth/{user_pk}/"
+        return await self._http_post(url, auth_data, add_token=False)
+
+    async def _http_get(self, url, params=None, add_token=True):
+        """发送GET请求，启用合并时与同时进行中的相同请求共用结果"""
+        if self.single_flight is None:
+            return await self._request("GET", url, params=params, add_token=add_token)
+        key = flight_key(self.url_prefix, url, params, self.usr if add_token else None)
+        return await self.single_flight.do(key, lambda: self._request("GET", url, params=params, add_token=add_token))
+
+    async def _http_put(self, url, data, add_token=True):
+        """发送PUT请求"""
+        return await self._request("PUT", url, data=data, add_token=add_token)
+
+    async def _http_post(self, url, data, add_token=True):
+        """发送POST请求"""
+        return await self._request("POST", url, data=data, add_token=add_token)
+
+    async def _http_delete(self, url, params=None):
+        """发送DELETE请求"""
+        return await self._request("DELETE", url, params=params, bearer=True,
+                                   checker=self._check_delete_response)
+
+    async def _request(self, method, url, params=None, data=None, add_token=True, bearer=False, checker=None):
+        """发送请求并检查响应"""
+        if method != "GET" and self.single_flight is not None and add_token:
+            # 写操作之后的GET不再与写之前（或写的过程中）发出的GET合并
+            self.single_flight.forget(self.url_prefix)
+            try:
+                return await self._request_with_auth(method, url, params, data, add_token, bearer, checker)
+            finally:
+                self.single_flight.forget(self.url_prefix)
+        return await self._request_with_auth(method, url, params, data, add_token, bearer, checker)
+
+    async def _request_with_auth(self, method, url, params, data, add_token, bearer, checker):
+        """发送请求并检查响应，token被设备拒绝时重新登录并重放一次"""
+        checker = checker or self._check_response
+        token = self.token
+        try:
+            return checker(await self._send(method, url, params, data, add_token, bearer, token))
+        except AuthError:
+            if not add_token:
+                raise
+            token = await self._refresh_token(token)
+        return checker(await self._send(method, url, params, data, add_token, bearer, token))
+
+    async def _refresh_token(self, rejected_token):
+        """刷新被拒绝的token
+
+        并发请求同时遇到认证失败时只有第一个真正重新登录，
+        其余的等待登录完成后直接使用新token，避免对设备认证接口的集中冲击
+        """
+        async with self._auth_lock:
+            if self.token == rejected_token:
+                if self.token_cache:
+                    self.token_cache.invalidate(self.ip, self.port, self.usr)
+                await self._login()
+            return self.token
+
+    async def _send(self, method, url, params=None, data=None, add_token=True, bearer=False, token=None):
+        """构造请求头并发送请求，返回读取完毕的响应"""
+        full_url = self.url_prefix + url
+        if bearer:
+            headers = {
+                "Authorization": f"Bearer {token}",
+                "Content-Type": "application/json",
+                "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/139.0.0.0 Safari/537.36 Edg/139.0.0.0"
+            }
+        else:
+            headers = self.headers.copy()
+            headers.pop("Authorization", None)
+            if add_token and token:
+                headers["Authorization"] = token
+
+        session = self._get_session()
+        async with self._semaphore:
+            async with session.request(method, full_url, headers=headers, params=params, json=data) as response:
+                return _Response(response.status, await response.text())
@@ -0,0 +1,221 @@
+"""
+模块名称: circuit_breaker.py
+
+该模块的目标：
+    按设备的熔断器和健康评分：设备在最近的调用中失败率或慢调用比例超过阈值（或连续失败）时熔断，
+    熔断期间的调用立即抛出 CircuitOpenError，不再等待连接超时；
+    熔断时间过后进入半开状态，放行少量探测调用，成功则恢复，失败则再次熔断（熔断时间加倍）
+
+作者: ych
+修改历史:
+    1. 2026/10/18 - 创建文件
+"""
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(Exception):
+    """设备处于熔断状态，调用被立即拒绝"""
+
+    def __init__(self, device, retry_after):
+        super().__init__(f"设备 {device} 处于熔断状态，{retry_after:.1f}秒后重试")
+        self.device = device
+        self.retry_after = retry_after
+
+
+class _DeviceCircuit:
+    """单台设备的熔断状态和最近的调用结果"""
+
+    __slots__ = ("state", "calls", "consecutive_failures", "opened_at", "open_time", "probes", "probe_at",
+                 "total", "failures", "rejected", "opened")
+
+    def __init__(self, window, open_time):
+        self.state = CLOSED
+        # 最近的调用结果 (是否成功, 是否慢调用)
+        self.calls = deque(maxlen=window)
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self.open_time = open_time
+        self.probes = 0
+        self.probe_at = 0.0
+        self.total = 0
+        self.failures = 0
+        self.rejected = 0
+        self.opened = 0
+
+    def rates(self):
+        """返回 (失败率, 慢调用比例)"""
+        if not self.calls:
+            return 0.0, 0.0
+        failed = sum(1 for ok, _ in self.calls if not ok)
+        slow = sum(1 for ok, is_slow in self.calls if ok and is_slow)
+        return failed / len(self.calls), slow / len(self.calls)
+
+
+class CircuitBreaker:
+    """按设备的熔断器，可被多个 HttpObj / SSHServer 和多个线程共用
+
+    HttpObj 传入 circuit_breaker 参数后自动使用；其他调用方式:
+        with breaker.guard("10.20.192.106"):
+            ...调用设备，抛出异常视为失败...
+    """
+
+    def __init__(self, window=20, min_calls=5, failure_rate=0.5, slow_call_time=5.0, slow_call_rate=0.8,
+                 consecutive_failures=3, open_time=30.0, max_open_time=300.0, half_open_calls=1):
+        """
+        :param window: 统计最近多少次调用
+        :param min_calls: 窗口内至少有多少次调用才按比例判断
+        :param failure_rate: 失败率达到该值时熔断
+        :param slow_call_time: 耗时超过该值（秒）的成功调用视为慢调用
+        :param slow_call_rate: 慢调用比例达到该值时熔断
+        :param consecutive_failures: 连续失败达到该次数时立即熔断（不受min_calls限制），None不启用
+        :param open_time: 首次熔断的时长（秒），半开探测失败后加倍
+        :param max_open_time: 熔断时长上限（秒）
+        :param half_open_calls: 半开状态同时放行的探测调用数
+        """
+        self.window = window
+        self.min_calls = min_calls
+        self.failure_rate = failure_rate
+        self.slow_call_time = slow_call_time
+        self.slow_call_rate = slow_call_rate
+        self.consecutive_failures = consecutive_failures
+        self.open_time = open_time
+        self.max_open_time = max_open_time
+        self.half_open_calls = half_open_calls
+        self._circuits = {}
+        self._lock = threading.Lock()
+
+    def _circuit(self, device):
+        circuit = self._circuits.get(device)
+        if circuit is None:
+            circuit = self._circuits[device] = _DeviceCircuit(self.window, self.open_time)
+        return circuit
+
+    def before_call(self, device):
+        """调用前检查，熔断中抛出 CircuitOpenError；半开状态下占用一个探测名额"""
+        with self._lock:
+            circuit = self._circuit(device)
+            if circuit.state == CLOSED:
+                return
+            now = time.monotonic()
+            if circuit.state == OPEN:
+                remaining = circuit.opened_at + circuit.open_time - now
+                if remaining > 0:
+                    circuit.rejected += 1
+                    raise CircuitOpenError(device, remaining)
+                circuit.state = HALF_OPEN
+                circuit.probes = 0
+            # 探测调用长时间没有结果（如调用方被中断）时放行新的探测
+            if circuit.probes >= self.half_open_calls and now - circuit.probe_at < circuit.open_time:
+                circuit.rejected += 1
+                raise CircuitOpenError(device, circuit.probe_at + circuit.open_time - now)
+            circuit.probes += 1
+            circuit.probe_at = now
+
+    def record(self, device, ok, elapsed=0.0):
+        """记录一次调用结果
+
+        :param ok: 是否成功（连接失败、超时、5xx视为失败，4xx和业务错误说明设备正常响应，应视为成功）
+        :param elapsed: 调用耗时（秒）
+        """
+        with self._lock:
+            circuit = self._circuit(device)
+            circuit.total += 1
+            if not ok:
+                circuit.failures += 1
+            if circuit.state == HALF_OPEN:
+                circuit.probes = max(0, circuit.probes - 1)
+                if ok:
+                    circuit.state = CLOSED
+                    circuit.calls.clear()
+                    circuit.consecutive_failures = 0
+                    circuit.open_time = self.open_time
+                else:
+                    self._open(circuit, min(self.max_open_time, circuit.open_time * 2))
+                return
+            if circuit.state == OPEN:
+                # 熔断前已发出的调用，结果不再影响状态
+                return
+
+            circuit.calls.append((ok, elapsed >= self.slow_call_time))
+            circuit.consecutive_failures = 0 if ok else circuit.consecutive_failures + 1
+            if self.consecutive_failures and circuit.consecutive_failures >= self.consecutive_failures:
+                self._open(circuit, self.open_time)
+            elif len(circuit.calls) >= self.min_calls:
+                failure_rate, slow_rate = circuit.rates()
+                if failure_rate >= self.failure_rate or slow_rate >= self.slow_call_rate:
+                    self._open(circuit, self.open_time)
+
+    @staticmethod
+    def _open(circuit, open_time):
+        circuit.state = OPEN
+        circuit.opened_at = time.monotonic()
+        circuit.open_time = open_time
+        circuit.probes = 0
+        circuit.opened += 1
+
+    @contextmanager
+    def guard(self, device):
+        """调用前检查熔断状态，抛出异常记为失败，否则记为成功"""
+        self.before_call(device)
+        start = time.monotonic()
+        try:
+            yield
+        except Exception:
+            self.record(device, False, time.monotonic() - start)
+            raise
+        self.record(device, True, time.monotonic() - start)
+
+    def state(self, device):
+        with self._lock:
+            return self._circuit(device).state
+
+    def retry_after(self, device):
+        """距离允许下一次调用的秒数，未熔断时为0"""
+        with self._lock:
+            circuit = self._circuit(device)
+            if circuit.state != OPEN:
+                return 0.0
+            return max(0.0, circuit.opened_at + circuit.open_time - time.monotonic())
+
+    def health(self, device):
+        """健康评分 0~1: 熔断中为0，半开为0.1，否则按最近的失败率和慢调用比例计算"""
+        with self._lock:
+            return self._health(self._circuit(device))
+
+    @staticmethod
+    def _health(circuit):
+        if circuit.state == OPEN:
+            return 0.0
+        if circuit.state == HALF_OPEN:
+            return 0.1
+        failure_rate, slow_rate = circuit.rates()
+        return round((1 - failure_rate) * (1 - slow_rate / 2), 4)
+
+    def snapshot(self):
+        """返回各设备的熔断状态和健康评分列表"""
+        with self._lock:
+            now = time.monotonic()
+            result = []
+            for device, circuit in sorted(self._circuits.items()):
+                failure_rate, slow_rate = circuit.rates()
+                retry_after = circuit.opened_at + circuit.open_time - now if circuit.state == OPEN else 0.0
+                result.append({
+                    "device": device,
+                    "state": circuit.state,
+                    "health": self._health(circuit),
+                    "failure_rate": round(failure_rate, 4),
+                    "slow_rate": round(slow_rate, 4),
+                    "calls": circuit.total,
+                    "failures": circuit.failures,
+                    "rejected": circuit.rejected,
+                    "opened": circuit.opened,
+                    "retry_after": round(max(0.0, retry_after), 2),
+                })
+            return result
@@ -7,22 +7,36 @@
 作者: ych
 修改历史:
     1. 2025/9/4 - 创建文件
+    2. 2026/10/18 - 支持token磁盘缓存，缓存token被拒绝时自动重新登录
+    3. 2026/10/18 - 支持连接池大小、超时和带抖动指数退避的重试配置
+    4. 2026/10/18 - token失效时自动重新登录，并发请求只登录一次
+    5. 2026/10/18 - 支持按接口统计请求次数、错误、流量和延迟
+    6. 2026/10/18 - 支持GET响应缓存，写操作自动清除对应缓存
+    7. 2026/10/18 - requests/cryptography/pyotp 改为用到时再导入，加快命令行工具启动
+    8. 2026/10/18 - 支持按设备限速和限制并发（governor）
+    9. 2026/10/18 - 支持按设备熔断（circuit_breaker），不健康的设备立即失败
+    10. 2026/10/18 - 支持合并同时进行中的相同GET请求（single_flight）
+    11. 2026/10/18 - 请求期间发生写操作时GET结果不写入响应缓存
 """
-import urllib3
-import requests
 import base64
-import pyotp
 import json
-from cryptography.hazmat.primitives import serialization
-from cryptography.hazmat.backends import default_backend
-from cryptography.hazmat.primitives.asymmetric import padding
+import random
+import threading
+import time
+from .response_cache import ResponseCache
+from .singleflight import SingleFlight, flight_key
+from .token_cache import TokenCache
 
-# 禁用SSL警告
-urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+# requests、cryptography、pyotp 导入较慢，在创建 HttpObj / 登录时才导入，
+# 命令行工具执行 --help 或使用缓存token时不必加载
 
 
 def encrypt_by_rsa(msg, public_pem_str):
     """使用RSA公钥加密数据"""
+    from cryptography.hazmat.primitives import serialization
+    from cryptography.hazmat.backends import default_backend
+    from cryptography.hazmat.primitives.asymmetric import padding
+
     public_key = serialization.load_pem_public_key(
         public_pem_str.encode(),
         backend=default_backend()
@@ -34,28 +48,98 @@ def encrypt_by_rsa(msg, public_pem_str):
     return base64.b64encode(text).decode()
 
 
+def otp_now(otp_key):
+    """生成当前的OTP动态口令"""
+    import pyotp
+    return pyotp.TOTP(otp_key).now()
+
+
+class AuthError(Exception):
+    """认证失败异常（token无效或已过期）"""
+
+
+# 幂等方法，失败后可以安全重试
+IDEMPOTENT_METHODS = frozenset(["GET", "PUT", "DELETE", "HEAD", "OPTIONS"])
+# 视为临时故障、需要重试的状态码（如设备重启过程中）
+RETRY_STATUSES = frozenset([500, 502, 503, 504])
+
+
 class HttpObj:
     """HTTP请求处理类，包含认证和请求功能"""
 
-    def __init__(self, ip, usr, pwd, port=443, otp_key=None):
+    def __init__(self, ip, usr, pwd, port=443, otp_key=None, token_cache=None,
+                 pool_connections=10, pool_maxsize=10, pool_block=False, keep_alive=True,
+                 connect_timeout=10, read_timeout=60,
+                 retries=2, backoff_factor=0.5, backoff_max=10, metrics=None,
+                 response_cache=None, governor=None, circuit_breaker=None, single_flight=None):
+        """
+        :param token_cache: token缓存，传入TokenCache对象或True（使用默认缓存文件），默认不缓存
+        :param pool_connections: 连接池缓存的主机数
+        :param pool_maxsize: 每个主机最多保持的连接数，多线程共用一个对象时应不小于线程数
+        :param pool_block: 连接池用尽时是否阻塞等待，False时临时新建连接
+        :param keep_alive: 是否保持长连接，False时每个请求后关闭连接
+        :param connect_timeout: 建立连接超时（秒），None表示不限制
+        :param read_timeout: 读取响应超时（秒），None表示不限制
+        :param retries: 幂等请求（GET/PUT/DELETE）在连接失败、超时或5xx时的最大重试次数
+        :param backoff_factor: 退避基数（秒），第n次重试前随机等待 0~backoff_factor*2^n 秒
+        :param backoff_max: 单次退避等待的上限（秒）
+        :param metrics: 请求指标收集对象（RequestMetrics），默认不统计
+        :param response_cache: GET响应缓存，传入ResponseCache对象或True（使用默认TTL配置），默认不缓存
+        :param governor: 按设备的限速和并发控制（RequestGovernor），多个HttpObj共用同一个对象，默认不限制
+        :param circuit_breaker: 按设备的熔断器（CircuitBreaker），熔断期间请求立即抛出 CircuitOpenError，默认不熔断
+        :param single_flight: GET请求合并，传入SingleFlight对象（可在多个HttpObj间共用）或True，默认不合并
+        """
         self.ip = ip
         self.usr = usr
         self.pwd = pwd
         self.port = port
         self.otp_key = otp_key
         self.token = None
+        self.token_cache = TokenCache() if token_cache is True else (token_cache or None)
+        self._auth_lock = threading.Lock()
+        self.timeout = (connect_timeout, read_timeout)
+        self.retries = retries
+        self.backoff_factor = backoff_factor
+        self.backoff_max = backoff_max
+        self.metrics = metrics
+        self.response_cache = ResponseCache() if response_cache is True else (response_cache or None)
+        self.governor = governor
+        self.circuit_breaker = circuit_breaker
+        self.single_flight = SingleFlight() if single_flight is True else (single_flight or None)
+        import requests
+        import urllib3
+        from requests.adapters import HTTPAdapter
+        # 禁用SSL警告
+        urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+        self._retry_errors = (requests.exceptions.ConnectionError, requests.exceptions.Timeout)
         self.session = requests.Session()
         self.session.verify = False  # 禁用SSL验证
+        adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize,
+                              pool_block=pool_block, max_retries=0)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
         self.url_prefix = f"https://{ip}:{port}/"
         self.headers = {"Content-Type": "application/json"}
+        if not keep_alive:
+            self.headers["Connection"] = "close"
 
     def _get_public_key(self):
         """获取设备的RSA公钥"""
         url = 'api/v2/system/auth/public_key/'
         return self._http_get(url, add_token=False)
 
-    def get_token(self):
-        """执行完整极速赛车开奖直播【官网：ak8989.com】复制打开·登录流程获取token"""
+    def get_token(self, force=False):
+        """获取token，启用缓存时优先使用缓存，force为True时强制重新登录"""
+        if self.token_cache and not force:
+            token = self.token_cache.get(self.ip, self.port, self.usr)
+            if token:
+                # 缓存的token不在这里校验，等设备拒绝时再重新登录
+                self._set_token(token)
+                return token
+        return self._login()
+
+    def _login(self):
+        """执行完整登录流程获取token"""
         # 1. 获取设备公钥
         public_key = self._get_public_key()
 
@@ -74,16 +158,22 @@ class HttpObj:
         if self.otp_key:
             user_pk = login_resp["pk"]
             auth_data = {
-                "otp_code": pyotp.TOTP(self.otp_key).now(),
+                "otp_code": otp_now(self.otp_key),
                 "token": login_resp["token"]
             }
             login_resp = self.otp_auth(user_pk, auth_data)
 
         # 5. 保存并返回token
-        self.token = login_resp["token"]
-        self.headers["Authorization"] = self.token
+        self._set_token(login_resp["token"])
+        if self.token_cache:
+            self.token_cache.set(self.ip, self.port, self.usr, self.token)
         return self.token
 
+    def _set_token(self, token):
+        """设置当前使用的token"""
+        self.token = token
+        self.headers["Authorization"] = token
+
     def otp_auth(self, user_pk, auth_data):
         """双因子认证"""
         url = f"api/v2/system/user/otp_auth/{user_pk}/"
@@ -91,59 +181,165 @@ class HttpObj:
 
     def _http_get(self, url, params=None, add_token=True):
         """发送GET请求"""
-        full_url = self.url_prefix + url
-        headers = self.headers.copy()
-        if not add_token:
-            headers.pop("Authorization", None)
+        if self.response_cache is None or not add_token:
+            return self._coalesced_get(url, params, add_token)
+
+        hit, data = self.response_cache.get(self.url_prefix, url, params)
+        if hit:
+            return data
+        # 先记下写操作计数，请求期间发生写操作时结果可能是写之前的数据，不写入缓存
+        generation = self.response_cache.generation(self.url_prefix)
+        data = self._coalesced_get(url, params, add_token)
+        self.response_cache.set(self.url_prefix, url, params, data, generation)
+        return data
 
-        response = self.session.get(
-            full_url,
-            headers=headers,
-            params=params,
-            verify=False
-        )
-        return self._check_response(response)
+    def _coalesced_get(self, url, params, add_token):
+        """发送GET请求，启用合并时与同时进行中的相同请求共用结果"""
+        if self.single_flight is None:
+            return self._request("GET", url, params=params, add_token=add_token)
+        # 需要认证的接口按用户区分，公钥等接口在所有用户间合并
+        key = flight_key(self.url_prefix, url, params, self.usr if add_token else None)
+        return self.single_flight.do(key, lambda: self._request("GET", url, params=params, add_token=add_token))
 
     def _http_put(self, url, data, add_token=True):
         """发送PUT请求"""
-        full_url = self.url_prefix + url
-        headers = self.headers.copy()
-        if not add_token:
-            headers.pop("Authorization", None)
-
-        response = self.session.put(
-            full_url,
-            json=data,
-            headers=headers,
-            verify=False
-        )
-        return self._check_response(response)
+        return self._request("PUT", url, data=data, add_token=add_token)
 
     def _http_post(self, url, data, add_token=True):
         """发送POST请求"""
-        full_url = self.url_prefix + url
-        headers = self.headers.copy()
-        if not add_token:
-            headers.pop("Authorization", None)
-
-        response = self.session.post(
-            full_url,
-            json=data,
-            headers=headers,
-            verify=False
-        )
-        return self._check_response(response)
+        return self._request("POST", url, data=data, add_token=add_token)
 
     def _http_delete(self, url, params=None):
         """发送DELETE请求 """
+        return self._request("DELETE", url, params=params, bearer=True,
+                             checker=self._check_delete_response)
+
+    def _request(self, method, url, params=None, data=None, add_token=True, bearer=False, checker=None):
+        """发送请求并检查响应，写操作时清除对应的响应缓存"""
+        if method != "GET" and (self.response_cache is not None or self.single_flight is not None):
+            # 写操作无论成功与否都可能改变设备状态，请求前后都清除对应缓存，
+            # 之后的GET也不再与写之前发出的GET合并
+            self._invalidate(url, add_token)
+            try:
+                return self._request_with_auth(method, url, params, data, add_token, bearer, checker)
+            finally:
+                self._invalidate(url, add_token)
+        return self._request_with_auth(method, url, params, data, add_token, bearer, checker)
+
+    def _invalidate(self, url, add_token=True):
+        """清除写操作影响的缓存；登录等不需要token的请求不改变设备配置，不影响请求合并"""
+        if self.response_cache is not None:
+            self.response_cache.invalidate(self.url_prefix, url)
+        if self.single_flight is not None and add_token:
+            self.single_flight.forget(self.url_prefix)
+
+    def _request_with_auth(self, method, url, params, data, add_token, bearer, checker):
+        """发送请求并检查响应，认证失败时刷新token后重放一次"""
+        checker = checker or self._check_response
+        token = self.token
+        try:
+            return checker(self._send(method, url, params, data, add_token, bearer, token))
+        except AuthError:
+            if not add_token:
+                raise
+            token = self._refresh_token(token)
+        return checker(self._send(method, url, params, data, add_token, bearer, token))
+
+    def _refresh_token(self, rejected_token):
+        """刷新被拒绝的token
+
+        并发请求同时遇到认证失败时只有第一个真正重新登录，
+        其余的等待登录完成后直接使用新token，避免对设备认证接口的集中冲击
+        """
+        with self._auth_lock:
+            if self.token == rejected_token:
+                if self.token_cache:
+                    self.token_cache.invalidate(self.ip, self.port, self.usr)
+                self._login()
+            return self.token
+
+    def _send(self, method, url, params=None, data=None, add_token=True, bearer=False, token=None):
+        """构造请求头并发送请求，返回原始响应"""
         full_url = self.url_prefix + url
-        headers = {
-            "Authorization": f"Bearer {self.token}",
-            "Content-Type": "application/json",
-            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/139.0.0.0 Safari/537.36 Edg/139.0.0.0"
-        }
+        if bearer:
+            headers = {
+                "Authorization": f"Bearer {token}",
+                "Content-Type": "application/json",
+                "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/139.0.0.0 Safari/537.36 Edg/139.0.0.0"
+            }
+            if "Connection" in self.headers:
+                headers["Connection"] = self.headers["Connection"]
+        else:
+            headers = self.headers.copy()
+            headers.pop("Authorization", None)
+            if add_token and token:
+                headers["Authorization"] = token
+
+        # 只有幂等方法才重试，避免POST被重复执行
+        retries = self.retries if method in IDEMPOTENT_METHODS else 0
+        for attempt in range(retries + 1):
+            try:
+                response = self._do_request(method, url, full_url, headers, params, data)
+            except self._retry_errors:
+                if attempt >= retries:
+                    raise
+            else:
+                if response.status_code not in RETRY_STATUSES or attempt >= retries:
+                    return response
+                response.close()
+            self._backoff(attempt)
+
+    def _do_request(self, method, url, full_url, headers, params, data):
+        """发送单次请求，启用熔断时先检查设备状态，启用限流时再等待该设备的名额（重试的每次请求都要等待）"""
+        if self.circuit_breaker is not None:
+            # 熔断中直接抛出 CircuitOpenError，不占用限流名额
+            self.circuit_breaker.before_call(self.ip)
+        if self.governor is None:
+            return self._guarded_request(method, url, full_url, headers, params, data)
+        with self.governor.request_slot(self.ip, method, url):
+            return self._guarded_request(method, url, full_url, headers, params, data)
+
+    def _guarded_request(self, method, url, full_url, headers, params, data):
+        """发送单次请求，启用熔断时记录结果：连接失败、超时和5xx为失败"""
+        if self.circuit_breaker is None:
+            return self._timed_request(method, url, full_url, headers, params, data)
+
+        start = time.perf_counter()
+        try:
+            response = self._timed_request(method, url, full_url, headers, params, data)
+        except Exception:
+            self.circuit_breaker.record(self.ip, False, time.perf_counter() - start)
+            raise
+        self.circuit_breaker.record(self.ip, response.status_code not in RETRY_STATUSES,
+                                    time.perf_counter() - start)
+        return response
+
+    def _timed_request(self, method, url, full_url, headers, params, data):
+        """发送单次请求，启用统计时记录耗时和收发字节数（不含限流等待）"""
+        if self.metrics is None:
+            return self.session.request(method, full_url, headers=headers, params=params, json=data,
+                                        verify=False, timeout=self.timeout)
+
+        start = time.perf_counter()
+        try:
+            response = self.session.request(method, full_url, headers=headers, params=params, json=data,
+                                            verify=False, timeout=self.timeout)
+        except Exception:
+            self.metrics.record(self.ip, method, url, time.perf_counter() - start)
+            raise
+        body = response.request.body
+        self.metrics.record(self.ip, method, url, time.perf_counter() - start, status=response.status_code,
+                            bytes_out=len(body) if body else 0, bytes_in=len(response.content))
+        return response
+
+    def _backoff(self, attempt):
+        """带随机抖动的指数退避等待"""
+        time.sleep(random.uniform(0, min(self.backoff_max, self.backoff_factor * (2 ** attempt))))
 
-        response = self.session.delete(full_url, headers=headers, params=params, verify=False)
+    def _check_delete_response(self, response):
+        """检查DELETE响应，响应为空时返回成功消息"""
+        if response.status_code == 401:
+            raise AuthError(f"认证失败: {response.status_code}, 响应内容: {response.text[:200]}")
         response.raise_for_status()
 
         # 尝试解析JSON响应，如果响应为空则返回成功消息
@@ -154,6 +350,8 @@ class HttpObj:
 
     def _check_response(self, response):
         """检查响应状态并解析JSON"""
+        if response.status_code == 401:
+            raise AuthError(f"认证失败: {response.status_code}, 响应内容: {response.text[:200]}")
         if response.status_code != 200:
             error_msg = f"请求失败: {response.status_code}"
             try:
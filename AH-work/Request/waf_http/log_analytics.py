@@ -0,0 +1,131 @@
+"""
+模块名称: log_analytics.py
+
+该模块的目标：
+    日志统计分析：把日志转换为列式 numpy 数组后做向量化分组统计，
+    包括按小时和等级的事件数、按用户/目标的 Top N、按目标的失败率
+
+作者: ych
+修改历史:
+    1. 2026/10/18 - 创建文件
+    2. 2026/10/18 - numpy 改为统计时再导入
+    3. 2026/10/18 - to_columns 一次遍历取出整行（itemgetter/attrgetter），类型转换改为 numpy 批量处理
+"""
+import operator
+from .log_export import get_field
+from .log_store import normalize_timestamp
+from .records import Record
+
+# opt_res 中表示成功的取值，其余均视为失败
+SUCCESS_VALUES = frozenset(["success", "succeed", "ok", "true", "1", "成功"])
+
+
+def _numpy():
+    """导入 numpy（可选依赖，只有做统计分析时才需要）"""
+    try:
+        import numpy
+    except ImportError:
+        raise ImportError("日志统计分析需要安装 numpy: pip install numpy")
+    return numpy
+
+
+def _rows(entries, columns):
+    """一次遍历取出每条日志的各列值，返回行元组列表
+
+    字典用 itemgetter、紧凑记录对象用 attrgetter 一次取出整行（C实现，不再逐列调用 get_field），
+    缺少字段的字典和嵌套列（a.b）按通用方式读取
+    """
+    if any("." in column for column in columns):
+        return [tuple(get_field(e, column) for column in columns) for e in entries]
+    sample = entries[0] if entries else None
+    if isinstance(sample, Record) and all(column in type(sample)._fields for column in columns):
+        getter = operator.attrgetter(*columns)
+    elif isinstance(sample, dict):
+        getter = operator.itemgetter(*columns)
+    else:
+        getter = None
+    if getter is not None:
+        try:
+            rows = list(map(getter, entries))
+        except (KeyError, AttributeError, TypeError):
+            # 有的日志缺少字段或混有其他类型，按通用方式读取
+            rows = None
+        if rows is not None:
+            # 只有一列时 getter 返回的不是元组
+            return rows if len(columns) > 1 else [(value,) for value in rows]
+    return [tuple(map(e.get, columns)) for e in entries]
+
+
+def _table(np, rows, width):
+    """行元组列表转换为 (行数, 列数) 的 object 二维数组"""
+    table = np.empty((len(rows), width), dtype=object)
+    try:
+        table[:] = rows
+    except ValueError:
+        # 字段值本身是列表等序列时 numpy 无法直接赋值，逐行填充
+        for i, row in enumerate(rows):
+            for j, value in enumerate(row):
+                table[i, j] = value
+    return table
+
+
+def _timestamp_column(np, values):
+    """时间列转换为 datetime64[s]，设备格式（YYYY-MM-DD HH:MM:SS）的字符串由 numpy 直接解析"""
+    sample = next((v for v in values if v is not None), None)
+    if isinstance(sample, str) and len(sample) == len("2000-01-01 00:00:00"):
+        try:
+            return values.astype("datetime64[s]")
+        except ValueError:
+            pass
+    return np.array([normalize_timestamp(v).replace(" ", "T") or "NaT" for v in values], dtype="datetime64[s]")
+
+
+def to_columns(entries, columns=("timestamp", "user", "ip", "target", "opt_type", "opt_res", "level")):
+    """将日志列表转换为 {列名: numpy数组}，timestamp 列转换为 datetime64[s]，其余列为 numpy 字符串数组（None为空串）"""
+    np = _numpy()
+    table = _table(np, _rows(entries, columns), len(columns))
+    data = {}
+    for j, column in enumerate(columns):
+        values = table[:, j]
+        if column == "timestamp":
+            data[column] = _timestamp_column(np, values)
+        else:
+            values[np.equal(values, None)] = ""
+            try:
+                data[column] = values.astype(str)
+            except ValueError:
+                # 字段值为列表等序列时逐个转换
+                data[column] = np.array([str(v) for v in values])
+    return data
+
+
+def count_by_hour_and_level(cols):
+    """按小时和等级统计事件数，返回 (小时数组, 等级数组, 计数矩阵[小时, 等级])"""
+    np = _numpy()
+    hours = cols["timestamp"].astype("datetime64[h]")
+    hour_keys, hour_idx = np.unique(hours, return_inverse=True)
+    level_keys, level_idx = np.unique(cols["level"].astype(str), return_inverse=True)
+    flat = np.bincount(hour_idx * len(level_keys) + level_idx, minlength=len(hour_keys) * len(level_keys))
+    return hour_keys, level_keys, flat.reshape(len(hour_keys), len(level_keys))
+
+
+def top_n(cols, column, n=10):
+    """按某列统计出现次数最多的前 n 项，返回 [(值, 次数)]"""
+    np = _numpy()
+    keys, counts = np.unique(cols[column].astype(str), return_counts=True)
+    order = np.argsort(-counts, kind="stable")[:n]
+    return [(keys[i], int(counts[i])) for i in order]
+
+
+def failure_rate(cols, group="target", result="opt_res", min_count=1):
+    """按 group 列统计失败率，返回 [(值, 总数, 失败数, 失败率)]，按失败率从高到低排序"""
+    np = _numpy()
+    keys, idx = np.unique(cols[group].astype(str), return_inverse=True)
+    results = np.char.lower(cols[result].astype(str))
+    failed = ~np.isin(results, list(SUCCESS_VALUES))
+    totals = np.bincount(idx, minlength=len(keys))
+    failures = np.bincount(idx, weights=failed, minlength=len(keys)).astype(int)
+    rates = np.divide(failures, totals, out=np.zeros(len(keys)), where=totals > 0)
+    order = np.lexsort((-totals, -rates))
+    return [(keys[i], int(totals[i]), int(failures[i]), float(rates[i]))
+            for i in order if totals[i] >= min_count]
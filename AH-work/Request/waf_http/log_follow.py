@@ -0,0 +1,90 @@
+"""
+模块名称: log_follow.py
+
+该模块的目标：
+    持续轮询日志接口，只输出比上次看到的更新的日志（类似 tail -f），
+    没有新日志时逐步拉长轮询间隔，有新日志时缩短间隔
+
+作者: ych
+修改历史:
+    1. 2026/10/18 - 创建文件
+    2. 2026/10/18 - 起始水位线取设备上最新一条日志的时间（不使用本机时钟）；轮询失败改为通过 on_error 回调通知
+    3. 2026/10/18 - 查询最新日志时间时先判断设备返回日志的顺序
+"""
+import time
+from .log_shards import detect_newest_first
+from .log_store import entry_key, normalize_timestamp
+from .paginator import iter_items
+
+
+def latest_timestamp(http_obj, url, per_page=20):
+    """设备上最新一条日志的时间，没有日志时返回None
+
+    按首页判断日志的返回顺序，按时间正序返回（或无法判断）且有多页时再取最后一条，返回见到的最大时间
+    """
+    page_data = http_obj._http_get(url, params={"page": 1, "per_page": per_page}) or {}
+    entries = page_data.get("result") or []
+    if not entries:
+        return None
+    timestamps = [normalize_timestamp(entry.get("timestamp")) for entry in entries]
+    count = page_data.get("count", len(entries))
+    if count > len(entries) and not detect_newest_first([entries]):
+        last_page = http_obj._http_get(url, params={"page": count, "per_page": 1}) or {}
+        timestamps.extend(normalize_timestamp(entry.get("timestamp")) for entry in last_page.get("result") or [])
+    return max(timestamps)
+
+
+def follow_logs(http_obj, url, since=None, min_interval=1.0, max_interval=30.0, factor=2.0, per_page=100,
+                on_error=None):
+    """持续yield新日志（按时间正序），调用方停止迭代即结束
+
+    :param since: 起始时间（YYYY-MM-DD HH:MM:SS），默认从设备上最新一条日志之后开始
+                  （以设备的时间为准，本机与设备时钟不一致时也不会漏掉日志）
+    :param min_interval: 最短轮询间隔（秒），有新日志时使用
+    :param max_interval: 最长轮询间隔（秒），长时间没有新日志时逐步退避到该值
+    :param factor: 每次空轮询后间隔放大的倍数
+    :param on_error: 轮询失败时的回调 on_error(异常, 重试间隔秒数)，之后继续轮询；为None时直接抛出异常
+    """
+    # 水位线时间上已输出过的日志，下次以 >= 水位线查询时需要跳过
+    seen_at_watermark = set()
+    watermark = since
+    if watermark is None:
+        watermark = latest_timestamp(http_obj, url)
+        if watermark is not None:
+            # 最新时间上已有的日志属于历史日志，不输出
+            seen_at_watermark = {entry_key(entry) for entry in
+                                 iter_items(http_obj, url, params={"timestamp__gte": watermark}, per_page=per_page)}
+    interval = min_interval
+
+    while True:
+        # 设备上还没有日志时不限制时间
+        params = {"timestamp__gte": watermark} if watermark else {}
+        try:
+            new_entries = []
+            for entry in iter_items(http_obj, url, params=params, per_page=per_page):
+                ts = normalize_timestamp(entry.get("timestamp"))
+                if watermark and (ts < watermark or (ts == watermark and entry_key(entry) in seen_at_watermark)):
+                    continue
+                new_entries.append((ts, entry))
+        except Exception as e:
+            if on_error is None:
+                raise
+            interval = max_interval
+            on_error(e, interval)
+            time.sleep(interval)
+            continue
+
+        if new_entries:
+            new_entries.sort(key=lambda item: item[0])
+            for _, entry in new_entries:
+                yield entry
+            latest = new_entries[-1][0]
+            keys = {entry_key(entry) for ts, entry in new_entries if ts == latest}
+            if latest == watermark:
+                seen_at_watermark |= keys
+            else:
+                watermark, seen_at_watermark = latest, keys
+            interval = min_interval
+        else:
+            interval = min(max_interval, interval * factor)
+        time.sleep(interval)
@@ -0,0 +1,83 @@
+"""
+模块名称: log_merge.py
+
+该模块的目标：
+    多台设备的日志合并为一条时间线：每台设备由一个后台线程逐页获取日志，
+    各设备内部已按时间排序，用堆做多路归并后流式输出，每条日志标记来源设备
+
+作者: ych
+修改历史:
+    1. 2026/10/18 - 创建文件
+"""
+import heapq
+import queue
+import threading
+from .log_shards import detect_newest_first
+from .log_store import normalize_timestamp
+
+# 设备日志获取结束的标记
+_DONE = object()
+
+
+def _pump(name, open_pages, buf, stop):
+    """后台线程：逐页获取一台设备的日志放入队列，队列满时等待消费"""
+    def put(item):
+        while not stop.is_set():
+            try:
+                buf.put(item, timeout=0.5)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    try:
+        for page_data in open_pages():
+            if not put(page_data.get("result", [])):
+                return
+    except Exception as e:
+        print(f"[{name}] 获取日志失败: {e}")
+    finally:
+        put(_DONE)
+
+
+def _next_batch(buf):
+    """取下一页日志，设备日志已取完时返回None"""
+    batch = buf.get()
+    return None if batch is _DONE else batch
+
+
+def _iter_entries(name, first, buf, device_field):
+    """将一台设备逐页的日志展开为逐条，并标记来源设备"""
+    batch = first
+    while batch is not None:
+        for entry in batch:
+            entry[device_field] = name
+            yield entry
+        batch = _next_batch(buf)
+
+
+def merge_device_logs(sources, max_buffered_pages=4, device_field="device"):
+    """并发获取多台设备的日志，按时间多路归并后逐条yield
+
+    各设备的首页到齐后根据日志顺序判断归并方向（与设备返回的顺序一致），
+    之后每台设备最多缓存 max_buffered_pages 页，内存占用与总日志量无关
+
+    :param sources: {设备名: 无参函数}，函数返回该设备逐页的响应数据迭代器（在后台线程中调用，可在其中登录）
+    :param max_buffered_pages: 每台设备最多预先获取的页数
+    :param device_field: 写入来源设备名的字段
+    """
+    stop = threading.Event()
+    buffers = {}
+    for name, open_pages in sources.items():
+        buffers[name] = queue.Queue(maxsize=max(1, max_buffered_pages))
+        threading.Thread(target=_pump, args=(name, open_pages, buffers[name], stop), daemon=True).start()
+
+    try:
+        firsts = {name: _next_batch(buf) for name, buf in buffers.items()}
+        newest_first = detect_newest_first(batch for batch in firsts.values() if batch)
+        streams = [_iter_entries(name, firsts[name], buf, device_field) for name, buf in buffers.items()]
+        yield from heapq.merge(*streams, key=lambda e: normalize_timestamp(e.get("timestamp")),
+                               reverse=newest_first)
+    finally:
+        # 调用方提前停止迭代时通知后台线程退出
+        stop.set()
@@ -0,0 +1,106 @@
+"""
+模块名称: log_shards.py
+
+该模块的目标：
+    将大时间范围的日志查询拆分为多个时间片并发获取，避免设备端深分页变慢；
+    时间片内日志过多时自动继续细分，最后按时间顺序拼接
+
+作者: ych
+修改历史:
+    1. 2026/10/18 - 创建文件
+    2. 2026/10/18 - 抽出 detect_newest_first 供多设备日志合并复用
+"""
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from datetime import datetime, timedelta
+from .log_store import TIME_FORMAT, entry_key, normalize_timestamp
+from .paginator import iter_pages
+
+# 时间片名称 -> 秒数
+SHARD_SECONDS = {"day": 86400, "hour": 3600}
+
+
+def split_time_range(start_time, end_time, seconds):
+    """将 [start_time, end_time] 按 seconds 拆分，相邻时间片共用边界（边界上的重复日志拼接时去重）"""
+    start = datetime.strptime(start_time, TIME_FORMAT)
+    end = datetime.strptime(end_time, TIME_FORMAT)
+    step = timedelta(seconds=max(1, seconds))
+    shards = []
+    while start < end:
+        shard_end = min(start + step, end)
+        shards.append((start.strftime(TIME_FORMAT), shard_end.strftime(TIME_FORMAT)))
+        start = shard_end
+    return shards or [(start_time, end_time)]
+
+
+def detect_newest_first(batches):
+    """根据若干批日志判断设备返回的顺序，新->旧 返回True，无法判断时返回False"""
+    for entries in batches:
+        if len(entries) >= 2:
+            first_ts = normalize_timestamp(entries[0].get("timestamp"))
+            last_ts = normalize_timestamp(entries[-1].get("timestamp"))
+            if first_ts != last_ts:
+                return first_ts > last_ts
+    return False
+
+
+def _shard_seconds(shard):
+    start, end = (datetime.strptime(t, TIME_FORMAT) for t in shard)
+    return (end - start).total_seconds()
+
+
+def fetch_sharded(http_obj, url, start_time, end_time, shard="day", max_per_shard=2000,
+                  min_shard_seconds=60, split_factor=4, per_page=100, workers=4):
+    """按时间片并发获取日志，返回按时间顺序拼接、去重后的列表
+
+    :param shard: 初始时间片大小，"day"/"hour" 或秒数
+    :param max_per_shard: 单个时间片的日志数超过该值时继续细分
+    :param min_shard_seconds: 时间片的最小长度（秒），达到后不再细分
+    :param split_factor: 每次细分为几份
+    :param workers: 同时获取的时间片数
+    """
+    seconds = SHARD_SECONDS.get(shard, shard)
+
+    def fetch_shard(s):
+        """获取一个时间片，日志过多时返回细分后的时间片"""
+        params = {"timestamp__gte": s[0], "timestamp__lte": s[1]}
+        pages = iter_pages(http_obj, url, params=params, per_page=per_page)
+        first = next(pages)
+        duration = _shard_seconds(s)
+        if first.get("count", 0) > max_per_shard and duration > min_shard_seconds:
+            pages.close()
+            sub_seconds = max(min_shard_seconds, int(duration // split_factor) or 1)
+            return "split", split_time_range(s[0], s[1], sub_seconds)
+        entries = list(first.get("result", []))
+        for page_data in pages:
+            entries.extend(page_data.get("result", []))
+        return "done", entries
+
+    results = {}
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        pending = {executor.submit(fetch_shard, s): s for s in split_time_range(start_time, end_time, seconds)}
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                s = pending.pop(future)
+                kind, value = future.result()
+                if kind == "split":
+                    for sub in value:
+                        pending[executor.submit(fetch_shard, sub)] = sub
+                else:
+                    results[s] = value
+
+    # 判断设备返回的顺序（新->旧 或 旧->新），时间片按相同方向拼接
+    newest_first = detect_newest_first(results.values())
+
+    # 相邻时间片共用边界，只需对落在边界时间上的日志去重
+    logs = []
+    seen = set()
+    for s in sorted(results, reverse=newest_first):
+        for entry in results[s]:
+            if normalize_timestamp(entry.get("timestamp")) in s:
+                key = entry_key(entry)
+                if key in seen:
+                    continue
+                seen.add(key)
+            logs.append(entry)
+    return logs
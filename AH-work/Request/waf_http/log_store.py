@@ -0,0 +1,159 @@
+"""
+模块名称: log_store.py
+
+该模块的目标：
+    将设备日志增量同步到本地 SQLite 数据库（每台设备、每种日志一个库文件），
+    记录已同步的时间范围，再次同步时只获取范围之外的新日志，查询直接读本地库
+
+作者: ych
+修改历史:
+    1. 2026/10/18 - 创建文件
+    2. 2026/10/18 - entry_key 支持紧凑记录对象
+    3. 2026/10/18 - 结束水位线改为已入库日志的最大时间，并带重叠窗口重新查询，避免设备时钟偏差或延迟写入时漏日志
+    4. 2026/10/18 - insert 支持紧凑记录对象
+"""
+import hashlib
+import json
+import os
+import sqlite3
+from datetime import datetime, timedelta
+from .paginator import iter_pages
+from .records import Record
+
+# 默认数据库目录
+DEFAULT_DB_DIR = os.path.join(os.path.expanduser("~"), ".waf_http", "logs")
+TIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+# 增量同步时从结束水位线往前重叠查询的秒数，覆盖设备延迟写入的日志（重复的按去重键忽略）
+DEFAULT_SYNC_OVERLAP = 300
+
+
+def normalize_timestamp(value):
+    """将日志时间统一为 YYYY-MM-DD HH:MM:SS 字符串，便于按字符串比较范围"""
+    if isinstance(value, (int, float)):
+        # 毫秒或秒级时间戳
+        seconds = value / 1000 if value > 1e11 else value
+        return datetime.fromtimestamp(seconds).strftime(TIME_FORMAT)
+    return str(value or "")[:19].replace("T", " ")
+
+
+def entry_key(entry):
+    """日志去重键，优先使用主键，没有主键时使用内容摘要"""
+    for field in ("_pk", "id"):
+        if entry.get(field) is not None:
+            return f"{field}:{entry[field]}"
+    if isinstance(entry, Record):
+        entry = entry.to_dict()
+    digest = hashlib.sha1(json.dumps(entry, sort_keys=True, ensure_ascii=False).encode()).hexdigest()
+    return f"sha1:{digest}"
+
+
+class LogStore:
+    """单台设备单种日志的本地存储"""
+
+    def __init__(self, device, log_type, db_dir=DEFAULT_DB_DIR):
+        """
+        :param device: 设备标识（一般为IP）
+        :param log_type: 日志类型，如 sys_events、events
+        """
+        os.makedirs(db_dir, exist_ok=True)
+        safe_device = str(device).replace(":", "_").replace("/", "_")
+        self.path = os.path.join(db_dir, f"{safe_device}_{log_type}.db")
+        self.conn = sqlite3.connect(self.path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS logs (
+                key TEXT PRIMARY KEY,
+                ts TEXT NOT NULL,
+                payload TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_logs_ts ON logs (ts);
+            CREATE TABLE IF NOT EXISTS meta (
+                name TEXT PRIMARY KEY,
+                value TEXT
+            );
+        """)
+        self.conn.commit()
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def _get_meta(self, name):
+        row = self.conn.execute("SELECT value FROM meta WHERE name = ?", (name,)).fetchone()
+        return row[0] if row else None
+
+    def _set_meta(self, name, value):
+        self.conn.execute("INSERT OR REPLACE INTO meta (name, value) VALUES (?, ?)", (name, value))
+
+    def coverage(self):
+        """已同步的时间范围 (起始, 结束水位线)，从未同步时为 (None, None)"""
+        return self._get_meta("synced_from"), self._get_meta("synced_to")
+
+    def insert(self, entries):
+        """批量写入日志（dict 或紧凑记录对象），已存在的忽略，返回新增条数"""
+        before = self.conn.total_changes
+        self.conn.executemany(
+            "INSERT OR IGNORE INTO logs (key, ts, payload) VALUES (?, ?, ?)",
+            [(entry_key(e), normalize_timestamp(e.get("timestamp")),
+              json.dumps(e.to_dict() if isinstance(e, Record) else e, ensure_ascii=False))
+             for e in entries]
+        )
+        return self.conn.total_changes - before
+
+    def newest_timestamp(self, before=None):
+        """本地库中最新一条日志的时间，before 不为None时只看该时间及之前的日志"""
+        if before is None:
+            row = self.conn.execute("SELECT MAX(ts) FROM logs").fetchone()
+        else:
+            row = self.conn.execute("SELECT MAX(ts) FROM logs WHERE ts <= ?", (before,)).fetchone()
+        return row[0]
+
+    def sync(self, http_obj, url, start_time, end_time, per_page=100, workers=4, overlap=DEFAULT_SYNC_OVERLAP):
+        """同步 [start_time, end_time] 内本地缺失的部分，返回新增条数
+
+        只请求已同步范围之外的时间段（结束水位线之后的新日志，以及早于起始点的历史）。
+        结束水位线是已入库日志的最大时间（不使用本机时钟），新日志从水位线往前 overlap 秒开始查询，
+        设备时钟比本机慢或日志延迟写入时也不会漏掉，重复获取的日志按去重键忽略。
+        """
+        if start_time > end_time:
+            return 0
+        synced_from, synced_to = self.coverage()
+
+        windows = []
+        if synced_from is None:
+            windows.append((start_time, end_time))
+        else:
+            if start_time < synced_from:
+                windows.append((start_time, synced_from))
+            if end_time >= synced_to:
+                tail_start = datetime.strptime(synced_to, TIME_FORMAT) - timedelta(seconds=overlap)
+                windows.append((max(synced_from, tail_start.strftime(TIME_FORMAT)), end_time))
+
+        inserted = 0
+        for window_start, window_end in windows:
+            params = {"timestamp__gte": window_start, "timestamp__lte": window_end}
+            for page_data in iter_pages(http_obj, url, params=params, per_page=per_page, workers=workers):
+                inserted += self.insert(page_data.get("result", []))
+            # 每个时间段完成后再更新范围，中途失败时下次会重新获取该段；
+            # 结束水位线只推进到实际入库的最新日志，之后才出现的日志下次还会查询到
+            synced_from = min(synced_from or window_start, window_start)
+            newest = self.newest_timestamp(window_end)
+            synced_to = max(synced_to or window_start, newest or window_start)
+            self._set_meta("synced_from", synced_from)
+            self._set_meta("synced_to", synced_to)
+            self.conn.commit()
+        return inserted
+
+    def query(self, start_time, end_time):
+        """从本地库查询时间范围内的日志，按时间倒序返回"""
+        rows = self.conn.execute(
+            "SELECT payload FROM logs WHERE ts >= ? AND ts <= ? ORDER BY ts DESC, rowid",
+            (start_time, end_time)
+        )
+        return [json.loads(payload) for (payload,) in rows]
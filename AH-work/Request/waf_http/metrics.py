@@ -0,0 +1,152 @@
+"""
+模块名称: metrics.py
+
+该模块的目标：
+    统计 HttpObj 各个接口的请求次数、错误次数、收发字节数和延迟分布，
+    按 设备 + 请求方法 + url模板（主键段归一化为 {pk}）聚合，
+    可在程序退出时或手动导出为 json 或 Prometheus 文本格式
+
+作者: ych
+修改历史:
+    1. 2026/10/18 - 创建文件
+    2. 2026/10/18 - 增加 is_pk_segment，与响应缓存共用主键判断规则
+"""
+import atexit
+import json
+import re
+import threading
+
+# 延迟直方图的桶上限（秒）
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+# 视为主键的url路径段：纯数字、uuid、24位以上的十六进制串
+_PK_SEGMENT = re.compile(r"^(\d+|[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}|[0-9a-fA-F]{24,})$")
+
+
+def is_pk_segment(segment):
+    """url路径段是否为主键（统计时归并接口、写操作后清除缓存共用同一规则）"""
+    return _PK_SEGMENT.match(segment) is not None
+
+
+def normalize_url(url):
+    """去掉查询参数，并将主键段替换为 {pk}，如 api/v2/network/ips/12/ -> api/v2/network/ips/{pk}/"""
+    path = url.split("?", 1)[0]
+    return "/".join("{pk}" if is_pk_segment(seg) else seg for seg in path.split("/"))
+
+
+class _EndpointStats:
+    """单个接口的统计数据"""
+
+    __slots__ = ("count", "errors", "bytes_in", "bytes_out", "latency_sum", "buckets")
+
+    def __init__(self):
+        self.count = 0
+        self.errors = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.latency_sum = 0.0
+        # 最后一个桶存放超过最大上限的请求
+        self.buckets = [0] * (len(LATENCY_BUCKETS) + 1)
+
+    def percentile(self, q):
+        """根据直方图估算分位数（桶内线性插值）"""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        lower = 0.0
+        for i, n in enumerate(self.buckets):
+            upper = LATENCY_BUCKETS[i] if i < len(LATENCY_BUCKETS) else LATENCY_BUCKETS[-1]
+            if n and seen + n >= rank:
+                return lower + (upper - lower) * (rank - seen) / n
+            seen += n
+            lower = upper
+        return LATENCY_BUCKETS[-1]
+
+
+class RequestMetrics:
+    """请求指标收集类，可被多个HttpObj和多个线程共用"""
+
+    def __init__(self, dump_path=None):
+        """
+        :param dump_path: 程序退出时自动导出的文件路径，以 .prom 结尾时导出Prometheus格式，否则导出json
+        """
+        self._stats = {}
+        self._lock = threading.Lock()
+        self.dump_path = dump_path
+        if dump_path:
+            atexit.register(self.dump, dump_path)
+
+    def record(self, device, method, url, elapsed, status=None, bytes_out=0, bytes_in=0):
+        """记录一次请求，status为None表示连接失败或超时"""
+        key = (device, method, normalize_url(url))
+        with self._lock:
+            stats = self._stats.get(key)
+            if stats is None:
+                stats = self._stats[key] = _EndpointStats()
+            stats.count += 1
+            if status is None or status >= 400:
+                stats.errors += 1
+            stats.bytes_in += bytes_in
+            stats.bytes_out += bytes_out
+            stats.latency_sum += elapsed
+            for i, upper in enumerate(LATENCY_BUCKETS):
+                if elapsed <= upper:
+                    stats.buckets[i] += 1
+                    break
+            else:
+                stats.buckets[-1] += 1
+
+    def snapshot(self):
+        """返回当前统计数据的列表"""
+        with self._lock:
+            items = sorted(self._stats.items())
+            return [{
+                "device": device,
+                "method": method,
+                "url": url,
+                "count": s.count,
+                "errors": s.errors,
+                "bytes_in": s.bytes_in,
+                "bytes_out": s.bytes_out,
+                "latency_avg": round(s.latency_sum / s.count, 6) if s.count else 0.0,
+                "latency_p50": round(s.percentile(0.50), 6),
+                "latency_p95": round(s.percentile(0.95), 6),
+                "latency_p99": round(s.percentile(0.99), 6),
+            } for (device, method, url), s in items]
+
+    def to_prometheus(self):
+        """导出为Prometheus文本格式"""
+        lines = [
+            "# TYPE waf_http_requests_total counter",
+            "# TYPE waf_http_errors_total counter",
+            "# TYPE waf_http_bytes_in_total counter",
+            "# TYPE waf_http_bytes_out_total counter",
+            "# TYPE waf_http_request_seconds histogram",
+        ]
+        with self._lock:
+            for (device, method, url), s in sorted(self._stats.items()):
+                labels = f'device="{device}",method="{method}",url="{url}"'
+                lines.append(f"waf_http_requests_total{{{labels}}} {s.count}")
+                lines.append(f"waf_http_errors_total{{{labels}}} {s.errors}")
+                lines.append(f"waf_http_bytes_in_total{{{labels}}} {s.bytes_in}")
+                lines.append(f"waf_http_bytes_out_total{{{labels}}} {s.bytes_out}")
+                cumulative = 0
+                for i, upper in enumerate(LATENCY_BUCKETS):
+                    cumulative += s.buckets[i]
+                    lines.append(f'waf_http_request_seconds_bucket{{{labels},le="{upper}"}} {cumulative}')
+                lines.append(f'waf_http_request_seconds_bucket{{{labels},le="+Inf"}} {s.count}')
+                lines.append(f"waf_http_request_seconds_sum{{{labels}}} {s.latency_sum:.6f}")
+                lines.append(f"waf_http_request_seconds_count{{{labels}}} {s.count}")
+        return "\n".join(lines) + "\n"
+
+    def dump(self, path=None):
+        """导出统计数据到文件"""
+        path = path or self.dump_path
+        if path.endswith(".prom"):
+            content = self.to_prometheus()
+        else:
+            content = json.dumps(self.snapshot(), ensure_ascii=False, indent=2)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(content)
+        return path
@@ -0,0 +1,152 @@
+"""
+模块名称: paginator.py
+
+该模块的目标：
+    通用的列表接口分页工具，响应格式为 {"count", "page", "per_page", "result"}，
+    iter_pages/iter_items 按需逐页获取（可预取下一页），fetch_all 获取全部页并合并
+
+作者: ych
+修改历史:
+    1. 2026/10/18 - 创建文件
+    2. 2026/10/18 - 支持多页并发获取
+    3. 2026/10/18 - asyncio 改为异步获取时再导入
+    4. 2026/10/18 - 增加异步逐页获取 aiter_pages，iter_pages 传入异步客户端时报错
+    5. 2026/10/18 - 空页跳过后继续分页，不再提前结束；fetch_all 的 page/per_page 改为合并后的值
+"""
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+# 列表接口默认每页数量
+DEFAULT_PER_PAGE = 100
+
+
+def total_pages(page_data, per_page=DEFAULT_PER_PAGE):
+    """根据首页数据计算总页数，非分页响应返回1"""
+    if not isinstance(page_data, dict) or "count" not in page_data:
+        return 1
+    # 以设备实际返回的每页数量为准（设备可能限制了上限）
+    per_page = page_data.get("per_page") or per_page
+    return max(1, (page_data.get("count", 0) + per_page - 1) // per_page)
+
+
+def _has_result(page_data):
+    """该页是否有数据，空页跳过（不作为结束条件）"""
+    return isinstance(page_data, dict) and bool(page_data.get("result"))
+
+
+def _merged(first, results):
+    """合并后的响应：page/per_page 为合并后的值（全部条目作为一页），count 保留设备返回的总数"""
+    return dict(first, page=1, per_page=len(results), result=results)
+
+
+def iter_pages(http_obj, url, params=None, per_page=DEFAULT_PER_PAGE, prefetch=False, workers=1):
+    """逐页获取列表接口，按页码顺序yield每页的响应数据
+
+    :param params: 额外的查询参数（如时间范围），page/per_page 由本函数填写
+    :param prefetch: 是否在处理当前页时后台预取下一页
+    :param workers: 首页确定总页数后，同时获取的页数；大于1时其余页并发获取，仍按页码顺序返回
+
+    页数由首页的 count 决定，中间某页为空（或没有 result）时跳过该页继续获取后续页
+    """
+    if getattr(http_obj, "is_async", False):
+        raise TypeError("iter_pages 不支持 AsyncHttpObj，请使用 aiter_pages 或 fetch_all")
+    base_params = dict(params or {})
+    base_params["per_page"] = per_page
+
+    def fetch(page):
+        return http_obj._http_get(url, params={**base_params, "page": page})
+
+    first = fetch(1)
+    yield first
+    pages = total_pages(first, per_page)
+    if pages <= 1:
+        return
+
+    # 同时在途的页数，0 表示在当前线程中逐页获取
+    window = workers if workers > 1 else (1 if prefetch else 0)
+    if not window:
+        for page in range(2, pages + 1):
+            data = fetch(page)
+            if _has_result(data):
+                yield data
+        return
+
+    executor = ThreadPoolExecutor(max_workers=window)
+    try:
+        futures = deque()
+        next_page = 2
+        while next_page <= pages and len(futures) < window:
+            futures.append(executor.submit(fetch, next_page))
+            next_page += 1
+        while futures:
+            data = futures.popleft().result()
+            if next_page <= pages:
+                futures.append(executor.submit(fetch, next_page))
+                next_page += 1
+            if _has_result(data):
+                yield data
+    finally:
+        # 提前结束遍历时取消尚未开始的请求
+        executor.shutdown(wait=True, cancel_futures=True)
+
+
+def iter_items(http_obj, url, params=None, per_page=DEFAULT_PER_PAGE, prefetch=False, workers=1):
+    """逐条yield列表接口的所有条目，内存中只保留正在处理和预取的几页数据"""
+    for page_data in iter_pages(http_obj, url, params, per_page, prefetch, workers):
+        if isinstance(page_data, dict):
+            yield from page_data.get("result", [])
+        else:
+            yield from page_data or []
+
+
+def fetch_all(http_obj, url, params=None, per_page=DEFAULT_PER_PAGE):
+    """获取所有页并合并，返回与单页相同结构的数据（result 为全部条目，per_page 为合并后的条数）
+
+    http_obj 为 AsyncHttpObj 时返回协程
+    """
+    if getattr(http_obj, "is_async", False):
+        return _fetch_all_async(http_obj, url, params, per_page)
+
+    pages = iter_pages(http_obj, url, params, per_page)
+    merged = next(pages)
+    if not isinstance(merged, dict) or "result" not in merged:
+        return merged
+    results = list(merged.get("result", []))
+    for page_data in pages:
+        results.extend(page_data.get("result", []))
+    return _merged(merged, results)
+
+
+async def aiter_pages(http_obj, url, params=None, per_page=DEFAULT_PER_PAGE, workers=4):
+    """iter_pages 的异步版本（async for），首页之后每次并发获取 workers 页，按页码顺序返回"""
+    import asyncio
+    base_params = dict(params or {})
+    base_params["per_page"] = per_page
+
+    first = await http_obj._http_get(url, params={**base_params, "page": 1})
+    yield first
+    pages = total_pages(first, per_page)
+    window = max(1, workers)
+    for start in range(2, pages + 1, window):
+        batch = await asyncio.gather(*[http_obj._http_get(url, params={**base_params, "page": page})
+                                       for page in range(start, min(start + window, pages + 1))])
+        for page_data in batch:
+            if _has_result(page_data):
+                yield page_data
+
+
+async def _fetch_all_async(http_obj, url, params, per_page):
+    """fetch_all 的异步版本，首页之后的各页并发获取"""
+    import asyncio
+    base_params = dict(params or {})
+    base_params["per_page"] = per_page
+    merged = await http_obj._http_get(url, params={**base_params, "page": 1})
+    if not isinstance(merged, dict) or "result" not in merged:
+        return merged
+    results = list(merged.get("result", []))
+    rest = await asyncio.gather(*[http_obj._http_get(url, params={**base_params, "page": page})
+                                  for page in range(2, total_pages(merged, per_page) + 1)])
+    for page_data in rest:
+        if _has_result(page_data):
+            results.extend(page_data["result"])
+    return _merged(merged, results)
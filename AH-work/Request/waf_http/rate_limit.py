@@ -0,0 +1,199 @@
+"""
+模块名称: rate_limit.py
+
+该模块的目标：
+    按设备限制请求速率和并发数，避免并行的批量工具把设备管理面打满（尤其是登录接口）；
+    请求按接口分为 auth（公钥/登录/OTP）、read（GET）、write（POST/PUT/DELETE）三类，
+    每类有独立的令牌桶和并发上限，另有整台设备的并发上限（HTTP 和 SSH 共用），
+    并统计调用方被限流等待的次数和时间
+
+作者: ych
+修改历史:
+    1. 2026/10/18 - 创建文件
+"""
+import threading
+import time
+from contextlib import contextmanager
+
+# 接口分类: rate 为每秒允许的请求数（None不限速），burst 为令牌桶容量，max_in_flight 为同时进行中的请求上限
+DEFAULT_LIMITS = {
+    "auth": {"rate": 1, "burst": 2, "max_in_flight": 1},
+    "read": {"rate": 20, "burst": 20, "max_in_flight": 6},
+    "write": {"rate": 5, "burst": 5, "max_in_flight": 2},
+}
+# 整台设备同时进行中的请求上限
+DEFAULT_MAX_IN_FLIGHT = 8
+# 认证相关接口的url前缀
+AUTH_URL_PREFIXES = ("api/v2/system/auth/", "api/v2/system/user/login/", "api/v2/system/user/otp_auth/")
+ENDPOINT_CLASSES = tuple(DEFAULT_LIMITS)
+
+
+def classify(method, url):
+    """返回请求所属的接口分类: auth / read / write"""
+    if url.startswith(AUTH_URL_PREFIXES):
+        return "auth"
+    if method in ("GET", "HEAD", "OPTIONS"):
+        return "read"
+    return "write"
+
+
+class _TokenBucket:
+    """令牌桶，令牌不足时预占后续令牌，等待的调用方按到达顺序依次放行"""
+
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.burst = max(1, burst or 1)
+        self.tokens = float(self.burst)
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self):
+        """取一个令牌，返回需要等待的秒数"""
+        if not self.rate:
+            return 0.0
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= 1
+            return -self.tokens / self.rate if self.tokens < 0 else 0.0
+
+
+class _ThrottleStats:
+    """单个 设备+接口分类 的限流统计"""
+
+    __slots__ = ("count", "throttled", "wait_sum", "wait_max", "in_flight")
+
+    def __init__(self):
+        self.count = 0
+        self.throttled = 0
+        self.wait_sum = 0.0
+        self.wait_max = 0.0
+        self.in_flight = 0
+
+
+class _DeviceLimiter:
+    """单台设备的令牌桶和并发信号量"""
+
+    def __init__(self, limits, max_in_flight):
+        self.buckets = {}
+        self.slots = {}
+        for endpoint_class, limit in limits.items():
+            self.buckets[endpoint_class] = _TokenBucket(limit.get("rate"), limit.get("burst"))
+            self.slots[endpoint_class] = threading.BoundedSemaphore(limit.get("max_in_flight") or 1 << 16)
+        self.device_slot = threading.BoundedSemaphore(max_in_flight or 1 << 16)
+
+
+class RequestGovernor:
+    """按设备的限速和并发控制，可被多个 HttpObj / SSHServer 和多个线程共用
+
+    用法（HttpObj 传入 governor 参数后自动使用）:
+        governor = RequestGovernor({"auth": {"rate": 0.5}}, max_in_flight=4)
+        with governor.slot("10.20.192.106", "read"):
+            ...发送请求...
+        print(governor.snapshot())
+    """
+
+    def __init__(self, limits=None, max_in_flight=DEFAULT_MAX_IN_FLIGHT, device_limits=None):
+        """
+        :param limits: {接口分类: {"rate", "burst", "max_in_flight"}}，与默认配置合并，只需写要修改的项
+        :param max_in_flight: 每台设备同时进行中的请求上限（各分类合计），None不限制
+        :param device_limits: {设备IP: {"max_in_flight": n, 接口分类: {...}}}，单独调整某些设备的限制
+        """
+        self.limits = self._merge(DEFAULT_LIMITS, limits)
+        self.max_in_flight = max_in_flight
+        self.device_limits = dict(device_limits or {})
+        self._limiters = {}
+        self._stats = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _merge(base, override):
+        merged = {name: dict(limit) for name, limit in base.items()}
+        for name, limit in (override or {}).items():
+            if name not in merged:
+                raise ValueError(f"未知的接口分类: {name}，可选: {', '.join(ENDPOINT_CLASSES)}")
+            merged[name].update(limit)
+        return merged
+
+    @classmethod
+    def from_config(cls, config):
+        """从配置dict创建，如 {"max_in_flight": 4, "auth": {"rate": 0.5}, "devices": {"10.0.0.1": {...}}}"""
+        config = dict(config or {})
+        max_in_flight = config.pop("max_in_flight", DEFAULT_MAX_IN_FLIGHT)
+        device_limits = config.pop("devices", None)
+        return cls(config, max_in_flight, device_limits)
+
+    def _limiter(self, device):
+        limiter = self._limiters.get(device)
+        if limiter is None:
+            with self._lock:
+                limiter = self._limiters.get(device)
+                if limiter is None:
+                    override = dict(self.device_limits.get(device) or {})
+                    max_in_flight = override.pop("max_in_flight", self.max_in_flight)
+                    limiter = self._limiters[device] = _DeviceLimiter(self._merge(self.limits, override),
+                                                                      max_in_flight)
+        return limiter
+
+    @contextmanager
+    def slot(self, device, endpoint_class):
+        """等待令牌和并发名额，退出时释放名额"""
+        limiter = self._limiter(device)
+        start = time.monotonic()
+        delay = limiter.buckets[endpoint_class].reserve()
+        if delay > 0:
+            time.sleep(delay)
+        # 先占分类名额再占设备名额，与释放顺序相反
+        limiter.slots[endpoint_class].acquire()
+        try:
+            limiter.device_slot.acquire()
+        except BaseException:
+            limiter.slots[endpoint_class].release()
+            raise
+        self._record(device, endpoint_class, time.monotonic() - start, 1)
+        try:
+            yield
+        finally:
+            limiter.device_slot.release()
+            limiter.slots[endpoint_class].release()
+            self._record(device, endpoint_class, None, -1)
+
+    def request_slot(self, device, method, url):
+        """按请求方法和url分类后等待名额"""
+        return self.slot(device, classify(method, url))
+
+    def _record(self, device, endpoint_class, waited, in_flight):
+        key = (device, endpoint_class)
+        with self._lock:
+            stats = self._stats.get(key)
+            if stats is None:
+                stats = self._stats[key] = _ThrottleStats()
+            stats.in_flight += in_flight
+            if waited is None:
+                return
+            stats.count += 1
+            # 小于1ms的等待视为未被限流（锁竞争等开销）
+            if waited >= 0.001:
+                stats.throttled += 1
+                stats.wait_sum += waited
+                stats.wait_max = max(stats.wait_max, waited)
+
+    def throttle_time(self, device=None):
+        """被限流等待的总秒数，device为None时统计所有设备"""
+        with self._lock:
+            return sum(s.wait_sum for (d, _), s in self._stats.items() if device is None or d == device)
+
+    def snapshot(self):
+        """返回各 设备+接口分类 的限流统计列表"""
+        with self._lock:
+            return [{
+                "device": device,
+                "class": endpoint_class,
+                "count": s.count,
+                "throttled": s.throttled,
+                "wait_total": round(s.wait_sum, 4),
+                "wait_avg": round(s.wait_sum / s.count, 4) if s.count else 0.0,
+                "wait_max": round(s.wait_max, 4),
+                "in_flight": s.in_flight,
+            } for (device, endpoint_class), s in sorted(self._stats.items())]
@@ -0,0 +1,175 @@
+"""
+模块名称: records.py
+
+该模块的目标：
+    WAF 接口返回对象的紧凑记录类型：用 __slots__ 代替每个对象一个dict，
+    重复度高的字符串字段（用户、等级、网卡名等）做驻留共用一份，
+    大批量日志和整个设备清单的接口信息内存占用约为原来的一半；
+    记录对象保留 .get / [] 访问方式，原有按dict写的打印函数可直接使用
+
+作者: ych
+修改历史:
+    1. 2026/10/18 - 创建文件
+    2. 2026/10/18 - 未声明的字段保存在 extra 中不再丢弃；补充IP和接口缺少的字段
+"""
+import sys
+
+
+def _intern(value):
+    return sys.intern(value) if type(value) is str else value
+
+
+class Record:
+    """记录基类，子类通过 __slots__ 声明接口字段，未声明的字段原样保存在 extra dict中
+
+    INTERN: 需要驻留的字符串字段
+    NESTED: 字段 -> 记录类，值为dict时转换为该记录，值为列表时逐项转换
+    """
+    __slots__ = ("extra",)
+    INTERN = ()
+    NESTED = {}
+    _fields = frozenset()
+    _plain = ()
+    _converted = ()
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        # 预先取出每个字段的 slot 描述符和转换函数，from_api 时不再做查找
+        plain, converted = [], []
+        for name in cls.__slots__:
+            setter = cls.__dict__[name].__set__
+            if name in cls.NESTED:
+                converted.append((name, setter, cls.NESTED[name].convert))
+            elif name in cls.INTERN:
+                converted.append((name, setter, _intern))
+            else:
+                plain.append((name, setter))
+        cls._fields = frozenset(cls.__slots__)
+        cls._plain = tuple(plain)
+        cls._converted = tuple(converted)
+
+    @classmethod
+    def from_api(cls, data):
+        """从接口返回的dict创建记录"""
+        self = object.__new__(cls)
+        get = data.get
+        for name, setter in cls._plain:
+            setter(self, get(name))
+        for name, setter, convert in cls._converted:
+            value = get(name)
+            setter(self, None if value is None else convert(value))
+        # 接口返回了未声明的字段时才创建 extra，字段齐全的记录不额外占用内存
+        fields = cls._fields
+        self.extra = None if data.keys() <= fields else {k: v for k, v in data.items() if k not in fields}
+        return self
+
+    @classmethod
+    def convert(cls, value):
+        """嵌套字段转换：dict 转为记录，列表逐项转换，其他值原样返回"""
+        if isinstance(value, dict):
+            return cls.from_api(value)
+        if isinstance(value, list):
+            return [cls.from_api(v) if isinstance(v, dict) else v for v in value]
+        return value
+
+    def get(self, key, default=None):
+        """兼容dict的读取方式，字段不存在或值为None时返回default"""
+        if key in self._fields:
+            value = getattr(self, key)
+        else:
+            value = self.extra.get(key) if self.extra else None
+        return default if value is None else value
+
+    def __getitem__(self, key):
+        if key in self._fields:
+            return getattr(self, key)
+        if self.extra and key in self.extra:
+            return self.extra[key]
+        raise KeyError(key)
+
+    def __contains__(self, key):
+        if key in self._fields:
+            return getattr(self, key) is not None
+        return bool(self.extra) and key in self.extra
+
+    def to_dict(self):
+        """转换回dict（忽略值为None的字段），用于json序列化"""
+        result = {}
+        for name in self.__slots__:
+            value = getattr(self, name)
+            if isinstance(value, Record):
+                value = value.to_dict()
+            elif isinstance(value, list):
+                value = [v.to_dict() if isinstance(v, Record) else v for v in value]
+            if value is not None:
+                result[name] = value
+        if self.extra:
+            result.update(self.extra)
+        return result
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.to_dict()!r})"
+
+
+class LogDetail(Record):
+    """日志详情"""
+    __slots__ = ("msg", "extend")
+
+
+class LogRecord(Record):
+    """系统日志/操作日志"""
+    __slots__ = ("_pk", "id", "timestamp", "user", "ip", "target", "opt_type", "opt_res", "level",
+                 "device_id", "device_name", "detail")
+    INTERN = ("user", "ip", "target", "opt_type", "opt_res", "level", "device_id", "device_name")
+    NESTED = {"detail": LogDetail}
+
+
+class ServiceFilter(Record):
+    """IP地址的服务过滤器"""
+    __slots__ = ("admin", "traffic", "ha", "embedded")
+
+
+class IPRecord(Record):
+    """IP地址配置（包括接口下的ips）"""
+    __slots__ = ("_pk", "ip", "mask", "gateway", "mac", "net_dev", "namespace_id", "_is_default", "vrrp",
+                 "session_sync", "source_ip_enable", "client_ip", "server_ip", "service_filter", "_create_timestamp")
+    INTERN = ("mask", "gateway", "net_dev", "vrrp")
+    NESTED = {"service_filter": ServiceFilter}
+
+
+class InterfaceRecord(Record):
+    """网络接口"""
+    __slots__ = ("_pk", "name", "type", "status", "mac", "namespace_id", "alive", "admin", "ha",
+                 "session_sync", "enable", "support_disable", "ips", "ip_pool", "parent_interface", "net_dev",
+                 "bypass_pair", "poweroff_bypass")
+    INTERN = ("name", "type", "status", "bypass_pair")
+    NESTED = {"ips": IPRecord}
+
+
+class BondRecord(Record):
+    """链路聚合"""
+    __slots__ = ("_pk", "name", "desc", "net_dev", "mtu", "namespace_id", "_user_id", "_is_delete",
+                 "_create_timestamp", "_update_timestamp", "patch")
+    INTERN = ("name",)
+
+
+class BridgeRecord(Record):
+    """网桥"""
+    __slots__ = ("_pk", "name", "desc", "net_dev", "mtu", "stp", "namespace_id", "_create_timestamp")
+    INTERN = ("name",)
+
+
+def to_records(page_data, record_cls):
+    """将分页响应中的 result 转换为记录列表，其余字段不变
+
+    :param page_data: 分页响应dict、日志列表，或异步客户端返回的协程
+    """
+    if hasattr(page_data, "__await__"):
+        async def convert():
+            return to_records(await page_data, record_cls)
+        return convert()
+    if isinstance(page_data, list):
+        return [record_cls.from_api(entry) for entry in page_data]
+    if isinstance(page_data, dict) and isinstance(page_data.get("result"), list):
+        return {**page_data, "result": [record_cls.from_api(entry) for entry in page_data["result"]]}
+    return page_data
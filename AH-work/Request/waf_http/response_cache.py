@@ -0,0 +1,127 @@
+"""
+模块名称: response_cache.py
+
+该模块的目标：
+    HttpObj 的 GET 响应缓存，按url前缀配置过期时间，超出容量时按LRU淘汰；
+    发生 POST/PUT/DELETE 时自动清除被修改资源（url截到主键为止）及其列表接口的缓存
+
+作者: ych
+修改历史:
+    1. 2026/10/18 - 创建文件
+    2. 2026/10/18 - 写操作只清除被修改资源的缓存；增加按设备的写操作计数，写之前发出的GET结果不再写入缓存
+    3. 2026/10/18 - 主键段的判断改用 metrics.is_pk_segment，支持uuid和十六进制主键
+"""
+import copy
+import threading
+import time
+from collections import OrderedDict
+from .metrics import is_pk_segment
+
+# 默认只缓存网络配置类的只读接口
+DEFAULT_TTLS = {
+    "api/v2/network/": 30,
+}
+# 汇总类接口: {写操作url前缀: (同时清除的url前缀, ...)}，如修改IP/网桥后接口汇总信息也会变化
+DEFAULT_RELATED = {
+    "api/v2/network/": ("api/v2/network/effects/",),
+}
+
+
+def resource_paths(url):
+    """返回写操作影响的 (资源url, 列表url)
+
+    资源url 截到主键为止（如 api/v2/network/bonds/12/，主键也可以是uuid等，规则同接口统计），
+    列表url 为其上一级；url 中没有主键时（如创建时的列表接口）两者相同
+    """
+    parts = url.split("?", 1)[0].strip("/").split("/")
+    for i, part in enumerate(parts):
+        if is_pk_segment(part):
+            return "/".join(parts[:i + 1]) + "/", "/".join(parts[:i]) + "/"
+    path = "/".join(parts) + "/"
+    return path, path
+
+
+class ResponseCache:
+    """带TTL的LRU响应缓存，可被多个HttpObj共用（键中包含设备地址）"""
+
+    def __init__(self, ttls=None, max_entries=256, related=None):
+        """
+        :param ttls: {url前缀: 过期秒数}，按最长前缀匹配，未匹配的url不缓存
+        :param max_entries: 最大缓存条目数
+        :param related: {写操作url前缀: (同时清除的url前缀, ...)}，用于依赖其他资源的汇总接口
+        """
+        self.ttls = dict(DEFAULT_TTLS if ttls is None else ttls)
+        self.related = dict(DEFAULT_RELATED if related is None else related)
+        # 最长前缀优先
+        self._prefixes = sorted(self.ttls, key=len, reverse=True)
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        # 每台设备的写操作计数，GET 发出后计数变化说明结果可能是写之前的数据
+        self._generations = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _match(self, url):
+        """返回url匹配的前缀，未匹配返回None"""
+        for prefix in self._prefixes:
+            if url.startswith(prefix):
+                return prefix
+        return None
+
+    @staticmethod
+    def _key(device, url, params):
+        return device, url, tuple(sorted((params or {}).items()))
+
+    def get(self, device, url, params=None):
+        """查询缓存，返回 (是否命中, 数据)"""
+        key = self._key(device, url, params)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] <= time.monotonic():
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return False, None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            data = entry[1]
+        # 返回副本，避免调用方修改缓存内容
+        return True, copy.deepcopy(data)
+
+    def generation(self, device):
+        """设备当前的写操作计数，在发送GET之前获取，写入缓存时传给 set"""
+        with self._lock:
+            return self._generations.get(device, 0)
+
+    def set(self, device, url, params, data, generation=None):
+        """写入缓存，url未配置TTL时忽略
+
+        :param generation: 发送GET之前的 generation()，之后该设备发生过写操作时不写入（数据可能已过期）
+        """
+        prefix = self._match(url)
+        if prefix is None or self.ttls[prefix] <= 0:
+            return
+        key = self._key(device, url, params)
+        with self._lock:
+            if generation is not None and generation != self._generations.get(device, 0):
+                return
+            self._entries[key] = (time.monotonic() + self.ttls[prefix], copy.deepcopy(data))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, device, url):
+        """写操作前后调用：清除该设备上被修改资源及其列表接口（和相关汇总接口）的缓存"""
+        resource, listing = resource_paths(url)
+        related = tuple(path for prefix, paths in self.related.items() if url.startswith(prefix) for path in paths)
+        with self._lock:
+            self._generations[device] = self._generations.get(device, 0) + 1
+            for key in [k for k in self._entries if k[0] == device and
+                        (k[1] == listing or k[1].startswith(resource) or k[1].startswith(related))]:
+                del self._entries[key]
+
+    def clear(self):
+        """清空缓存"""
+        with self._lock:
+            self._entries.clear()
@@ -0,0 +1,90 @@
+"""
+模块名称: rpc.py
+
+该模块的目标：
+    waf_daemon 的本地 RPC 协议：通过 Unix socket 收发 json 行，
+    每个请求一行 {"id", "command", "device", "args"}，每个响应一行 {"id", "ok", "result"/"error", "elapsed"}；
+    RpcClient 供命令行客户端和自动化脚本使用，只依赖标准库，启动快
+
+作者: ych
+修改历史:
+    1. 2026/10/18 - 创建文件
+"""
+import itertools
+import json
+import os
+import socket
+
+DEFAULT_SOCKET_PATH = os.path.join(os.path.expanduser("~"), ".waf_http", "waf_daemon.sock")
+
+
+class RpcError(Exception):
+    """守护进程返回的错误"""
+
+
+def encode_message(message):
+    """编码为一行json（结果中的记录对象转换为dict，其他无法序列化的值转换为字符串）"""
+    return (json.dumps(message, ensure_ascii=False, default=_json_default) + "\n").encode("utf-8")
+
+
+def _json_default(value):
+    if hasattr(value, "to_dict"):
+        return value.to_dict()
+    return str(value)
+
+
+class RpcClient:
+    """守护进程客户端，一个连接上可以连续发送多个请求"""
+
+    def __init__(self, socket_path=DEFAULT_SOCKET_PATH, timeout=None):
+        self.socket_path = socket_path
+        self.timeout = timeout
+        self._sock = None
+        self._file = None
+        self._ids = itertools.count(1)
+
+    def connect(self):
+        if self._sock is None:
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            sock.settimeout(self.timeout)
+            try:
+                sock.connect(self.socket_path)
+            except (FileNotFoundError, ConnectionRefusedError):
+                sock.close()
+                raise RpcError(f"无法连接守护进程: {self.socket_path}（请先启动 waf_daemon.py）")
+            self._sock = sock
+            self._file = sock.makefile("rb")
+        return self
+
+    def close(self):
+        if self._sock is not None:
+            self._file.close()
+            self._sock.close()
+            self._sock = self._file = None
+
+    def __enter__(self):
+        return self.connect()
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def request(self, command, device=None, args=None):
+        """发送请求，返回完整的响应dict
+
+        :param args: 命令参数dict，如 {"level": "forward_dev"}
+        """
+        self.connect()
+        message = {"id": next(self._ids), "command": command, "device": device, "args": args or {}}
+        self._sock.sendall(encode_message(message))
+        line = self._file.readline()
+        if not line:
+            self.close()
+            raise RpcError("守护进程已断开连接")
+        return json.loads(line)
+
+    def call(self, command, device=None, args=None):
+        """发送请求，成功时返回结果，失败时抛出 RpcError"""
+        response = self.request(command, device, args)
+        if not response.get("ok"):
+            raise RpcError(response.get("error", "未知错误"))
+        return response.get("result")
@@ -0,0 +1,130 @@
+"""
+模块名称: singleflight.py
+
+该模块的目标：
+    合并同时进行中的相同GET请求：多个线程（或协程）同时向同一设备请求同一资源时，
+    只有第一个真正发送请求，其余的等待其完成后共用解析后的结果（或异常），
+    如刷新面板时并发查询接口聚合信息、并行登录时重复获取公钥；
+    与 ResponseCache 不同，请求完成后不保留结果，不会返回过期数据
+
+作者: ych
+修改历史:
+    1. 2026/10/18 - 创建文件
+"""
+import copy
+import json
+import threading
+
+
+def flight_key(device, url, params=None, scope=None):
+    """生成合并键
+
+    :param device: 设备地址（HttpObj.url_prefix）
+    :param scope: 区分调用方的范围（如用户名），不需要认证的接口传None，可在不同用户间合并
+    """
+    return device, scope, url, json.dumps(params or {}, sort_keys=True, default=str)
+
+
+class _Call:
+    """一次进行中的请求"""
+
+    __slots__ = ("done", "result", "error", "waiters")
+
+    def __init__(self, done):
+        self.done = done
+        self.result = None
+        self.error = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """线程间的请求合并，可被多个HttpObj共用（键中包含设备地址）"""
+
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def do(self, key, fn):
+        """执行fn()，相同key已有进行中的调用时等待其结果
+
+        结果被多个调用方共用时，每个调用方得到独立的副本
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call(threading.Event())
+                self.misses += 1
+            else:
+                call.waiters += 1
+                self.hits += 1
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return copy.deepcopy(call.result)
+
+        try:
+            call.result = fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            self._finish(key, call)
+            call.done.set()
+        # 完成后不会再有新的等待者，没有等待者时不必复制
+        return copy.deepcopy(call.result) if call.waiters else call.result
+
+    def _finish(self, key, call):
+        with self._lock:
+            if self._calls.get(key) is call:
+                del self._calls[key]
+
+    def forget(self, device):
+        """写操作后调用：该设备进行中的请求可能返回写之前的数据，之后的请求不再与其合并"""
+        with self._lock:
+            for key in [k for k in self._calls if k[0] == device]:
+                del self._calls[key]
+
+    def in_flight(self):
+        with self._lock:
+            return len(self._calls)
+
+    def stats(self):
+        """返回合并统计: hits 为共用了他人结果的请求数，misses 为实际发送的请求数"""
+        with self._lock:
+            total = self.hits + self.misses
+            return {"hits": self.hits, "misses": self.misses, "in_flight": len(self._calls),
+                    "hit_rate": round(self.hits / total, 4) if total else 0.0}
+
+
+class AsyncSingleFlight(SingleFlight):
+    """协程间的请求合并，用于 AsyncHttpObj，同一个对象只能在一个事件循环中使用"""
+
+    async def do(self, key, fn):
+        """await fn()，相同key已有进行中的调用时等待其结果"""
+        import asyncio
+
+        call = self._calls.get(key)
+        if call is not None:
+            call.waiters += 1
+            self.hits += 1
+            # shield: 某个等待者被取消时不影响发起者和其他等待者
+            await asyncio.shield(call.done)
+            if call.error is not None:
+                raise call.error
+            return copy.deepcopy(call.result)
+
+        call = self._calls[key] = _Call(asyncio.get_running_loop().create_future())
+        self.misses += 1
+        try:
+            call.result = await fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            self._finish(key, call)
+            call.done.set_result(None)
+        return copy.deepcopy(call.result) if call.waiters else call.result
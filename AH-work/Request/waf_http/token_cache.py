@@ -0,0 +1,89 @@
+"""
+模块名称: token_cache.py
+
+该模块的目标：
+    将 waf 登录得到的 token 缓存到本地磁盘，按 (ip, port, user) 区分，
+    避免每次运行脚本都重新走一遍公钥获取、RSA加密、登录、OTP的流程
+
+作者: ych
+修改历史:
+    1. 2026/10/18 - 创建文件
+"""
+import json
+import os
+import tempfile
+import threading
+import time
+
+# 默认缓存文件位置
+DEFAULT_CACHE_PATH = os.path.join(os.path.expanduser("~"), ".waf_http", "tokens.json")
+# 默认token有效期（秒），设备端真正的过期时间以请求返回401为准
+DEFAULT_TTL = 30 * 60
+
+
+class TokenCache:
+    """token磁盘缓存类
+
+    缓存文件为json格式，只保存token和过期时间，不保存密码；
+    目录权限为0700，文件权限为0600，写入时先写临时文件再原子替换。
+    """
+
+    def __init__(self, path=DEFAULT_CACHE_PATH, ttl=DEFAULT_TTL):
+        self.path = path
+        self.ttl = ttl
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(ip, port, usr):
+        """生成缓存键"""
+        return f"{usr}@{ip}:{port}"
+
+    def _load(self):
+        """读取缓存文件，文件不存在或损坏时返回空字典"""
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            return data if isinstance(data, dict) else {}
+        except (OSError, ValueError):
+            return {}
+
+    def _save(self, data):
+        """原子写入缓存文件"""
+        dir_path = os.path.dirname(self.path)
+        if dir_path:
+            os.makedirs(dir_path, mode=0o700, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=dir_path or None, prefix=".tokens-")
+        try:
+            os.chmod(tmp_path, 0o600)
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(data, f)
+            os.replace(tmp_path, self.path)
+        except Exception:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            raise
+
+    def get(self, ip, port, usr):
+        """获取未过期的token，不存在或已过期时返回None"""
+        with self._lock:
+            entry = self._load().get(self._key(ip, port, usr))
+        if not entry or entry.get("expire_at", 0) <= time.time():
+            return None
+        return entry.get("token")
+
+    def set(self, ip, port, usr, token):
+        """保存token，同时清理已过期的条目"""
+        now = time.time()
+        with self._lock:
+            data = {k: v for k, v in self._load().items() if v.get("expire_at", 0) > now}
+            data[self._key(ip, port, usr)] = {"token": token, "expire_at": now + self.ttl}
+            self._save(data)
+
+    def invalidate(self, ip, port, usr):
+        """删除指定设备用户的token（设备拒绝该token时调用）"""
+        with self._lock:
+            data = self._load()
+            if data.pop(self._key(ip, port, usr), None) is not None:
+                self._save(data)
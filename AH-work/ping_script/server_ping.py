@@ -7,18 +7,21 @@
 作者: ych
 修改历史:
     1. 2025/9/1 - 创建文件
+    2. 2026/10/18 - 支持传入限流对象（governor），连接和执行命令前等待设备的名额
+    3. 2026/10/18 - 支持传入熔断器（circuit_breaker），设备熔断期间连接和执行命令立即失败
 """
 import paramiko
 import time
 import os
 import sys
 import argparse
+from contextlib import contextmanager, ExitStack
 from datetime import datetime
 from loguru import logger
 
 
 class SSHServer:
-    def __init__(self, host, port, username, password=None, key_path=None):
+    def __init__(self, host, port, username, password=None, key_path=None, governor=None, circuit_breaker=None):
         """
         创建SSH服务器连接对象
         :param host: 服务器IP或域名
@@ -26,6 +29,10 @@ class SSHServer:
         :param username: 登录用户名
         :param password: 密码（可选）
         :param key_path: SSH密钥路径（可选）
+        :param governor: 限流对象（可选），需提供 slot(设备, 接口分类) 上下文管理器，
+                         如 waf_http.rate_limit.RequestGovernor，与该设备的HTTP请求共用名额
+        :param circuit_breaker: 熔断器（可选），需提供 before_call(设备) 和 record(设备, 是否成功, 耗时)，
+                                如 waf_http.circuit_breaker.CircuitBreaker，与该设备的HTTP请求共用状态
         """
         self.host = host
         self.port = port
@@ -35,6 +42,28 @@ class SSHServer:
         self.client = None
         self.sftp = None
         self.shell = None
+        self.governor = governor
+        self.circuit_breaker = circuit_breaker
+
+    @contextmanager
+    def _guard(self, endpoint_class):
+        """检查熔断状态并等待限流名额，未设置时不限制；认证失败说明设备正常响应，不计为失败"""
+        if self.circuit_breaker is not None:
+            self.circuit_breaker.before_call(self.host)
+        with ExitStack() as stack:
+            if self.governor is not None:
+                stack.enter_context(self.governor.slot(self.host, endpoint_class))
+            start = time.time()
+            ok = False
+            try:
+                yield
+                ok = True
+            except paramiko.AuthenticationException:
+                ok = True
+                raise
+            finally:
+                if self.circuit_breaker is not None:
+                    self.circuit_breaker.record(self.host, ok, time.time() - start)
 
     def connect(self):
         """建立SSH连接"""
@@ -42,23 +71,25 @@ class SSHServer:
             self.client = paramiko.SSHClient()
             self.client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
 
-            if self.key_path:
-                # 使用密钥认证
-                key = paramiko.RSAKey.from_private_key_file(self.key_path)
-                self.client.connect(
-                    hostname=self.host,
-                    port=self.port,
-                    username=self.username,
-                    pkey=key
-                )
-            else:
-                # 使用密码认证
-                self.client.connect(
-                    hostname=self.host,
-                    port=self.port,
-                    username=self.username,
-                    password=self.password
-                )
+            # SSH登录与HTTP登录一样按 auth 分类限流
+            with self._guard("auth"):
+                if self.key_path:
+                    # 使用密钥认证
+                    key = paramiko.RSAKey.from_private_key_file(self.key_path)
+                    self.client.connect(
+                        hostname=self.host,
+                        port=self.port,
+                        username=self.username,
+                        pkey=key
+                    )
+                else:
+                    # 使用密码认证
+                    self.client.connect(
+                        hostname=self.host,
+                        port=self.port,
+                        username=self.username,
+                        password=self.password
+                    )
 
             logger.success(f"成功连接到 {self.host}")
             return True
@@ -71,12 +102,14 @@ class SSHServer:
         if not self.client:
             self.connect()
 
-        stdin, stdout, stderr = self.client.exec_command(command)
-        return {
-            'stdout': stdout.read().decode(),
-            'stderr': stderr.read().decode(),
-            'exit_code': stdout.channel.recv_exit_status()
-        }
+        # 远程命令可能修改设备状态，按 write 分类限流
+        with self._guard("write"):
+            stdin, stdout, stderr = self.client.exec_command(command)
+            return {
+                'stdout': stdout.read().decode(),
+                'stderr': stderr.read().decode(),
+                'exit_code': stdout.channel.recv_exit_status()
+            }
 
     def invoke_shell(self):
         """创建交互式shell会话"""